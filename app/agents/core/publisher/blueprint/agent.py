@@ -32,11 +32,17 @@ from app.agents.core.publisher.blueprint.nodes.nodes import (
     should_replan,
     should_end,
 )
+from app.agents.execution.graph_registry import graph_registry
 
 
 def build_agent():
+    """获取 Plan-Execute-Replan 工作流（由注册表编译并缓存，进程内只构建一次）"""
+    return graph_registry.get("blueprint")
+
+
+def compile_agent():
     """
-    构建完整的 Plan-Execute-Replan 工作流
+    构建完整的 Plan-Execute-Replan 工作流（由 graph_registry 调用，业务代码使用 build_agent）
 
     🔥 新架构：基于独立节点的设计
 
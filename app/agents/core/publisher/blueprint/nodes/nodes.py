@@ -22,6 +22,11 @@ from app.agents.schemas.blueprint_schema import Plan, StepType, Step, StepExecut
     CoordinatorDecision
 from app.agents.prompts.publisher_prompts.planner.replanner_prompt import replanner_prompt
 from app.agents.prompts.template import apply_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+REASONER_MODEL = "deepseek:deepseek-reasoner"
 
 
 # ==================== 协调器和规划器节点 ====================
@@ -31,8 +36,9 @@ async def coordinator_step(state: PlanExecuteState) -> Command[Literal["planner"
     协调器节点：与客户沟通并根据请求的清晰度路由任务
     """
     messages = apply_prompt_template("coordinator", state)
-    llm = init_chat_model("deepseek:deepseek-chat")
-    response = await llm.with_structured_output(CoordinatorDecision).ainvoke(messages)
+    llm = init_chat_model(LLM_MODEL)
+    async with governor.llm(provider_of(LLM_MODEL)):
+        response = await llm.with_structured_output(CoordinatorDecision).ainvoke(messages)
 
     messages = state.get("conversation_messages", [])
     if response.message:
@@ -58,11 +64,12 @@ async def plan_step(state: PlanExecuteState):
 
     logger.info("📋 [PLANNER] 开始生成执行计划...")
 
-    llm = init_chat_model("deepseek:deepseek-reasoner")
+    llm = init_chat_model(REASONER_MODEL)
     messages = apply_prompt_template("planner/planner", state)
     planner = llm.with_structured_output(Plan)
 
-    plan = await planner.ainvoke(messages)
+    async with governor.llm(provider_of(REASONER_MODEL)):
+        plan = await planner.ainvoke(messages)
 
     logger.success(f"✅ [PLANNER] 生成了 {len(plan.steps)} 个执行步骤:")
     for idx, step in enumerate(plan.steps, start=1):
@@ -328,8 +335,9 @@ async def _execute_human_involvement_logic(step: Step, state: PlanExecuteState)
     """
 
     logger.info("   🤖 [HUMAN] 调用 LLM 生成交互消息")
-    llm = init_chat_model("deepseek:deepseek-chat")
-    response = await llm.ainvoke(task_formatted)
+    llm = init_chat_model(LLM_MODEL)
+    async with governor.llm(provider_of(LLM_MODEL)):
+        response = await llm.ainvoke(task_formatted)
 
     # 通过 LangGraph 的 interrupt 机制中断等待用户输入
     interrupt_payload = {
@@ -391,8 +399,9 @@ async def _execute_blueprint_logic(step: Step, state: PlanExecuteState) -> str:
     """
 
     logger.info("   🤖 [BLUEPRINT] 调用 LLM 生成蓝图")
-    llm = init_chat_model("deepseek:deepseek-chat")
-    response = await llm.ainvoke(task_formatted)
+    llm = init_chat_model(LLM_MODEL)
+    async with governor.llm(provider_of(LLM_MODEL)):
+        response = await llm.ainvoke(task_formatted)
 
     logger.info(f"   ✓ [BLUEPRINT] 蓝图生成完成")
     return response.content
@@ -444,7 +453,7 @@ async def replan_step(state: PlanExecuteState):
     # 调用 LLM 进行重新规划
     logger.info("   🤖 [REPLAN] 调用 LLM 分析当前状态")
 
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
     replanner = replanner_prompt | llm.with_structured_output(ReplanSteps)
 
     prompt_input = {
@@ -455,7 +464,8 @@ async def replan_step(state: PlanExecuteState):
         "total_pending": len(pending_steps),
     }
 
-    output = await replanner.ainvoke(prompt_input)
+    async with governor.llm(provider_of(LLM_MODEL)):
+        output = await replanner.ainvoke(prompt_input)
 
     logger.info(f"   🎯 [REPLAN] 规划结果: {len(output.steps)} 个新步骤")
     logger.info(f"   💭 [REPLAN] 推理: {output.reasoning[:200]}...")
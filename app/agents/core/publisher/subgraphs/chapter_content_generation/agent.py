@@ -22,8 +22,8 @@ def create_iterative_chapter_subgraph():
     流程:
         START
           ↓
-        generate_queries (只在第一轮执行，生成初始 queries，Send 并行搜索)
-          ↓
+        generate_queries (只在第一轮执行，生成初始 queries，Send 并行搜索；
+          ↓                已有文档级首轮搜索结果时直接进入 write)
         search (并行执行，结果通过 reducer 汇总)
           ↓
         write (基于搜索结果写/完善草稿，清空 search_results)
@@ -1,8 +1,11 @@
 """
 Chapter Content Generation Nodes - Iterative Chapter Generation Implementation
+
+所有节点都是原生异步节点（ainvoke / 异步搜索），不占用 LangGraph 的线程池，
+单个 worker 可以同时推进的章节数只受并发槽位（governor）限制。
 """
+import asyncio
 from dotenv import load_dotenv
-from langchain_deepseek import ChatDeepSeek
 from loguru import logger
 from typing import Dict, Any, List
 from langchain.chat_models import init_chat_model
@@ -16,7 +19,16 @@ from app.agents.core.publisher.subgraphs.chapter_content_generation.state import
 )
 from app.agents.prompts.template import render_prompt_template
 from app.agents.tools.generation.chart_generation import generate_chart
+from app.agents.tools.search.evidence_packer import collect_sources, count_pages, pack_evidence
+from app.agents.tools.search.evidence_store import evidence_store
+from app.agents.tools.search.search_postprocessor import dedupe_search_results
 from app.agents.tools.thinking.thinking_tools import think, criticize
+from app.agents.execution.concurrency import governor, llm_slot_middleware, provider_of
+from app.agents.execution.progress import emit_progress
+from app.config import settings
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 load_dotenv()
 
@@ -47,22 +59,28 @@ class DraftEvaluation(BaseModel):
 # Node 1: Generate Initial Queries (只在第一轮执行)
 # ============================================================
 
-def generate_queries_node(state: ChapterIterativeState) -> Command:
+async def generate_queries_node(state: ChapterIterativeState) -> Command:
     """
     Node 1: Generate initial search queries based on chapter outline
 
-    只在第一轮执行，根据 chapter_outline 生成 3 个初始 queries
+    只在第一轮执行，根据 chapter_outline 生成 3 个初始 queries；
+    已有文档级研究规划的首轮搜索结果（输入 search_results 非空）时跳过查询生成，直接进入 write
 
     Output: Command with Send list to search_node
     """
     chapter_id = state["chapter_id"]
+    prefetched = state.get("search_results") or []
+    if prefetched:
+        logger.info(f"  🔍 [Chapter {chapter_id}] Using {len(prefetched)} prefetched search results")
+        return Command(goto="write")
+
     chapter_outline = state["chapter_outline"]
     chapter_title = chapter_outline.title
     chapter_description = getattr(chapter_outline, "description", "")
     content_requirements = getattr(chapter_outline, "content_requirements", "")
     writing_guidance = getattr(chapter_outline, "writing_guidance", "")
 
-    llm = ChatDeepSeek(model="deepseek-chat", temperature=0)
+    llm = init_chat_model(LLM_MODEL, temperature=0)
     llm_with_structure = llm.with_structured_output(QueryList)
 
     logger.info(f"  🔍 [Chapter {chapter_id}] Generating initial search queries...")
@@ -74,7 +92,8 @@ def generate_queries_node(state: ChapterIterativeState) -> Command:
     })
 
     try:
-        result = llm_with_structure.invoke(prompt)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            result = await llm_with_structure.ainvoke(prompt)
         queries = result.queries[:3]  # Ensure max 3 queries
 
         logger.info(f"    ✓ Generated {len(queries)} queries:")
@@ -111,7 +130,7 @@ def generate_queries_node(state: ChapterIterativeState) -> Command:
 # Node 2: Search (Pure Search Node)
 # ============================================================
 
-def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
+async def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Node 2: Pure search execution (supports parallel execution)
 
@@ -125,7 +144,7 @@ def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
     logger.info(f"    Query: {search_query}")
 
     try:
-        from app.agents.tools.search.tavily_search import searcher
+        from app.agents.tools.search.tavily_search import search_pages
     except ImportError:
         logger.error("    ⚠️  Cannot import search tool")
         return {
@@ -135,9 +154,29 @@ def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
             }]
         }
 
+    # 本报告已执行过相同或相似的查询（其他章节、前几轮迭代）时直接复用结果
+    evidence = evidence_store.current()
+    cached = evidence.lookup_query(search_query) if evidence else None
+    if cached is not None:
+        logger.info(f"    ✓ Reused {len(cached)} results from report evidence")
+        emit_progress(
+            "search_completed", chapter_id=chapter_id, query=search_query, pages=count_pages(cached), success=True, cached=True
+        )
+        return {
+            "search_results": [{
+                "query": search_query,
+                "content": cached
+            }]
+        }
+
     try:
-        search_content = searcher.invoke(search_query, max_results=5)
-        logger.info(f"    ✓ Search completed ({len(search_content)} characters)")
+        search_content = await search_pages(search_query)
+        logger.info(f"    ✓ Search completed ({count_pages(search_content)} pages)")
+        emit_progress(
+            "search_completed", chapter_id=chapter_id, query=search_query, pages=count_pages(search_content), success=True
+        )
+        if evidence:
+            await asyncio.to_thread(evidence.add_search, search_query, search_content)
 
         return {
             "search_results": [{
@@ -148,6 +187,7 @@ def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
 
     except Exception as e:
         logger.error(f"    ⚠️  Search failed: {e}")
+        emit_progress("search_completed", chapter_id=chapter_id, query=search_query, pages=0, success=False)
         return {
             "search_results": [{
                 "query": search_query,
@@ -197,13 +237,52 @@ async def write_node(state: ChapterIterativeState) -> Dict[str, Any]:
         logger.info(f"    ↳ Chart generation enabled")
 
     # Initialize LLM
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
 
-    # Format search results
-    search_results_text = "\n\n---\n\n".join([
-        f"**Query**: {r['query']}\n**Results**:\n{r['content']}"
-        for r in search_results_list
-    ]) if search_results_list else "No search results available."
+    # 同一章节的多次搜索经常返回相同或转载的页面，写作前跨查询去重
+    if settings.SEARCH_NEAR_DUPLICATE_THRESHOLD and search_results_list:
+        search_results_list, removed = dedupe_search_results(
+            search_results_list, settings.SEARCH_NEAR_DUPLICATE_THRESHOLD
+        )
+        if removed:
+            logger.info(f"    ↳ Removed {removed} duplicate pages across queries")
+
+    # Format search results：按章节描述挑选相关段落，控制在 token 预算内
+    # 有报告级素材库时从本报告抓取过的所有页面中检索（前几轮迭代、其他章节的素材），否则只用本轮结果；
+    # 本轮结果已由 search_node / research_planner 写入素材库
+    evidence = evidence_store.current()
+    query_text = f"{chapter_title}\n{description}\n{content_requirements}"
+    if settings.WRITING_EVIDENCE_PACKING and evidence is not None:
+        search_results_text, pack_stats = await asyncio.to_thread(
+            evidence.retrieve,
+            query_text,
+            settings.WRITING_EVIDENCE_TOKEN_BUDGET,
+            collect_sources(search_results_list)[1],
+            [result["query"] for result in search_results_list],
+        )
+    elif settings.WRITING_EVIDENCE_PACKING and search_results_list:
+        search_results_text, pack_stats = pack_evidence(
+            search_results_list,
+            query_text=query_text,
+            token_budget=settings.WRITING_EVIDENCE_TOKEN_BUDGET,
+            passage_chars=settings.WRITING_EVIDENCE_PASSAGE_CHARS,
+            max_passages_per_source=settings.WRITING_EVIDENCE_MAX_PASSAGES_PER_SOURCE,
+        )
+    else:
+        pack_stats = None
+
+    if pack_stats is not None:
+        logger.info(
+            f"    ↳ Evidence packed: {pack_stats['selected_passages']}/{pack_stats['passages']} passages "
+            f"from {pack_stats['selected_sources']}/{pack_stats['sources']} sources, "
+            f"~{pack_stats['tokens']}/{pack_stats['token_budget']} tokens"
+        )
+        search_results_text = search_results_text or "No search results available."
+    else:
+        search_results_text = "\n\n---\n\n".join([
+            f"**Query**: {r['query']}\n**Results**:\n{r['content']}"
+            for r in search_results_list
+        ]) if search_results_list else "No search results available."
 
     # 计算迭代状态
     revision_needed = iteration > 0
@@ -238,7 +317,13 @@ async def write_node(state: ChapterIterativeState) -> Dict[str, Any]:
     user_prompt = render_prompt_template(f"{PROMPT_PATH}/write_draft_initial", template_params)
 
     # Create Agent with tools
-    agent = create_agent(model=llm, tools=[generate_chart], system_prompt=system_prompt)
+    # 槽位只在模型调用期间持有，generate_chart 的 Docker 执行不占用 LLM 并发
+    agent = create_agent(
+        model=llm,
+        tools=[generate_chart],
+        system_prompt=system_prompt,
+        middleware=[llm_slot_middleware(LLM_MODEL)],
+    )
 
     try:
         logger.info(f"    ↳ Starting Agent (with chart generation capability)...")
@@ -260,6 +345,13 @@ async def write_node(state: ChapterIterativeState) -> Dict[str, Any]:
 
 
         logger.info(f"    ✓ Draft length: {len(new_draft)} characters")
+        emit_progress(
+            "chapter_draft_written",
+            chapter_id=chapter_id,
+            iteration=iteration + 1,
+            word_count=len(new_draft),
+            search_results=len(search_results_list),
+        )
         logger.info(f"    ✓ Charts generated: {new_draft.count('![')}")
 
         logger.info(f"draft content: \n"
@@ -287,7 +379,7 @@ async def write_node(state: ChapterIterativeState) -> Dict[str, Any]:
 # Node 4: Evaluate Draft Quality
 # ============================================================
 
-def evaluate_node(state: ChapterIterativeState) -> Dict[str, Any]:
+async def evaluate_node(state: ChapterIterativeState) -> Dict[str, Any]:
     """
     Node 4: Evaluate draft quality and generate follow-up queries if needed
 
@@ -306,7 +398,7 @@ def evaluate_node(state: ChapterIterativeState) -> Dict[str, Any]:
 
     logger.info(f"  📊 [Chapter {chapter_id}] Evaluating draft...")
 
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
     llm_with_structure = llm.with_structured_output(DraftEvaluation)
 
     eval_prompt = render_prompt_template(f"{PROMPT_PATH}/evaluate_draft", {
@@ -319,9 +411,17 @@ def evaluate_node(state: ChapterIterativeState) -> Dict[str, Any]:
     })
 
     try:
-        result = llm_with_structure.invoke(eval_prompt)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            result = await llm_with_structure.ainvoke(eval_prompt)
 
         logger.info(f"    ✓ Coverage score: {result.coverage_score:.2f}")
+        emit_progress(
+            "chapter_evaluated",
+            chapter_id=chapter_id,
+            coverage_score=result.coverage_score,
+            satisfied=result.is_satisfied,
+            follow_up_queries=len(result.follow_up_queries) if not result.is_satisfied else 0,
+        )
         logger.info(f"    ✓ Satisfied: {'Yes' if result.is_satisfied else 'No'}")
 
         if not result.is_satisfied and result.follow_up_queries:
@@ -398,7 +498,7 @@ def route_after_evaluate(state: ChapterIterativeState):
 # Final Node
 # ============================================================
 
-def finalize_node(state: ChapterIterativeState) -> Dict[str, Any]:
+async def finalize_node(state: ChapterIterativeState) -> Dict[str, Any]:
     """
     Final node: prepare output
     """
@@ -19,6 +19,7 @@ from app.agents.core.publisher.subgraphs.research.nodes import (
 )
 
 from app.agents.core.publisher.subgraphs.research.state import ResearcherState
+from app.agents.execution.graph_registry import graph_registry
 
 
 def build_research_subgraph():
@@ -60,7 +61,8 @@ async def run_research_subgraph(topics: List[str], need_search: bool, language:
     Returns:
         格式化的研究结果字符串
     """
-    subgraph = build_research_subgraph()
+    # 编译结果由注册表缓存，每次研究不再重新编译
+    subgraph = graph_registry.get("research")
 
     initial_state = {
         "research_topics": topics,
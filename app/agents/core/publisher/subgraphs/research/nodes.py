@@ -20,6 +20,10 @@ from langchain.chat_models import init_chat_model
 from app.agents.tools.search.tavily_search import searcher
 from app.agents.core.publisher.subgraphs.research.state import ResearcherState, SingleResearchState
 from app.agents.prompts.template import apply_prompt_template, render_prompt_template
+from app.agents.execution.concurrency import llm_slot_middleware
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 
 def plan_research(state: ResearcherState) -> list:
@@ -99,7 +103,7 @@ async def execute_single_research_node(state: SingleResearchState):
     - Response language: {language}
     """
     # 使用支持流式的 LLM
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
 
     try:
 
@@ -110,6 +114,7 @@ async def execute_single_research_node(state: SingleResearchState):
             llm,
             search_tools,
             system_prompt=system_prompt,
+            middleware=[llm_slot_middleware(LLM_MODEL)],
         )
 
         # 使用 ainvoke 支持异步和流式
@@ -21,21 +21,12 @@ from app.agents.core.publisher.subgraphs.section_writer.nodes import (
     chapter_finalizer,
     revise_draft
 )
-from app.agents.core.publisher.subgraphs.chapter_content_generation.agent import (
-    create_iterative_chapter_subgraph
-)
-
-
-# 缓存 chapter_content_generation subgraph 实例
-_content_generation_subgraph = None
+from app.agents.execution.graph_registry import graph_registry
 
 
 def get_content_generation_subgraph():
-    """懒加载 chapter_content_generation subgraph"""
-    global _content_generation_subgraph
-    if _content_generation_subgraph is None:
-        _content_generation_subgraph = create_iterative_chapter_subgraph()
-    return _content_generation_subgraph
+    """获取 chapter_content_generation subgraph（由注册表编译并缓存）"""
+    return graph_registry.get("chapter_content_generation")
 
 
 async def content_generation_node(state: ChapterState) -> Dict[str, Any]:
@@ -68,7 +59,8 @@ async def content_generation_node(state: ChapterState) -> Dict[str, Any]:
         "writing_principles": state.get("writing_principles"),
         # 初始化迭代状态
         "iteration": 0,
-        "search_results": [],
+        # 有文档级首轮搜索结果时，子图跳过查询生成直接写作
+        "search_results": state.get("prefetched_results") or [],
         "draft": "",
     }
 
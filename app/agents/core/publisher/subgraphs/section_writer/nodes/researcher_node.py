@@ -7,8 +7,12 @@ from app.agents.core.publisher.subgraphs.section_writer.state import ChapterStat
 from app.agents.prompts.template import apply_prompt_template
 from app.agents.core.publisher.subgraphs.research.agent import run_research_subgraph
 from app.agents.schemas.research_schema import SearchQueryList
+from app.agents.execution.concurrency import governor, provider_of
 from langchain.chat_models import init_chat_model
 
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+
 MAX_QUERIES_PER_CHAPTER = 5       # 最多并行多少个查询
 
 
@@ -19,7 +23,7 @@ async def chapter_researcher(state: ChapterState) -> Dict[str, Any]:
 
     logger.info(f"🔍 [Chapter {chapter_id}] Researcher 开始研究章节：《{chapter_title}》")
     # === 1. 生成搜索查询 ===
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
 
     queries: List[str] = []
     try:
@@ -34,7 +38,8 @@ async def chapter_researcher(state: ChapterState) -> Dict[str, Any]:
             }
         )
 
-        query_obj: SearchQueryList = llm_with_structure.invoke(messages)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            query_obj: SearchQueryList = await llm_with_structure.ainvoke(messages)
 
         queries = query_obj.query
 
@@ -15,6 +15,11 @@ from app.agents.schemas.review_schema import ReviewResult
 from langchain.chat_models import init_chat_model
 from langchain.messages import HumanMessage, SystemMessage
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 
 async def review_draft(state: ChapterState) -> Dict[str, Any]:
@@ -38,7 +43,7 @@ async def review_draft(state: ChapterState) -> Dict[str, Any]:
     logger.info(f"📊 [Chapter {chapter_id}] 《{chapter_title}》 Reviewer: 开始审查...")
 
     # 初始化 LLM（这里建议后续改为从 config 中读取，便于切换模型）
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
 
     system_message = render_prompt_template(
         "publisher_prompts/chapter_writing/chapter_review_system",
@@ -65,7 +70,8 @@ async def review_draft(state: ChapterState) -> Dict[str, Any]:
 
 
         # 异步调用，获取结构化结果
-        review_result: ReviewResult = await structured_llm.ainvoke(messages)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            review_result: ReviewResult = await structured_llm.ainvoke(messages)
 
         logger.success(
             f"✅ 审查完成 | 总分: {review_result.score}/100 | "
@@ -92,6 +98,13 @@ async def review_draft(state: ChapterState) -> Dict[str, Any]:
     current_revision_count = state.get("revision_count", 0) + 1
 
     logger.info(f"↳ 修订次数: {current_revision_count} ")
+    emit_progress(
+        "chapter_reviewed",
+        chapter_id=chapter_id,
+        score=review_result.score,
+        status=review_result.status,
+        review_round=current_revision_count,
+    )
 
     return {
         "latest_review": review_result,  # 当前最新的审查结果（供路由节点决策使用）
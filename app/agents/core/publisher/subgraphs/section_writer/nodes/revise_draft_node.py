@@ -9,12 +9,20 @@
 @Desc    :   章节修订节点 - 根据审查反馈修订草稿
 """
 
+import asyncio
 from typing import Dict, Any
 from loguru import logger
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from app.agents.core.publisher.subgraphs.section_writer.state import ChapterState
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+from app.agents.tools.search.evidence_store import evidence_store
+from app.config import settings
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 
 async def revise_draft(state: ChapterState) -> Dict[str, Any]:
@@ -38,6 +46,7 @@ async def revise_draft(state: ChapterState) -> Dict[str, Any]:
     revision_count = state.get("revision_count", 0)
 
     logger.info(f"📝 [Chapter {chapter_id}] 《{chapter_title}》 Reviser: 开始第 {revision_count} 次修订...")
+    emit_progress("chapter_revision_started", chapter_id=chapter_id, revision=revision_count)
 
     # 获取当前草稿和审查反馈
     current_draft = state.get("draft", "")
@@ -51,8 +60,28 @@ async def revise_draft(state: ChapterState) -> Dict[str, Any]:
         logger.warning(f"[Chapter {chapter_id}] 无审查结果，跳过修订")
         return {}
 
+    # 按章节描述和审查建议从报告素材库中检索参考素材（修订时补充事实、数据）
+    evidence_text = ""
+    evidence = evidence_store.current()
+    if evidence is not None:
+        chapter_outline = state["chapter_outline"]
+        query_text = "\n".join([
+            chapter_title,
+            getattr(chapter_outline, "description", ""),
+            getattr(chapter_outline, "content_requirements", ""),
+            *(str(s) for s in latest_review.actionable_suggestions),
+        ])
+        # 修订时没有本章的搜索查询，检索不到相关段落时不退回（避免混入其他章节的素材）
+        evidence_text, pack_stats = await asyncio.to_thread(
+            evidence.retrieve, query_text, settings.WRITING_EVIDENCE_REVISION_TOKEN_BUDGET
+        )
+        logger.info(
+            f"[Chapter {chapter_id}] 修订素材: {pack_stats['selected_passages']} 段 "
+            f"/ {pack_stats['selected_sources']} 个来源, ~{pack_stats['tokens']} tokens"
+        )
+
     # 初始化 LLM
-    llm = init_chat_model("deepseek:deepseek-chat", temperature=0.7)
+    llm = init_chat_model(LLM_MODEL, temperature=0.7)
 
     # 渲染 System Prompt
     system_prompt = render_prompt_template(
@@ -72,6 +101,7 @@ async def revise_draft(state: ChapterState) -> Dict[str, Any]:
             "draft": current_draft,
             "general_feedback": latest_review.general_feedback,
             "actionable_suggestions": latest_review.actionable_suggestions,
+            "evidence": evidence_text,
             "language": state["document_outline"].language,
         }
     )
@@ -84,7 +114,8 @@ async def revise_draft(state: ChapterState) -> Dict[str, Any]:
 
         logger.info(messages)
 
-        response = await llm.ainvoke(messages)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            response = await llm.ainvoke(messages)
         revised_draft = response.content.strip()
 
         logger.success(
@@ -7,9 +7,13 @@ from langchain.agents import create_agent
 from app.agents.core.publisher.subgraphs.section_writer.state import ChapterState
 from app.agents.tools.generation.chart_generation import generate_chart
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import llm_slot_middleware
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import AIMessage
 
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+
 
 async def chapter_content_writer(state: ChapterState) -> Dict[str, Any]:
     chapter_id = state["chapter_id"]
@@ -18,7 +22,7 @@ async def chapter_content_writer(state: ChapterState) -> Dict[str, Any]:
     # ===== 1. 开始写作章节（关键节点，建议用 info 保留在生产日志中）=====
     logger.info(f"[ChapterWriter] Chapter {chapter_id} | 开始写作章节：《{chapter_title}》")
 
-    llm = init_chat_model("deepseek:deepseek-chat", temperature=0.8)
+    llm = init_chat_model(LLM_MODEL, temperature=0.8)
 
     # ===== 2. 加载 Prompt 模板（debug 级别，可过滤）=====
     logger.debug(f"[ChapterWriter] Chapter {chapter_id} | 渲染 System Prompt（语气: {state['document_outline'].writing_tone}, "
@@ -43,7 +47,12 @@ async def chapter_content_writer(state: ChapterState) -> Dict[str, Any]:
     # ===== 3. 创建 Agent（debug）=====
     logger.debug(f"[ChapterWriter] Chapter {chapter_id} | 创建写作 Agent（包含 generate_chart 工具）")
 
-    agent = create_agent(model=llm, tools=[generate_chart], system_prompt=system_prompt)
+    agent = create_agent(
+        model=llm,
+        tools=[generate_chart],
+        system_prompt=system_prompt,
+        middleware=[llm_slot_middleware(LLM_MODEL)],
+    )
 
     try:
         logger.info(f"[ChapterWriter] Chapter {chapter_id} | Agent 开始创作（带图表）...")
@@ -43,6 +43,7 @@ class ChapterState(TypedDict):
 
     document_outline: DocumentOutline  # 整体文章的对象（包含要点、指导等）
     chapter_outline: Section  # 章节大纲对象（包含要点、指导等）
+    prefetched_results: list  # 文档级研究规划的首轮搜索结果（为空时章节自行生成查询）
 
     # ========== content_generation 输出 ==========
     # (research_queries 和 research_data 现在在 chapter_content_generation 内部处理)
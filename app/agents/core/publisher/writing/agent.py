@@ -19,6 +19,7 @@ from app.agents.core.publisher.writing.nodes import (
     document_reviewer,
     document_reviser,
     chapter_subgraph_wrapper,
+    research_planner,
 )
 
 # === 配置常量 ===
@@ -92,12 +93,17 @@ def finalize_review(state: DocumentState) -> dict:
     }
 
 
-def create_main_graph():
+def create_main_graph(checkpointer=None):
     """
     创建 Main Graph
 
+    Args:
+        checkpointer: 持久化 checkpointer（按 thread_id = document_id 保存每个 super-step）。
+            章节子图不单独指定 checkpointer，运行时继承主图的 checkpointer，
+            并发章节中已完成的章节会作为 pending writes 保存，恢复时不会重新生成。
+
     流程:
-        role_builder → chapter_dispatcher → [Subgraphs...] → chapter_aggregator
+        role_builder → research_planner → chapter_dispatcher → [Subgraphs...] → chapter_aggregator
         → document_integrator → document_reviewer → [revise loop] → finalize → END
 
     审查流程：
@@ -110,6 +116,7 @@ def create_main_graph():
 
     # === 2. 添加 Main Graph 节点 ===
     main_graph.add_node("role_builder_node", role_builder_node)
+    main_graph.add_node("research_planner", research_planner)
     main_graph.add_node("chapter_dispatcher", chapter_dispatcher)
     main_graph.add_node("chapter_aggregator", chapter_aggregator)
     main_graph.add_node("document_integrator", document_integrator)
@@ -126,7 +133,8 @@ def create_main_graph():
     # === 5. 添加边 ===
 
     # 主流程边
-    main_graph.add_edge("role_builder_node", "chapter_dispatcher")
+    main_graph.add_edge("role_builder_node", "research_planner")
+    main_graph.add_edge("research_planner", "chapter_dispatcher")
     main_graph.add_edge("chapter_subgraph", "chapter_aggregator")
     main_graph.add_edge("chapter_aggregator", "document_integrator")
     main_graph.add_edge("document_integrator", "document_reviewer")
@@ -148,6 +156,6 @@ def create_main_graph():
     main_graph.add_edge("finalize_review", END)
 
     # === 6. 编译 ===
-    compiled_main_graph = main_graph.compile()
+    compiled_main_graph = main_graph.compile(checkpointer=checkpointer)
 
     return compiled_main_graph
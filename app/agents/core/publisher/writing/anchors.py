@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Chapter Anchors - 章节锚点
+
+整合后的文档按 ## 章节切分（report_content.split_markdown_chapters），章节标题即锚点。
+审查建议、单章审查结果、修订都通过锚点定位章节，这里提供锚点比较、大纲匹配和目录。
+
+目录不是 ## 章节：它以 TOC_START / TOC_END 注释包裹，放在文档标题之后（前言块中）。
+审查和修订前用 split_toc 取出目录，修订完成后用 restore_toc 按新的章节标题重新生成。
+"""
+import re
+from typing import List, Optional, Tuple
+
+from app.agents.schemas.document_outline_schema import DocumentOutline, Section
+from app.services.report_content import CHAPTER_SEPARATOR, HEADING_PATTERN, scan_headings
+
+# 跨章节 / 全局建议的锚点
+GLOBAL_ANCHOR = "global"
+
+# 目录块的起止标记（Markdown 渲染时不显示）
+TOC_START = "<!-- toc -->"
+TOC_END = "<!-- /toc -->"
+_TOC_PATTERN = re.compile(
+    rf"\s*{re.escape(TOC_START)}\n\*\*(?P<label>.+?)\*\*\n.*?{re.escape(TOC_END)}\s*", re.S
+)
+
+
+def anchor_key(title: str) -> str:
+    """锚点比较键：忽略大小写、空白和标点"""
+    return re.sub(r"[\W_]+", "", (title or "").lower())
+
+
+def strip_numbering(key: str) -> str:
+    """去掉章节编号前缀（"1"、"第一章"、"chapter2"），用于在建议正文中查找章节名称"""
+    return re.sub(r"^(第[0-9一二三四五六七八九十百]+[章节部分]|chapter\d+|section\d+|[0-9]+)", "", key)
+
+
+def match_outline_section(outline: DocumentOutline, title: str) -> Optional[Section]:
+    """找到章节标题对应的大纲章节（标题相同，或去掉编号后互相包含）"""
+    key = anchor_key(title)
+    if not key:
+        return None
+    sections: List[Section] = outline.sections
+    for section in sections:
+        if anchor_key(section.title) == key:
+            return section
+    bare = strip_numbering(key)
+    for section in sections:
+        outline_bare = strip_numbering(anchor_key(section.title))
+        if len(outline_bare) >= 2 and len(bare) >= 2 and (outline_bare in bare or bare in outline_bare):
+            return section
+    return None
+
+
+# ============================================
+# 目录
+# ============================================
+
+def slugify(text: str) -> str:
+    """生成与常见 Markdown 渲染器一致的锚点（保留中文，去除标点，空格转连字符）"""
+    text = re.sub(r"[^\w\s\-]", "", text.strip().lower())
+    return re.sub(r"\s", "-", text)
+
+
+def build_toc(content: str, label: str) -> str:
+    """根据 ## / ### 标题生成目录块（没有标题时为空字符串）"""
+    items = [
+        f"{'    ' * (level - 2)}- [{title}](#{slugify(title)})"
+        for _, level, title in scan_headings(content.splitlines())
+        if level in (2, 3)
+    ]
+    if not items:
+        return ""
+    return f"{TOC_START}\n**{label}**\n\n" + "\n".join(items) + f"\n{TOC_END}"
+
+
+def split_toc(document: str) -> Tuple[str, Optional[str]]:
+    """
+    取出目录块
+
+    Returns:
+        (去掉目录的文档, 目录标题（没有目录时为 None）)
+    """
+    match = _TOC_PATTERN.search(document)
+    if not match:
+        return document, None
+    before, after = document[:match.start()], document[match.end():]
+    return CHAPTER_SEPARATOR.join(part for part in (before, after) if part), match.group("label")
+
+
+def restore_toc(document: str, label: Optional[str]) -> str:
+    """按文档当前的章节标题重新生成目录，放回文档标题之后（label 为 None 时原样返回）"""
+    if label is None:
+        return document
+    toc = build_toc(document, label)
+    if not toc:
+        return document
+    title, _, rest = document.partition("\n")
+    match = HEADING_PATTERN.match(title)
+    if match and len(match.group(1)) == 1:
+        return CHAPTER_SEPARATOR.join(part for part in (title, toc, rest.strip("\n")) if part)
+    return CHAPTER_SEPARATOR.join((toc, document))
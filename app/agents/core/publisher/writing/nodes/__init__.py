@@ -14,4 +14,5 @@ from .document_reviewer import document_reviewer
 from .document_reviser import document_reviser
 from .document_integrator import document_integrator
 from .document_writing_role_builder import role_builder_node
-from .chapter_subgraph_wrapper import chapter_subgraph_wrapper
\ No newline at end of file
+from .chapter_subgraph_wrapper import chapter_subgraph_wrapper
+from .research_planner import research_planner
@@ -15,18 +15,13 @@
 """
 from typing import Dict, Any
 from loguru import logger
-from app.agents.core.publisher.subgraphs.section_writer.agent import create_chapter_subgraph
-
-# 在模块级别创建 subgraph 实例（避免重复编译）
-_chapter_subgraph = None
+from app.agents.execution.graph_registry import graph_registry
+from app.agents.execution.progress import emit_progress
 
 
 def get_chapter_subgraph():
-    """懒加载 subgraph 实例"""
-    global _chapter_subgraph
-    if _chapter_subgraph is None:
-        _chapter_subgraph = create_chapter_subgraph()
-    return _chapter_subgraph
+    """获取章节 subgraph（由注册表编译并缓存，所有文档共享）"""
+    return graph_registry.get("section_writer")
 
 
 async def chapter_subgraph_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,6 +49,7 @@ async def chapter_subgraph_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
         chapter_title = f"Chapter {chapter_id}"
 
     logger.info(f"📝 [Wrapper] 开始执行章节 {chapter_id}: {chapter_title}")
+    emit_progress("chapter_started", chapter_id=chapter_id, title=chapter_title)
 
     # 构建 ChapterState 输入
     subgraph_input = {
@@ -63,6 +59,7 @@ async def chapter_subgraph_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
         "writing_principles": state["writing_principles"],
         "document_outline": state["document_outline"],
         "chapter_outline": state["chapter_outline"],
+        "prefetched_results": state.get("prefetched_results", []),
     }
 
     # 获取 subgraph 实例并执行
@@ -70,6 +67,15 @@ async def chapter_subgraph_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
     result = await subgraph.ainvoke(subgraph_input)
 
     logger.success(f"✅ [Wrapper] 章节 {chapter_id} 执行完成")
+    metadata = result.get("completed_chapters", {}).get(chapter_id, {}).get("metadata", {})
+    emit_progress(
+        "chapter_finished",
+        chapter_id=chapter_id,
+        title=chapter_title,
+        word_count=metadata.get("word_count"),
+        score=metadata.get("final_score"),
+        revision_count=metadata.get("revision_count"),
+    )
 
     # 只返回需要合并到父图的字段
     # 这样 writer_role 等字段不会被传回父图，避免并发冲突
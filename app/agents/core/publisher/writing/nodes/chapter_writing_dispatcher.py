@@ -4,6 +4,7 @@ Chapter Dispatcher - 并行分发章节任务
 from loguru import logger
 from langgraph.types import Send, Command
 from app.agents.core.publisher.writing.state import DocumentState
+from app.agents.execution.progress import emit_progress
 
 
 def chapter_dispatcher(state: DocumentState) -> Command:
@@ -31,6 +32,7 @@ def chapter_dispatcher(state: DocumentState) -> Command:
 
     # === 构建 ChapterState 输入数据 ===
     send_list = []
+    chapter_research = state.get("chapter_research") or {}
 
     for idx, section in enumerate(document_outline.sections, start=1):
         # 构建符合 ChapterState 的数据
@@ -41,10 +43,17 @@ def chapter_dispatcher(state: DocumentState) -> Command:
             "writing_principles": state["writing_principles"],
             "document_outline": document_outline,  # ✅ 传递给 subgraph 时用 document_outline
             "chapter_outline": section,  # ✅ 传递 Section 对象
+            "prefetched_results": chapter_research.get(idx, []),  # 文档级研究规划的首轮搜索结果
         }
 
         send_list.append(Send("chapter_subgraph", chapter_input))
 
+    emit_progress(
+        "chapters_dispatched",
+        total_chapters=total_chapters,
+        chapters=[{"chapter_id": idx, "title": s.title} for idx, s in enumerate(document_outline.sections, start=1)],
+    )
+
     logger.info(f"  ✓ 分发完成，等待 Subgraph 执行...")
     logger.debug(f"  🔍 [DEBUG] Send 列表长度: {len(send_list)}")
     logger.debug(f"  🔍 [DEBUG] Send 目标: chapter_subgraph\n")
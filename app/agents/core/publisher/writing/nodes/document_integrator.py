@@ -1,21 +1,31 @@
 # -*- coding: utf-8 -*-
 """
-Document Integrator - 智能文档整合节点
+Document Integrator - 文档整合节点
 
-职责：
-1. 将所有章节内容传递给 LLM
-2. 让 LLM 自主完成文档整合、过渡、参考文献等
+两种整合方式（writing_integration.mode）：
+- transitions（默认）：章节正文在本地按顺序拼接，LLM 只并行生成引言、总结和相邻章节之间的过渡段，
+  每个片段完成后立即通过进度事件推送（integration_piece），前端可以边生成边展示
+- llm：将所有章节交给 LLM 整篇重写（耗时随文档长度增长，且可能超出模型输出上限）
 """
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Optional
 from loguru import logger
+from app.agents.core.publisher.writing.anchors import build_toc
 from app.agents.core.publisher.writing.state import DocumentState
 from langchain.chat_models import init_chat_model
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+from app.config import settings
+from app.services.report_content import HEADING_PATTERN, scan_headings
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 
 async def document_integrator(state: DocumentState) -> Dict[str, Any]:
     """
-    智能文档整合节点（完全由 LLM 驱动）
+    文档整合节点
 
     Args:
         state: DocumentState
@@ -23,6 +33,183 @@ async def document_integrator(state: DocumentState) -> Dict[str, Any]:
     Returns:
         {"document": str}
     """
+    if settings.WRITING_INTEGRATION_MODE == "llm":
+        return await _integrate_with_llm(state)
+    return await _integrate_with_transitions(state)
+
+
+# ============================================
+# transitions：本地拼接 + 并行生成连接片段
+# ============================================
+
+def _is_chinese(language: str) -> bool:
+    return (language or "").lower().startswith(("zh", "chinese", "中文"))
+
+
+def _normalize_chapter(content: str, title: str) -> str:
+    """
+    统一章节标题层级：章节标题为 ##，小节依次下移
+
+    章节正文没有以标题开头时补充 "## 章节标题"。
+    """
+    content = content.strip()
+    lines = content.splitlines()
+    headings = scan_headings(lines)
+    if headings:
+        shift = 2 - min(level for _, level, _ in headings)
+        if shift:
+            for idx, level, text in headings:
+                lines[idx] = f"{'#' * max(1, min(6, level + shift))} {text}"
+            content = "\n".join(lines)
+    if not HEADING_PATTERN.match(content.split("\n", 1)[0]):
+        content = f"## {title}\n\n{content}"
+    return content
+
+
+def _excerpt(content: str, chars: int, tail: bool = False) -> str:
+    content = content.strip()
+    if len(content) <= chars:
+        return content
+    return "..." + content[-chars:] if tail else content[:chars] + "..."
+
+
+async def _generate_piece(
+    llm,
+    system_prompt: str,
+    template: str,
+    context: Dict[str, Any],
+    label: str
+) -> Optional[str]:
+    """生成单个连接片段，失败时返回 None（该片段省略，不影响整篇文档）"""
+    user_prompt = render_prompt_template(
+        f"publisher_prompts/document_writing/{template}", context
+    )
+    try:
+        async with governor.llm(provider_of(LLM_MODEL)):
+            response = await llm.ainvoke([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ])
+        text = response.content.strip()
+        return text or None
+    except Exception as e:
+        logger.warning(f"  ⚠️  {label} 生成失败，已省略: {e}")
+        return None
+
+
+async def _integrate_with_transitions(state: DocumentState) -> Dict[str, Any]:
+    logger.info("\n📚 [Document Integrator] 本地拼接章节，并行生成引言/总结/过渡...")
+
+    chapters = state["completed_chapters"]
+    outline = state["document_outline"]
+    sorted_chapters = sorted(chapters.items(), key=lambda x: x[0])
+    total_chapters = len(sorted_chapters)
+    chinese = _is_chinese(outline.language)
+    excerpt_chars = settings.WRITING_INTEGRATION_EXCERPT_CHARS
+
+    # === 1. 本地规整章节 ===
+    titles = []
+    bodies = []
+    for ch_id, ch_data in sorted_chapters:
+        title = ch_data.get("metadata", {}).get("chapter_title") or (
+            outline.sections[ch_id - 1].title if 0 < ch_id <= len(outline.sections) else f"Chapter {ch_id}"
+        )
+        titles.append(title)
+        bodies.append(_normalize_chapter(ch_data["content"], title))
+
+    # 片段位置：引言、章节 1、过渡 1、章节 2 …… 章节 n、总结
+    introduction_position = 0
+    chapter_positions = [1 + 2 * i for i in range(total_chapters)]
+    conclusion_position = 2 * total_chapters
+    total_pieces = conclusion_position + 1
+
+    emit_progress("integration_started", total_chapters=total_chapters, mode="transitions", total_pieces=total_pieces)
+
+    # 章节正文不需要等待 LLM，先推送
+    for idx, body in enumerate(bodies):
+        emit_progress(
+            "integration_piece", piece="chapter", position=chapter_positions[idx],
+            chapter_id=sorted_chapters[idx][0], content=body,
+        )
+
+    # === 2. 并行生成引言、总结和过渡 ===
+    llm = init_chat_model(LLM_MODEL)
+    system_prompt = render_prompt_template(
+        "publisher_prompts/document_writing/document_integrator_piece_system",
+        {
+            "language": outline.language,
+            "writing_style": outline.writing_style,
+            "writing_tone": outline.writing_tone,
+        }
+    )
+
+    async def produce(piece: str, position: int, template: str, context: Dict[str, Any]):
+        text = await _generate_piece(llm, system_prompt, template, context, f"{piece}@{position}")
+        if text is not None and piece == "conclusion" and not HEADING_PATTERN.match(text.split("\n", 1)[0]):
+            text = f"## {'总结' if chinese else 'Conclusion'}\n\n{text}"
+        if text is not None:
+            emit_progress("integration_piece", piece=piece, position=position, content=text)
+        return position, text
+
+    jobs = [
+        produce("introduction", introduction_position, "document_integrator_introduction", {
+            "outline": outline,
+            "total_chapters": total_chapters,
+            "chapters": [
+                {"title": t, "excerpt": _excerpt(b, excerpt_chars)} for t, b in zip(titles, bodies)
+            ],
+        }),
+        produce("conclusion", conclusion_position, "document_integrator_conclusion", {
+            "outline": outline,
+            "total_chapters": total_chapters,
+            "chapters": [
+                {"title": t, "excerpt": _excerpt(b, excerpt_chars, tail=True)} for t, b in zip(titles, bodies)
+            ],
+        }),
+    ]
+    for idx in range(total_chapters - 1):
+        jobs.append(produce("transition", chapter_positions[idx] + 1, "document_integrator_transition", {
+            "outline": outline,
+            "position": idx + 1,
+            "previous_title": titles[idx],
+            "previous_excerpt": _excerpt(bodies[idx], excerpt_chars, tail=True),
+            "next_title": titles[idx + 1],
+            "next_excerpt": _excerpt(bodies[idx + 1], excerpt_chars),
+        }))
+
+    pieces: Dict[int, Optional[str]] = dict(await asyncio.gather(*jobs))
+
+    # === 3. 按位置组装 ===
+    for idx, body in enumerate(bodies):
+        pieces[chapter_positions[idx]] = body
+
+    conclusion = pieces.get(conclusion_position)
+    ordered = [pieces[p] for p in range(total_pieces) if pieces.get(p)]
+    # 目录不作为 ## 章节（审查、修订按 ## 章节切分），修订后由 document_reviser 重新生成
+    toc = build_toc(
+        "\n\n".join(bodies + ([conclusion] if conclusion else [])),
+        "目录" if chinese else "Table of Contents",
+    )
+    header = [f"# {outline.title}"] + ([toc] if toc else [])
+    document = "\n\n".join(header + ordered)
+
+    generated = sum(1 for p, text in pieces.items() if text and p not in chapter_positions)
+    metadata = state.get("document_metadata", {})
+    logger.success(f"  ✓ 文档整合完成")
+    logger.info(f"    - 章节数: {total_chapters}")
+    logger.info(f"    - LLM 片段: {generated}/{total_pieces - total_chapters}")
+    logger.info(f"    - 总字数: {len(document)}")
+    logger.info(f"    - 平均评分: {metadata.get('avg_score', 'N/A')}\n")
+
+    emit_progress("integration_finished", word_count=len(document), fallback=False, mode="transitions")
+    return {"document": document}
+
+
+# ============================================
+# llm：整篇由 LLM 重写
+# ============================================
+
+async def _integrate_with_llm(state: DocumentState) -> Dict[str, Any]:
     logger.info("\n📚 [Document Integrator] 智能文档整合...")
 
     chapters = state["completed_chapters"]
@@ -46,10 +233,12 @@ async def document_integrator(state: DocumentState) -> Dict[str, Any]:
 
     combined_chapters = "\n\n".join(chapters_content)
 
+    emit_progress("integration_started", total_chapters=total_chapters, mode="llm")
+
     # === 2. 构建 LLM Prompt ===
     logger.info("  ↳ 调用 LLM 进行智能整合...")
 
-    llm = init_chat_model("deepseek:deepseek-chat")
+    llm = init_chat_model(LLM_MODEL)
 
     system_prompt = render_prompt_template(
         "publisher_prompts/document_writing/document_integrator_system",
@@ -75,7 +264,8 @@ async def document_integrator(state: DocumentState) -> Dict[str, Any]:
             {"role": "user", "content": user_prompt}
         ]
 
-        response = await llm.ainvoke(messages)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            response = await llm.ainvoke(messages)
         integrated_document = response.content.strip()
 
         if not integrated_document or len(integrated_document) < 100:
@@ -87,6 +277,7 @@ async def document_integrator(state: DocumentState) -> Dict[str, Any]:
         logger.info(f"    - 总字数: {metadata.get('total_words', len(integrated_document))}")
         logger.info(f"    - 平均评分: {metadata.get('avg_score', 'N/A')}\n")
 
+        emit_progress("integration_finished", word_count=len(integrated_document), fallback=False, mode="llm")
         return {"document": integrated_document}
 
     except Exception as e:
@@ -94,4 +285,5 @@ async def document_integrator(state: DocumentState) -> Dict[str, Any]:
         logger.info("  ↳ 使用降级方案（简单拼接）...\n")
 
         fallback_document = f"# {outline.title}\n\n{combined_chapters}"
+        emit_progress("integration_finished", word_count=len(fallback_document), fallback=True, mode="llm")
         return {"document": fallback_document}
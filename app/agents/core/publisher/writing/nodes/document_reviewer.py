@@ -4,19 +4,39 @@ Document Reviewer - 文档全局审查节点
 
 职责：
 1. 使用 Structured Output 对完整文档进行全局审查
-2. 生成结构化的审查结果（ReviewResult）
+2. 生成结构化的审查结果（DocumentReviewResult，建议定位到章节锚点）
 3. 返回 latest_review 供路由决策和 reviser 使用
 
+审查方式（writing_integration.review_mode）：
+- single：整篇文档放入一次调用
+- map_reduce（默认，文档超过 review_map_reduce_min_chars 时生效）：
+  map 阶段对照大纲并行审查各章节，reduce 阶段根据单章审查结果和章节摘要生成全局审查结果；
+  单章审查结果按章节内容哈希缓存在状态中，修订后未变化的章节直接复用
+
 注意：本节点只负责"审查"，不负责"修订"。
 """
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
+from app.agents.core.publisher.writing.anchors import GLOBAL_ANCHOR, match_outline_section, split_toc
+from app.agents.core.publisher.writing.config import PASS_SCORE_THRESHOLD
 from app.agents.core.publisher.writing.state import DocumentState
-from app.agents.schemas.review_schema import ReviewResult
+from app.agents.schemas.review_schema import ChapterReviewFinding, ChapterSuggestion, DocumentReviewResult
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+from app.config import settings
+from app.services.report_content import hash_block, split_markdown_chapters
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+
+# 短于该长度的块（文档标题、引言等）不单独审查，reduce 阶段只提供开头摘录
+MIN_CHAPTER_REVIEW_CHARS = 200
+EXCERPT_CHARS = 300
 
 
 async def document_reviewer(state: DocumentState) -> Dict[str, Any]:
@@ -27,67 +47,64 @@ async def document_reviewer(state: DocumentState) -> Dict[str, Any]:
         state: DocumentState
 
     Returns:
-        {"latest_review": ReviewResult, "revision_count": int}
+        {"latest_review": DocumentReviewResult, "revision_count": int, "chapter_review_cache": dict}
     """
     logger.info("\n" + "=" * 60)
     logger.info("Document Reviewer: 开始全局审查...")
     logger.info("=" * 60)
 
-    document = state["document"]
+    # 目录由整合 / 修订节点生成，不参与审查
+    document, _ = split_toc(state["document"])
     outline = state["document_outline"]
     metadata = state.get("document_metadata", {})
 
-    total_words = metadata.get("total_words", len(document))
-    target_length = outline.estimated_total_words
-    avg_score = metadata.get("avg_score", 0)
-    total_chapters = metadata.get("total_chapters", 0)
-
-    # === 渲染 Prompt ===
-    logger.info("  Preparing review prompts...")
+    # 章节锚点：审查建议按锚点定位，修订时只重写受影响的章节
+    sections = split_markdown_chapters(document)
 
+    llm = init_chat_model(LLM_MODEL)
     system_prompt = render_prompt_template(
         "publisher_prompts/document_writing/document_review_system",
         {
             "language": outline.language,
         }
     )
+    context = {
+        "CURRENT_TIME": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "title": outline.title,
+        "language": outline.language,
+        "total_words": metadata.get("total_words", len(document)),
+        "target_length": outline.estimated_total_words,
+        "avg_score": metadata.get("avg_score", 0),
+        "writing_style": outline.writing_style,
+        "writing_tone": outline.writing_tone,
+        "target_audience": outline.target_audience,
+        "writing_purpose": outline.writing_purpose,
+        "total_chapters": metadata.get("total_chapters", 0),
+    }
 
-    user_prompt = render_prompt_template(
-        "publisher_prompts/document_writing/document_review_task",
-        {
-            "CURRENT_TIME": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "title": outline.title,
-            "language": outline.language,
-            "total_words": total_words,
-            "target_length": target_length,
-            "avg_score": avg_score,
-            "writing_style": outline.writing_style,
-            "writing_tone": outline.writing_tone,
-            "target_audience": outline.target_audience,
-            "writing_purpose": outline.writing_purpose,
-            "total_chapters": total_chapters,
-            "document": document,
-        }
+    updates: Dict[str, Any] = {}
+    use_map_reduce = (
+        settings.WRITING_REVIEW_MODE == "map_reduce"
+        and len(document) >= settings.WRITING_REVIEW_MAP_REDUCE_MIN_CHARS
+        and len(sections) > 1
     )
 
-    # === 调用 LLM with Structured Output ===
-    logger.info("  Invoking LLM for structured review...")
-
-    llm = init_chat_model("deepseek:deepseek-chat")
-
     try:
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ]
+        if use_map_reduce:
+            review_result, updates["chapter_review_cache"] = await _map_reduce_review(
+                llm, system_prompt, context, state, sections
+            )
+        else:
+            review_result = await _single_review(llm, system_prompt, context, document, sections)
 
-        structured_llm = llm.with_structured_output(ReviewResult)
-        review_result: ReviewResult = await structured_llm.ainvoke(messages)
+        if not review_result.actionable_suggestions and review_result.chapter_suggestions:
+            review_result.actionable_suggestions = [s.suggestion for s in review_result.chapter_suggestions]
 
         logger.success(
             f"  Review completed | Score: {review_result.score}/100 | "
             f"Status: {review_result.status.upper()} | "
-            f"Suggestions: {len(review_result.actionable_suggestions)}"
+            f"Suggestions: {len(review_result.actionable_suggestions)} "
+            f"({sum(1 for c in review_result.chapter_suggestions if c.chapter != GLOBAL_ANCHOR)} chapter-scoped)"
         )
         logger.info(f"  Feedback: {review_result.general_feedback[:100]}...")
 
@@ -95,7 +112,7 @@ async def document_reviewer(state: DocumentState) -> Dict[str, Any]:
         logger.error(f"  Review failed: {e}", exc_info=True)
 
         # 失败时返回保守的默认结果
-        review_result = ReviewResult(
+        review_result = DocumentReviewResult(
             status="pass",  # 审查失败时默认通过，避免阻塞流程
             score=70,
             general_feedback="【自动审查失败】由于 LLM 调用异常，系统无法完成正常评审。",
@@ -106,9 +123,179 @@ async def document_reviewer(state: DocumentState) -> Dict[str, Any]:
     current_revision_count = state.get("revision_count", 0) + 1
 
     logger.info(f"  Revision count: {current_revision_count}")
+    emit_progress(
+        "document_reviewed",
+        score=review_result.score,
+        status=review_result.status,
+        suggestions=len(review_result.actionable_suggestions),
+        review_round=current_revision_count,
+        mode="map_reduce" if use_map_reduce else "single",
+    )
     logger.info("=" * 60 + "\n")
 
     return {
         "latest_review": review_result,
         "revision_count": current_revision_count,
+        **updates,
     }
+
+
+# ============================================
+# single：整篇审查
+# ============================================
+
+async def _single_review(
+    llm,
+    system_prompt: str,
+    context: Dict[str, Any],
+    document: str,
+    sections: List[Dict[str, str]]
+) -> DocumentReviewResult:
+    logger.info("  Invoking LLM for structured review...")
+
+    user_prompt = render_prompt_template(
+        "publisher_prompts/document_writing/document_review_task",
+        {
+            **context,
+            "document": document,
+            "chapter_anchors": [c["title"] for c in sections if c["title"]],
+        }
+    )
+
+    structured_llm = llm.with_structured_output(DocumentReviewResult)
+    async with governor.llm(provider_of(LLM_MODEL)):
+        return await structured_llm.ainvoke([
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_prompt)
+        ])
+
+
+# ============================================
+# map_reduce：并行单章审查 + 全局汇总
+# ============================================
+
+async def _review_chapter(
+    llm,
+    system_prompt: str,
+    context: Dict[str, Any],
+    outline,
+    chapter: Dict[str, str]
+) -> Optional[ChapterReviewFinding]:
+    """单章审查（map），失败时返回 None，该章在 reduce 阶段只提供摘录"""
+    user_prompt = render_prompt_template(
+        "publisher_prompts/document_writing/document_review_chapter_task",
+        {
+            **context,
+            "section": match_outline_section(outline, chapter["title"]),
+            "chapter": chapter["content"],
+            "word_count": len(chapter["content"]),
+        }
+    )
+    try:
+        structured_llm = llm.with_structured_output(ChapterReviewFinding)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            return await structured_llm.ainvoke([
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt)
+            ])
+    except Exception as e:
+        logger.warning(f"  Chapter review failed ({chapter['title']}): {e}")
+        return None
+
+
+async def _map_reduce_review(
+    llm,
+    system_prompt: str,
+    context: Dict[str, Any],
+    state: DocumentState,
+    sections: List[Dict[str, str]]
+) -> Tuple[DocumentReviewResult, Dict[str, Dict[str, Any]]]:
+    """
+    Returns:
+        (全局审查结果, 新的单章审查缓存（只保留当前文档中仍存在的章节）)
+    """
+    outline = state["document_outline"]
+    cached = state.get("chapter_review_cache") or {}
+
+    # === 1. map：未变化的章节复用缓存，其余并行审查 ===
+    hashes = [hash_block(c["content"]) for c in sections]
+    pending = [
+        idx for idx, chapter in enumerate(sections)
+        if len(chapter["content"]) >= MIN_CHAPTER_REVIEW_CHARS and hashes[idx] not in cached
+    ]
+    reused = sum(
+        1 for idx, chapter in enumerate(sections)
+        if len(chapter["content"]) >= MIN_CHAPTER_REVIEW_CHARS and hashes[idx] in cached
+    )
+    logger.info(f"  Map: reviewing {len(pending)} chapters, reusing {reused} unchanged chapter reviews")
+    emit_progress("document_review_map", reviewing=len(pending), reused=reused)
+
+    chapter_system_prompt = render_prompt_template(
+        "publisher_prompts/document_writing/document_review_chapter_system",
+        {
+            "language": outline.language,
+        }
+    )
+    results = await asyncio.gather(*(
+        _review_chapter(llm, chapter_system_prompt, context, outline, sections[idx]) for idx in pending
+    ))
+
+    cache: Dict[str, Dict[str, Any]] = {h: cached[h] for h in hashes if h in cached}
+    for idx, finding in zip(pending, results):
+        if finding is not None:
+            cache[hashes[idx]] = finding.model_dump()
+
+    chapter_reviews = []
+    for idx, chapter in enumerate(sections):
+        finding = cache.get(hashes[idx]) or {}
+        chapter_reviews.append({
+            "anchor": chapter["title"] or outline.title,
+            "word_count": len(chapter["content"]),
+            "score": finding.get("score"),
+            "summary": finding.get("summary"),
+            "issues": finding.get("issues", []),
+            "suggestions": finding.get("suggestions", []),
+            "excerpt": chapter["content"][:EXCERPT_CHARS],
+        })
+
+    # === 2. reduce：单章审查 + 摘要 → 全局审查结果 ===
+    logger.info("  Reduce: invoking LLM for document-level review...")
+    user_prompt = render_prompt_template(
+        "publisher_prompts/document_writing/document_review_reduce_task",
+        {
+            **context,
+            "chapter_reviews": chapter_reviews,
+        }
+    )
+    try:
+        structured_llm = llm.with_structured_output(DocumentReviewResult)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            review_result = await structured_llm.ainvoke([
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt)
+            ])
+    except Exception as e:
+        logger.error(f"  Reduce review failed, aggregating chapter reviews: {e}")
+        review_result = _aggregate_chapter_reviews(chapter_reviews)
+
+    return review_result, cache
+
+
+def _aggregate_chapter_reviews(chapter_reviews: List[Dict[str, Any]]) -> DocumentReviewResult:
+    """reduce 调用失败时，直接汇总单章审查结果"""
+    reviewed = [r for r in chapter_reviews if r["score"] is not None]
+    if not reviewed:
+        raise ValueError("no chapter reviews available")
+
+    score = round(sum(r["score"] for r in reviewed) / len(reviewed))
+    suggestions = [
+        ChapterSuggestion(chapter=r["anchor"], suggestion=s)
+        for r in reviewed for s in r["suggestions"]
+    ]
+    return DocumentReviewResult(
+        status="pass" if score >= PASS_SCORE_THRESHOLD else "revise",
+        score=score,
+        general_feedback="【全局审查失败】以下结果由各章节审查汇总得出。",
+        actionable_suggestions=[s.suggestion for s in suggestions],
+        chapter_suggestions=suggestions,
+    )
@@ -4,23 +4,80 @@ Document Reviser - 文档修订节点
 
 职责：
 1. 获取当前文档和审查反馈
-2. 调用 LLM 根据反馈修订文档
-3. 返回修订后的文档
+2. 将审查建议映射到章节锚点，只并行重写受影响的章节并按原顺序拼回
+3. 没有可定位的建议（或 writing_integration.revision_scope = document）时整篇修订
+4. 目录不交给 LLM 修订，修订完成后按新的章节标题重新生成
 
 输入：
 - state["document"]: 当前文档内容
-- state["latest_review"]: 审查结果（包含 actionable_suggestions）
+- state["latest_review"]: 审查结果（actionable_suggestions，以及 DocumentReviewResult 的 chapter_suggestions）
 
 输出：
 - document: 修订后的文档内容
 """
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
+from app.agents.core.publisher.writing.anchors import (
+    GLOBAL_ANCHOR,
+    anchor_key,
+    restore_toc,
+    split_toc,
+    strip_numbering,
+)
 from app.agents.core.publisher.writing.state import DocumentState
 from app.agents.prompts.template import render_prompt_template
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+from app.config import settings
+from app.services.report_content import CHAPTER_SEPARATOR, HEADING_PATTERN, split_markdown_chapters
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+
+def _map_suggestions(review, sections: List[Dict[str, str]]) -> Tuple[Dict[int, List[str]], List[str]]:
+    """
+    将审查建议映射到章节
+
+    优先使用审查给出的 chapter_suggestions 锚点；没有锚点的建议按是否提及章节标题定位，
+    提及多个章节时分配给所有相关章节；无法定位的作为全局建议。
+
+    Returns:
+        ({章节下标: [建议]}, [全局建议])
+    """
+    keys = {anchor_key(section["title"]): idx for idx, section in enumerate(sections) if section["title"]}
+    by_chapter: Dict[int, List[str]] = {}
+    global_suggestions: List[str] = []
+    anchored = set()
+
+    for item in getattr(review, "chapter_suggestions", None) or []:
+        anchored.add(item.suggestion)
+        key = anchor_key(item.chapter)
+        idx = keys.get(key)
+        if idx is None and key and item.chapter != GLOBAL_ANCHOR:
+            idx = next((i for k, i in keys.items() if k and (k in key or key in k)), None)
+        if idx is None:
+            global_suggestions.append(item.suggestion)
+        else:
+            by_chapter.setdefault(idx, []).append(item.suggestion)
+
+    for suggestion in review.actionable_suggestions:
+        if suggestion in anchored:
+            continue
+        text = anchor_key(suggestion)
+        matched = [
+            i for k, i in keys.items()
+            if len(strip_numbering(k)) >= 2 and (k in text or strip_numbering(k) in text)
+        ]
+        if not matched:
+            global_suggestions.append(suggestion)
+        for idx in matched:
+            by_chapter.setdefault(idx, []).append(suggestion)
+
+    return by_chapter, global_suggestions
 
 
 async def document_reviser(state: DocumentState) -> Dict[str, Any]:
@@ -54,7 +111,6 @@ async def document_reviser(state: DocumentState) -> Dict[str, Any]:
     logger.info(f"  Original document length: {len(document)} chars")
     logger.info(f"  Suggestions to address: {len(latest_review.actionable_suggestions)}")
 
-    # === 渲染 Prompt ===
     system_prompt = render_prompt_template(
         "publisher_prompts/document_writing/document_revise_system",
         {
@@ -62,28 +118,155 @@ async def document_reviser(state: DocumentState) -> Dict[str, Any]:
             "language": outline.language,
         }
     )
+    llm = init_chat_model(LLM_MODEL, temperature=0.7)
+
+    body, toc_label = split_toc(document)
+    if settings.WRITING_REVISION_SCOPE == "chapters":
+        sections = split_markdown_chapters(body)
+        by_chapter, global_suggestions = _map_suggestions(latest_review, sections)
+        if by_chapter:
+            return await _revise_chapters(
+                llm, system_prompt, state, sections, by_chapter, global_suggestions, toc_label
+            )
+        logger.info("  No chapter-scoped suggestions, revising the whole document")
+
+    return await _revise_document(llm, system_prompt, state, body, toc_label)
+
+
+async def _revise_chapters(
+    llm,
+    system_prompt: str,
+    state: DocumentState,
+    sections: List[Dict[str, str]],
+    by_chapter: Dict[int, List[str]],
+    global_suggestions: List[str],
+    toc_label: Optional[str]
+) -> Dict[str, Any]:
+    """只重写受影响的章节（并行），其余章节原样保留；sections 为去掉目录后的章节块"""
+    document = state["document"]
+    latest_review = state["latest_review"]
+    outline = state["document_outline"]
+    revision_count = state.get("revision_count", 0)
+
+    targets = sorted(by_chapter)
+    logger.info(
+        f"  Revising {len(targets)}/{len(sections)} chapters: "
+        f"{[sections[i]['title'] for i in targets]}"
+        + (f" (+{len(global_suggestions)} document-wide suggestions as guidance)" if global_suggestions else "")
+    )
+    emit_progress(
+        "document_revision_started",
+        revision=revision_count,
+        suggestions=len(latest_review.actionable_suggestions),
+        scope="chapters",
+        chapters=[sections[i]["title"] for i in targets],
+    )
+
+    async def revise(idx: int) -> Optional[str]:
+        section = sections[idx]
+        user_prompt = render_prompt_template(
+            "publisher_prompts/document_writing/document_revise_chapter_task",
+            {
+                "title": outline.title,
+                "chapter": section["content"],
+                "previous_title": sections[idx - 1]["title"] if idx > 0 else None,
+                "next_title": sections[idx + 1]["title"] if idx + 1 < len(sections) else None,
+                "general_feedback": latest_review.general_feedback,
+                "suggestions": by_chapter[idx],
+                "global_suggestions": global_suggestions,
+                "language": outline.language,
+            }
+        )
+        try:
+            async with governor.llm(provider_of(LLM_MODEL)):
+                response = await llm.ainvoke([
+                    SystemMessage(content=system_prompt),
+                    HumanMessage(content=user_prompt)
+                ])
+            revised = response.content.strip()
+            if not revised:
+                raise ValueError("empty revision")
+
+            # 保持章节标题行不变，避免锚点失效
+            heading = section["content"].split("\n", 1)[0]
+            if HEADING_PATTERN.match(heading) and not HEADING_PATTERN.match(revised.split("\n", 1)[0]):
+                revised = f"{heading}\n\n{revised}"
+            return revised
+
+        except Exception as e:
+            logger.error(f"  Chapter revision failed ({section['title']}): {e}")
+            return None
+
+    results = await asyncio.gather(*(revise(idx) for idx in targets))
+
+    contents = [section["content"] for section in sections]
+    revised_count = 0
+    for idx, revised in zip(targets, results):
+        if revised is not None:
+            contents[idx] = revised
+            revised_count += 1
+    revised_document = restore_toc(CHAPTER_SEPARATOR.join(contents), toc_label)
+
+    logger.success(
+        f"  Revision completed | "
+        f"Chapters revised: {revised_count}/{len(targets)} | "
+        f"Original: {len(document)} chars | "
+        f"Revised: {len(revised_document)} chars"
+    )
+    logger.info("=" * 60 + "\n")
+
+    emit_progress(
+        "document_revision_finished",
+        revision=revision_count,
+        scope="chapters",
+        revised_chapters=revised_count,
+        failed_chapters=len(targets) - revised_count,
+        word_count=len(revised_document),
+    )
+    return {
+        "document": revised_document,
+    }
+
+
+async def _revise_document(
+    llm,
+    system_prompt: str,
+    state: DocumentState,
+    body: str,
+    toc_label: Optional[str]
+) -> Dict[str, Any]:
+    """整篇修订（body 为去掉目录后的文档）"""
+    document = state["document"]
+    latest_review = state["latest_review"]
+    outline = state["document_outline"]
+    revision_count = state.get("revision_count", 0)
+
+    emit_progress(
+        "document_revision_started",
+        revision=revision_count,
+        suggestions=len(latest_review.actionable_suggestions),
+        scope="document",
+    )
 
     user_prompt = render_prompt_template(
         "publisher_prompts/document_writing/document_revise_task",
         {
-            "document": document,
+            "document": body,
             "general_feedback": latest_review.general_feedback,
             "actionable_suggestions": latest_review.actionable_suggestions,
             "language": outline.language,
         }
     )
 
-    # === 调用 LLM ===
-    llm = init_chat_model("deepseek:deepseek-chat", temperature=0.7)
-
     try:
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt)
         ]
 
-        response = await llm.ainvoke(messages)
-        revised_document = response.content.strip()
+        async with governor.llm(provider_of(LLM_MODEL)):
+            response = await llm.ainvoke(messages)
+        revised_document = restore_toc(response.content.strip(), toc_label)
 
         logger.success(
             f"  Revision completed | "
@@ -93,6 +276,12 @@ async def document_reviser(state: DocumentState) -> Dict[str, Any]:
         )
         logger.info("=" * 60 + "\n")
 
+        emit_progress(
+            "document_revision_finished",
+            revision=revision_count,
+            scope="document",
+            word_count=len(revised_document),
+        )
         return {
             "document": revised_document,
         }
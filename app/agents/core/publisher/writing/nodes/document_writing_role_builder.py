@@ -18,6 +18,10 @@ from langchain.messages import HumanMessage, SystemMessage
 from app.agents.core.publisher.writing.state import DocumentState
 from app.agents.prompts.template import render_prompt_template
 from app.agents.schemas.document_writing_role import TechnicalWriterRole
+from app.agents.execution.concurrency import governor, provider_of
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
 
 
 async def role_builder_node(state: DocumentState) -> Dict[str, Any]:
@@ -34,7 +38,7 @@ async def role_builder_node(state: DocumentState) -> Dict[str, Any]:
     logger.debug(f"🔧 开始构建角色 - 领域: {state['document_outline'].title}")
 
     # 初始化LLM
-    llm = init_chat_model("deepseek:deepseek-chat", temperature=0.8)
+    llm = init_chat_model(LLM_MODEL, temperature=0.8)
 
     # 使用structured output
     llm_with_structure = llm.with_structured_output(TechnicalWriterRole)
@@ -59,7 +63,8 @@ async def role_builder_node(state: DocumentState) -> Dict[str, Any]:
 
         # 2. 调用 LLM (确保 llm_with_structure 已经绑定了 with_structured_output)
         # 增加 timeout 防止无限等待
-        result = await llm_with_structure.ainvoke(messages)
+        async with governor.llm(provider_of(LLM_MODEL)):
+            result = await llm_with_structure.ainvoke(messages)
 
         logger.info(f"✅ [RoleGen] 角色创建成功: {result.role}")
         logger.info(f"✅ [RoleGen] 角色写作原则创建成功: {result.writing_principles}")
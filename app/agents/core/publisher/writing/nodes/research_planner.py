@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   research_planner.py
+@Desc    :   Research Planner - 文档级研究规划（跨章节查询去重）
+
+同一文档的多个章节经常生成几乎相同的查询（如多个章节都搜索"市场规模 2024"）。
+本节点在分发章节之前统一完成首轮搜索：
+1. 并行为每个章节生成候选查询（与章节子图的 generate_queries 使用同一 prompt）
+2. 按 shingle 相似度合并跨章节的近似重复查询（writing_research.dedup_threshold）
+3. 每个去重后的查询只搜索一次
+4. 每个章节得到其候选查询所在簇的搜索结果，章节子图直接进入写作，跳过查询生成
+
+章节写作中 evaluate 产生的补充查询仍由各章节自行搜索。
+"""
+import asyncio
+from typing import Any, Dict, List
+
+from langchain.chat_models import init_chat_model
+from loguru import logger
+
+from app.agents.core.publisher.subgraphs.chapter_content_generation.nodes import PROMPT_PATH, QueryList
+from app.agents.core.publisher.writing.state import DocumentState
+from app.agents.execution.concurrency import governor, provider_of
+from app.agents.execution.progress import emit_progress
+from app.agents.tools.search.evidence_packer import count_pages
+from app.agents.tools.search.evidence_store import evidence_store
+from app.agents.prompts.template import render_prompt_template
+from app.agents.tools.search.similarity import cluster_texts
+from app.config import settings
+
+# 模型标识（"供应商:模型"，并发槽位按供应商区分）
+LLM_MODEL = "deepseek:deepseek-chat"
+
+# 每个章节的候选查询数（与章节子图一致）
+MAX_QUERIES_PER_CHAPTER = 3
+
+
+async def research_planner(state: DocumentState) -> Dict[str, Any]:
+    """
+    文档级研究规划节点
+
+    Returns:
+        {"chapter_research": {chapter_id: [{"query": str, "content": 页面结果列表（搜索失败时为提示文本）}, ...]}}
+        未启用时返回空字典，各章节自行生成查询和搜索
+    """
+    if not settings.WRITING_RESEARCH_PLANNING:
+        return {"chapter_research": {}}
+
+    logger.info("\n🔎 [Research Planner] 开始文档级研究规划...")
+    sections = state["document_outline"].sections
+
+    # === 1. 并行生成各章节的候选查询 ===
+    llm = init_chat_model(LLM_MODEL, temperature=0)
+    chapter_queries = await asyncio.gather(*(
+        _generate_queries(llm, idx, section) for idx, section in enumerate(sections, start=1)
+    ))
+
+    candidates: List[str] = []
+    owners: List[int] = []
+    for idx, queries in enumerate(chapter_queries, start=1):
+        candidates.extend(queries)
+        owners.extend([idx] * len(queries))
+
+    # === 2. 合并近似重复查询 ===
+    clusters = cluster_texts(candidates, settings.WRITING_RESEARCH_DEDUP_THRESHOLD)
+    logger.info(f"  ↳ {len(candidates)} candidate queries -> {len(clusters)} unique searches")
+    for members in clusters:
+        if len(members) > 1:
+            logger.info(f"    ↳ merged: {[candidates[i] for i in members]}")
+
+    # === 3. 每个去重后的查询只搜索一次 ===
+    results = await asyncio.gather(*(_search(candidates[members[0]]) for members in clusters))
+
+    # === 4. 按章节分配搜索结果 ===
+    chapter_research: Dict[int, List[Dict[str, str]]] = {idx: [] for idx in range(1, len(sections) + 1)}
+    for members, result in zip(clusters, results):
+        for chapter_id in dict.fromkeys(owners[i] for i in members):
+            chapter_research[chapter_id].append(result)
+
+    emit_progress(
+        "research_planned",
+        candidate_queries=len(candidates),
+        unique_searches=len(clusters),
+        saved_searches=len(candidates) - len(clusters),
+    )
+    logger.success(
+        f"  ✓ Research planning completed | "
+        f"{len(clusters)} searches for {len(sections)} chapters ({len(candidates) - len(clusters)} saved)"
+    )
+
+    return {"chapter_research": chapter_research}
+
+
+async def _generate_queries(llm, chapter_id: int, section) -> List[str]:
+    """生成单个章节的候选查询，失败时使用与章节子图相同的兜底查询"""
+    content_requirements = getattr(section, "content_requirements", "")
+    prompt = render_prompt_template(f"{PROMPT_PATH}/generate_queries_initial", {
+        "chapter_title": section.title,
+        "chapter_description": getattr(section, "description", ""),
+        "content_requirements": content_requirements,
+        "writing_guidance": getattr(section, "writing_guidance", ""),
+    })
+    try:
+        async with governor.llm(provider_of(LLM_MODEL)):
+            result = await llm.with_structured_output(QueryList).ainvoke(prompt)
+        queries = [q for q in result.queries[:MAX_QUERIES_PER_CHAPTER] if q.strip()]
+        if queries:
+            return queries
+    except Exception as e:
+        logger.error(f"  ⚠️  [Chapter {chapter_id}] Query generation failed: {e}")
+    return [f"{section.title} {content_requirements}"]
+
+
+async def _search(query: str) -> Dict[str, Any]:
+    """执行单个查询，返回 {"query": str, "content": search_pages 的结果列表（搜索失败时为提示文本）}"""
+    from app.agents.tools.search.tavily_search import search_pages
+
+    # 恢复运行时（开启 evidence_store.persist）之前执行过的查询直接复用
+    evidence = evidence_store.current()
+    cached = evidence.lookup_query(query) if evidence else None
+    if cached is not None:
+        emit_progress("search_completed", query=query, pages=count_pages(cached), success=True, cached=True)
+        return {"query": query, "content": cached}
+
+    try:
+        content = await search_pages(query)
+        emit_progress("search_completed", query=query, pages=count_pages(content), success=True)
+        if evidence:
+            await asyncio.to_thread(evidence.add_search, query, content)
+        return {"query": query, "content": content}
+    except Exception as e:
+        logger.error(f"  ⚠️  Search failed ({query}): {e}")
+        emit_progress("search_completed", query=query, pages=0, success=False)
+        return {"query": query, "content": f"Search failed: {str(e)}. Query was: {query}"}
@@ -16,7 +16,7 @@ from app.agents.schemas.document_outline_schema import DocumentOutline
 Document State - Main Graph 的状态定义
 """
 from operator import or_
-from typing import TypedDict, Dict, Any, Annotated
+from typing import TypedDict, Dict, Any, Annotated, List
 from app.agents.schemas.document_outline_schema import DocumentOutline
 
 
@@ -32,6 +32,10 @@ class DocumentState(TypedDict):
     # ========== Outline Parser 输出 ==========
     document_outline: DocumentOutline  # 主文档大纲
 
+    # ========== Research Planner 输出 ==========
+    # 首轮搜索结果（跨章节去重后统一搜索），按章节分配：{chapter_id: [{"query": str, "content": 页面结果列表}]}
+    chapter_research: Dict[int, List[Dict[str, Any]]]
+
     # ========== Chapter Dispatcher 输出 ==========
     # 每个章节包含 {"content": str, "metadata": dict}
     completed_chapters: Annotated[Dict[int, Dict[str, Any]], or_]
@@ -42,6 +46,7 @@ class DocumentState(TypedDict):
 
     # ========== Document Reviewer 输出 ==========
     latest_review: Any  # 最新审查结果 (ReviewResult)
+    chapter_review_cache: Dict[str, Dict[str, Any]]  # 单章审查结果，按章节内容哈希缓存（map-reduce 审查）
     revision_count: int  # 修订次数
     document_review: Dict[str, Any]  # 最终审查摘要 (用于输出)
 
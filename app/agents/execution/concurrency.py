@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   concurrency.py
+@Desc    :   写作流程的 LLM / 搜索并发控制
+
+章节分发会同时启动所有章节，每个章节又并行搜索并调用带工具的 Agent，
+20 章的文档可能瞬间发出 60+ 次搜索和 20+ 次 LLM 调用，触发供应商限流。
+所有 publisher 节点的 LLM / 搜索调用都通过这里获取并发槽位：
+
+- 全局上限：按调用类型（llm / search）和供应商分别限制，跨文档共享
+- 文档上限：每个文档运行单独限制，避免一个大文档占满全局槽位
+- 取消：文档运行被中止后，等待中的调用随运行任务一起取消，之后的获取直接抛出 RunAbortedError
+
+用法：
+    async with governor.llm(provider_of(LLM_MODEL)):   # LLM_MODEL = "deepseek:deepseek-chat"
+        await llm.ainvoke(...)
+
+    # 带工具的 Agent：每次模型调用单独获取槽位，工具调用（搜索、绘图）期间不占用
+    create_agent(model=llm, tools=[...], middleware=[llm_slot_middleware(LLM_MODEL)])
+
+    with governor.search_sync("tavily"):   # 同步节点（运行在 LangGraph 的线程池中）
+        client.search(...)
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from loguru import logger
+
+from app.config import settings
+
+LLM = "llm"
+SEARCH = "search"
+
+# 当前调用所属的文档运行（由 document_scope 设置，随 LangGraph 任务和线程池传播）
+_current_document: ContextVar[Optional[str]] = ContextVar("governor_document", default=None)
+
+
+class RunAbortedError(Exception):
+    """文档运行已被中止"""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        super().__init__(f"Document run {document_id} was aborted")
+
+
+@dataclass
+class _SlotStats:
+    """单个 (类型, 供应商) 的统计"""
+    limit: int
+    in_flight: int = 0
+    waiting: int = 0
+    total: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+@dataclass
+class _DocumentScope:
+    """单个文档运行的并发状态"""
+    document_id: str
+    semaphores: Dict[str, asyncio.Semaphore]
+    task: Optional[asyncio.Task] = None
+    aborted: bool = False
+    in_flight: Dict[str, int] = field(default_factory=lambda: {LLM: 0, SEARCH: 0})
+
+
+def current_document_id() -> Optional[str]:
+    """当前调用所属的文档运行（不在文档运行中时为 None）"""
+    return _current_document.get()
+
+
+def provider_of(model: str) -> str:
+    """从 init_chat_model 风格的模型标识中提取供应商（"deepseek:deepseek-chat" -> "deepseek"）"""
+    return model.split(":", 1)[0] if ":" in model else model
+
+
+class ConcurrencyGovernor:
+    """LLM / 搜索并发控制"""
+
+    def __init__(self):
+        self._semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        self._stats: Dict[Tuple[str, str], _SlotStats] = {}
+        self._documents: Dict[str, _DocumentScope] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _limit(self, kind: str, provider: str) -> int:
+        limits = settings.LLM_CONCURRENCY if kind == LLM else settings.SEARCH_CONCURRENCY
+        return limits.get(provider, limits["default"])
+
+    def _global(self, kind: str, provider: str) -> asyncio.Semaphore:
+        key = (kind, provider)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            limit = self._limit(kind, provider)
+            semaphore = self._semaphores[key] = asyncio.Semaphore(limit)
+            self._stats[key] = _SlotStats(limit=limit)
+        return semaphore
+
+    # ============================================
+    # 文档运行
+    # ============================================
+
+    @asynccontextmanager
+    async def document_scope(
+        self,
+        document_id: str,
+        llm_limit: Optional[int] = None,
+        search_limit: Optional[int] = None
+    ):
+        """
+        声明一个文档运行，块内（包括子图、并发章节和线程池中的同步节点）的调用受文档上限约束
+
+        Args:
+            document_id: 文档ID
+            llm_limit: 文档内 LLM 并发上限（默认 concurrency.per_document.llm）
+            search_limit: 文档内搜索并发上限（默认 concurrency.per_document.search）
+        """
+        self._loop = asyncio.get_running_loop()
+        scope = _DocumentScope(
+            document_id=document_id,
+            semaphores={
+                LLM: asyncio.Semaphore(llm_limit or settings.DOCUMENT_LLM_CONCURRENCY),
+                SEARCH: asyncio.Semaphore(search_limit or settings.DOCUMENT_SEARCH_CONCURRENCY),
+            },
+            task=asyncio.current_task(),
+        )
+        self._documents[document_id] = scope
+        token = _current_document.set(document_id)
+        try:
+            yield scope
+        finally:
+            _current_document.reset(token)
+            if self._documents.get(document_id) is scope:
+                del self._documents[document_id]
+
+    def abort(self, document_id: str) -> bool:
+        """
+        中止文档运行：取消运行任务（等待中的调用随之取消），拒绝之后的所有获取
+
+        Returns:
+            是否找到运行中的文档
+        """
+        scope = self._documents.get(document_id)
+        if scope is None:
+            return False
+        scope.aborted = True
+        if scope.task is not None and not scope.task.done():
+            scope.task.cancel()
+        logger.warning(f"[Governor] Document {document_id} aborted")
+        return True
+
+    # ============================================
+    # 获取 / 释放
+    # ============================================
+
+    async def _acquire(self, kind: str, provider: str, document_id: Optional[str]) -> List[asyncio.Semaphore]:
+        scope = self._documents.get(document_id) if document_id else None
+        if scope is not None and scope.aborted:
+            raise RunAbortedError(document_id)
+
+        # 先获取文档槽位再获取全局槽位，排队中的文档不会占用全局槽位
+        semaphores = [s for s in (scope.semaphores[kind] if scope else None, self._global(kind, provider)) if s]
+        stats = self._stats[(kind, provider)]
+        acquired = []
+        started = time.perf_counter()
+        stats.waiting += 1
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            stats.waiting -= 1
+
+        if scope is not None and scope.aborted:
+            for semaphore in acquired:
+                semaphore.release()
+            raise RunAbortedError(document_id)
+
+        wait = time.perf_counter() - started
+        stats.in_flight += 1
+        stats.total += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        if scope is not None:
+            scope.in_flight[kind] += 1
+        if wait > 1:
+            logger.debug(f"[Governor] {kind}/{provider} waited {wait:.1f}s for a slot")
+        return acquired
+
+    def _release(self, kind: str, provider: str, document_id: Optional[str], acquired: List[asyncio.Semaphore]):
+        for semaphore in acquired:
+            semaphore.release()
+        self._stats[(kind, provider)].in_flight -= 1
+        scope = self._documents.get(document_id) if document_id else None
+        if scope is not None:
+            scope.in_flight[kind] -= 1
+
+    @asynccontextmanager
+    async def slot(self, kind: str, provider: str):
+        """获取一个并发槽位（异步调用）"""
+        self._loop = asyncio.get_running_loop()
+        document_id = _current_document.get()
+        acquired = await self._acquire(kind, provider, document_id)
+        try:
+            yield
+        finally:
+            self._release(kind, provider, document_id, acquired)
+
+    @contextmanager
+    def slot_sync(self, kind: str, provider: str):
+        """
+        获取一个并发槽位（同步调用，运行在线程池中的节点或工具）
+
+        槽位由事件循环统一管理，这里阻塞的是工作线程而不是事件循环。
+        在事件循环线程中直接调用或事件循环尚未运行时不做限制。
+        """
+        loop = self._loop
+        try:
+            asyncio.get_running_loop()
+            in_loop_thread = True
+        except RuntimeError:
+            in_loop_thread = False
+
+        if loop is None or not loop.is_running() or in_loop_thread:
+            yield
+            return
+
+        document_id = _current_document.get()
+        acquired = asyncio.run_coroutine_threadsafe(
+            self._acquire(kind, provider, document_id), loop
+        ).result()
+        try:
+            yield
+        finally:
+            loop.call_soon_threadsafe(self._release, kind, provider, document_id, acquired)
+
+    def llm(self, provider: str):
+        return self.slot(LLM, provider)
+
+    def search(self, provider: str = "tavily"):
+        return self.slot(SEARCH, provider)
+
+    def llm_sync(self, provider: str):
+        return self.slot_sync(LLM, provider)
+
+    def search_sync(self, provider: str = "tavily"):
+        return self.slot_sync(SEARCH, provider)
+
+    # ============================================
+    # 统计
+    # ============================================
+
+    def get_stats(self) -> Dict:
+        """全局和各文档的并发统计"""
+        return {
+            "slots": [
+                {
+                    "kind": kind,
+                    "provider": provider,
+                    "limit": stats.limit,
+                    "in_flight": stats.in_flight,
+                    "waiting": stats.waiting,
+                    "total": stats.total,
+                    "avg_wait_ms": round(stats.total_wait / stats.total * 1000, 1) if stats.total else None,
+                    "max_wait_ms": round(stats.max_wait * 1000, 1),
+                }
+                for (kind, provider), stats in self._stats.items()
+            ],
+            "documents": [
+                {
+                    "document_id": scope.document_id,
+                    "aborted": scope.aborted,
+                    "llm_in_flight": scope.in_flight[LLM],
+                    "search_in_flight": scope.in_flight[SEARCH],
+                }
+                for scope in self._documents.values()
+            ],
+        }
+
+
+# 单例导出
+governor = ConcurrencyGovernor()
+
+
+class LLMSlotMiddleware(AgentMiddleware):
+    """Agent 中间件：只在模型调用期间持有 LLM 槽位"""
+
+    def __init__(self, provider: str):
+        super().__init__()
+        self.provider = provider
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        with governor.llm_sync(self.provider):
+            return handler(request)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]]
+    ) -> ModelResponse:
+        async with governor.llm(self.provider):
+            return await handler(request)
+
+
+def llm_slot_middleware(model: str) -> LLMSlotMiddleware:
+    """按模型标识的供应商创建槽位中间件"""
+    return LLMSlotMiddleware(provider_of(model))
@@ -13,6 +13,9 @@ import os
 import tempfile
 from pathlib import Path
 
+from app.agents.execution.sandbox_pool import SandboxPool, SandboxPoolError
+from app.config import settings
+
 class DockerSandbox:
     """Docker 沙箱 - 非 root 用户版本"""
 
@@ -39,6 +42,19 @@ class DockerSandbox:
 
         self._ensure_image()
 
+        # 预热容器池（需要网络的执行仍使用一次性容器）
+        self.pool = None
+        if settings.SANDBOX_POOL_ENABLED:
+            self.pool = SandboxPool(
+                self.client,
+                image=self.image,
+                output_dir=self.output_dir,
+                mem_limit=self.mem_limit,
+                cpu_quota=self.cpu_quota,
+                size=settings.SANDBOX_POOL_SIZE,
+            )
+            self.pool.start()
+
     def _ensure_image(self):
         """确保 Docker 镜像存在"""
         try:
@@ -55,7 +71,17 @@ class DockerSandbox:
             timeout: int = 120,
             enable_network: bool = False
     ) -> str:
-        """在 Docker 容器中安全执行代码"""
+        """在 Docker 容器中安全执行代码（优先使用预热容器池，只有任务没有下发到容器池时才使用一次性容器）"""
+        if self.pool is not None and not enable_network:
+            try:
+                return self.pool.execute(code, timeout)
+            except SandboxPoolError as e:
+                print(f"⚠️ 容器池不可用，使用一次性容器: {e}")
+
+        return self._execute_once(code, enable_network)
+
+    def _execute_once(self, code: str, enable_network: bool) -> str:
+        """创建一次性容器执行代码"""
         temp_dir = Path(tempfile.mkdtemp())
         code_file = temp_dir / "script.py"
 
@@ -94,4 +120,9 @@ class DockerSandbox:
                 code_file.unlink()
                 temp_dir.rmdir()
             except:
-                pass
\ No newline at end of file
+                pass
+
+    def close(self):
+        """关闭容器池"""
+        if self.pool is not None:
+            self.pool.close()
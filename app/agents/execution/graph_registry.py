@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   graph_registry.py
+@Desc    :   进程级编译图注册表
+
+publisher 的各个 StateGraph 只在首次使用时编译一次，之后所有请求共享同一个编译结果：
+- 编译后的图本身不保存运行状态（状态在每次 invoke 的输入 / checkpointer 中），可以被并发调用共享
+- 构建函数按 "模块:函数" 延迟导入，注册表本身不依赖各个 agent 模块，避免循环导入
+- 同一个图的并发首次获取只编译一次（线程锁，同步节点运行在线程池中也可以安全调用）
+- 可在 FastAPI 启动时后台预编译（graph_registry.warmup_on_startup），首个请求不再承担编译耗时
+
+写作主图带有异步 checkpointer，由 DocumentWritingRunner 自行编译和持有，不在这里注册。
+"""
+import asyncio
+import importlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+# 图名称 -> 构建函数（"模块:函数"）
+PUBLISHER_GRAPHS: Dict[str, str] = {
+    "blueprint": "app.agents.core.publisher.blueprint.agent:compile_agent",
+    "research": "app.agents.core.publisher.subgraphs.research.agent:build_research_subgraph",
+    "section_writer": "app.agents.core.publisher.subgraphs.section_writer.agent:create_chapter_subgraph",
+    "chapter_content_generation":
+        "app.agents.core.publisher.subgraphs.chapter_content_generation.agent:create_iterative_chapter_subgraph",
+}
+
+
+@dataclass
+class _GraphEntry:
+    """单个图的注册信息和统计"""
+    builder: str
+    graph: Any = None
+    compile_ms: Optional[float] = None
+    compiled_at: Optional[int] = None
+    hits: int = 0
+    error: Optional[str] = None
+
+
+class GraphRegistry:
+    """编译图注册表"""
+
+    def __init__(self, graphs: Dict[str, str]):
+        self._entries: Dict[str, _GraphEntry] = {name: _GraphEntry(builder) for name, builder in graphs.items()}
+        self._locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in graphs}
+        self._warmup: Optional[asyncio.Task] = None
+
+    def _resolve(self, builder: str) -> Callable[[], Any]:
+        module_name, _, func_name = builder.partition(":")
+        return getattr(importlib.import_module(module_name), func_name)
+
+    def get(self, name: str):
+        """
+        获取编译后的图（首次调用时编译）
+
+        Raises:
+            KeyError: 未注册的图
+        """
+        entry = self._entries[name]
+        if entry.graph is not None:
+            entry.hits += 1
+            return entry.graph
+
+        with self._locks[name]:
+            if entry.graph is not None:
+                entry.hits += 1
+                return entry.graph
+
+            started = time.perf_counter()
+            try:
+                graph = self._resolve(entry.builder)()
+            except Exception as e:
+                entry.error = str(e) or type(e).__name__
+                raise
+            entry.compile_ms = round((time.perf_counter() - started) * 1000, 1)
+            entry.compiled_at = int(time.time())
+            entry.error = None
+            entry.graph = graph
+            logger.info(f"[GraphRegistry] Compiled {name} in {entry.compile_ms} ms")
+            return graph
+
+    # ============================================
+    # 预编译
+    # ============================================
+
+    async def warm_up(self, names: Optional[List[str]] = None) -> int:
+        """
+        在线程池中依次编译图（不阻塞事件循环），返回成功编译的数量
+
+        Args:
+            names: 要编译的图（默认 graph_registry.warmup_graphs，未配置时为全部）
+        """
+        names = names or settings.GRAPH_WARMUP_GRAPHS or list(self._entries)
+        compiled = 0
+        for name in names:
+            if name not in self._entries:
+                logger.warning(f"[GraphRegistry] Unknown graph {name}, skipped")
+                continue
+            try:
+                await asyncio.to_thread(self.get, name)
+                compiled += 1
+            except Exception as e:
+                logger.exception(f"[GraphRegistry] Failed to compile {name}: {e}")
+        return compiled
+
+    async def _run_warmup(self):
+        started = time.perf_counter()
+        count = await self.warm_up()
+        logger.info(f"[GraphRegistry] Warmed up {count} graphs in {time.perf_counter() - started:.1f}s")
+
+    def start(self):
+        """启动后台预编译（需在事件循环中调用）"""
+        if not settings.GRAPH_WARMUP_ON_STARTUP:
+            return
+        if self._warmup is None or self._warmup.done():
+            self._warmup = asyncio.create_task(self._run_warmup())
+
+    async def stop(self):
+        """停止预编译任务（已在线程中开始的编译会自行结束）"""
+        if self._warmup is not None:
+            self._warmup.cancel()
+            try:
+                await self._warmup
+            except asyncio.CancelledError:
+                pass
+            self._warmup = None
+
+    # ============================================
+    # 统计
+    # ============================================
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """各图的编译耗时和缓存命中统计"""
+        return [
+            {
+                "name": name,
+                "compiled": entry.graph is not None,
+                "compile_ms": entry.compile_ms,
+                "compiled_at": entry.compiled_at,
+                "hits": entry.hits,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        ]
+
+
+# 单例导出
+graph_registry = GraphRegistry(PUBLISHER_GRAPHS)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   progress.py
+@Desc    :   写作运行的结构化进度事件
+
+节点通过 emit_progress() 上报进度（章节开始/完成、搜索次数、审查分数、修订轮次、整合进度等），
+事件按文档运行缓存，SSE 订阅者先补齐缓存中的历史事件，再接收实时事件。
+
+- 运行归属由 document_scope 设置的上下文决定，不在文档运行中调用时直接忽略
+- 同步节点运行在线程池中，事件会转交到事件循环发布
+- 运行结束后缓存保留 run_events.retention 秒，供晚到的订阅者查看完整过程
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from loguru import logger
+
+from app.agents.execution.concurrency import current_document_id
+from app.config import settings
+
+# 运行结束事件（订阅者收到后断开）
+TERMINAL_EVENTS = {"run_completed", "run_failed", "run_aborted"}
+
+
+@dataclass
+class RunEvent:
+    """单条进度事件"""
+    id: int
+    event: str
+    data: Dict[str, Any]
+    timestamp: float
+
+    def to_sse(self) -> str:
+        payload = json.dumps({**self.data, "timestamp": self.timestamp}, ensure_ascii=False, default=str)
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+@dataclass
+class _RunChannel:
+    """单个运行的事件缓存和订阅者"""
+    events: Deque[RunEvent]
+    next_id: int = 1
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    closed_at: Optional[float] = None
+
+
+class RunEventBus:
+    """运行进度事件总线"""
+
+    def __init__(self):
+        self._channels: Dict[str, _RunChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _prune(self):
+        """清理超过保留时长的已结束运行"""
+        cutoff = time.time() - settings.RUN_EVENTS_RETENTION
+        for run_id in [r for r, c in self._channels.items() if c.closed_at and c.closed_at < cutoff]:
+            del self._channels[run_id]
+
+    # ============================================
+    # 发布
+    # ============================================
+
+    def open(self, run_id: str):
+        """开始（或恢复）一个运行；恢复时保留之前的事件，订阅者可以看到完整过程"""
+        self._loop = asyncio.get_running_loop()
+        self._prune()
+        channel = self._channels.get(run_id)
+        if channel is None:
+            self._channels[run_id] = _RunChannel(events=deque(maxlen=settings.RUN_EVENTS_BUFFER_SIZE))
+        else:
+            channel.closed_at = None
+
+    def emit(self, run_id: str, event: str, **data):
+        """发布事件（可在线程池中调用）"""
+        loop = self._loop
+        try:
+            in_loop_thread = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop_thread = False
+
+        if in_loop_thread or loop is None:
+            self._publish(run_id, event, data)
+        elif loop.is_running():
+            loop.call_soon_threadsafe(self._publish, run_id, event, data)
+
+    def _publish(self, run_id: str, event: str, data: Dict[str, Any]):
+        channel = self._channels.get(run_id)
+        if channel is None or channel.closed_at is not None:
+            return
+
+        record = RunEvent(id=channel.next_id, event=event, data=data, timestamp=time.time())
+        channel.next_id += 1
+        channel.events.append(record)
+        for queue in channel.subscribers:
+            queue.put_nowait(record)
+
+        if event in TERMINAL_EVENTS:
+            channel.closed_at = record.timestamp
+
+    # ============================================
+    # 订阅
+    # ============================================
+
+    def has_run(self, run_id: str) -> bool:
+        self._prune()
+        return run_id in self._channels
+
+    async def subscribe(
+        self, run_id: str, last_event_id: Optional[int] = None
+    ) -> AsyncIterator[Optional[RunEvent]]:
+        """
+        订阅运行事件：先补齐缓存中 id > last_event_id 的事件，再接收实时事件，收到结束事件后停止
+
+        超过心跳间隔没有新事件时产出 None，调用方据此发送心跳。
+        """
+        channel = self._channels.get(run_id)
+        if channel is None:
+            return
+
+        # 补齐历史和注册订阅之间没有 await，不会漏掉事件
+        backlog = [e for e in channel.events if last_event_id is None or e.id > last_event_id]
+        if channel.closed_at is not None:
+            for record in backlog:
+                yield record
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        try:
+            for record in backlog:
+                yield record
+                if record.event in TERMINAL_EVENTS:
+                    return
+
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), timeout=settings.RUN_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield record
+                if record.event in TERMINAL_EVENTS:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+
+# 单例导出
+run_events = RunEventBus()
+
+
+def emit_progress(event: str, **data):
+    """在当前文档运行中上报进度事件（不在文档运行中时忽略）"""
+    run_id = current_document_id()
+    if run_id is None:
+        return
+    try:
+        run_events.emit(run_id, event, **data)
+    except Exception as e:
+        # 进度上报不能影响写作流程
+        logger.debug(f"Failed to emit progress event {event}: {e}")
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   sandbox_pool.py
+@Desc    :   图表沙箱预热容器池
+
+DockerSandbox 原先每次 generate_chart 都 containers.run 一个新容器：创建容器、启动 Python、
+重新 import matplotlib / pandas / seaborn，往往几秒之后才开始绘图。容器池预先启动 sandbox_pool.size 个容器，
+容器内常驻 sandbox_worker（已导入绘图库），每次执行 fork 一个新的子进程运行代码，执行完即退出：
+- 任务代码写入该容器独占的宿主机目录（只读挂载到 /workspace），通过 docker exec 交给常驻 worker
+- 隔离：worker 以 root 运行，任务进程切换到 sandbox 用户，无法访问 worker 的 socket；
+  超时由容器内 worker 终止子进程，每次执行结束后 worker 清理容器内的其他进程，仍有残留进程的容器直接销毁
+- 任务已下发（docker exec run 已启动）后出现的错误作为执行错误返回，不再退回一次性容器，避免代码执行两次
+- 回收：容器执行满 max_runs 次，或容器内存（cgroup）比就绪时增长超过 max_memory_growth_mb 时销毁重建
+- 健康检查：后台线程定期 ping 空闲容器，无响应的容器被替换，并补足到 size
+- 宿主机进程异常退出后，worker 长时间收不到健康检查会自行退出，容器自动删除
+
+需要网络的执行、容器池不可用或等待空闲容器超时时，DockerSandbox 退回一次性容器。
+"""
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import docker
+from loguru import logger
+
+from app.agents.execution.sandbox_worker import EXIT_UNAVAILABLE, RESULT_MARKER
+from app.config import settings
+
+POOL_LABEL = "nexus.sandbox.pool"
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+CONTAINER_WORKER_PATH = "/opt/sandbox/sandbox_worker.py"
+
+
+class SandboxPoolError(Exception):
+    """容器池无法执行（调用方退回一次性容器）"""
+
+
+class _WarmContainer:
+    """池中的一个容器"""
+
+    def __init__(self, container, job_dir: str):
+        self.container = container
+        self.job_dir = job_dir
+        self.runs = 0
+        self.baseline_memory: Optional[int] = None
+        self.memory: Optional[int] = None
+
+    @property
+    def memory_growth(self) -> int:
+        if self.baseline_memory is None or self.memory is None:
+            return 0
+        return self.memory - self.baseline_memory
+
+
+class SandboxPool:
+    """预热的沙箱容器池"""
+
+    def __init__(
+            self,
+            client: docker.DockerClient,
+            image: str,
+            output_dir: str,
+            mem_limit: str,
+            cpu_quota: int,
+            size: int
+    ):
+        self.client = client
+        self.image = image
+        self.output_dir = output_dir
+        self.mem_limit = mem_limit
+        self.cpu_quota = cpu_quota
+        self.size = size
+
+        self._idle: "queue.Queue[_WarmContainer]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._total = 0  # 空闲 + 执行中 + 启动中
+        self._retiring: List[_WarmContainer] = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "executions": 0,
+            "started": 0,
+            "start_failures": 0,
+            "recycled_runs": 0,
+            "recycled_memory": 0,
+            "unhealthy": 0,
+        }
+
+    # ============================================
+    # 生命周期
+    # ============================================
+
+    def start(self):
+        """启动后台维护线程（启动容器、健康检查、回收）"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._maintain, name="sandbox-pool", daemon=True)
+        self._thread.start()
+        logger.info(f"[SandboxPool] Started (size={self.size}, image={self.image})")
+
+    def close(self):
+        """停止维护线程并删除所有空闲容器（执行中的容器在归还时删除）"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.SANDBOX_POOL_STARTUP_TIMEOUT)
+            self._thread = None
+
+        with self._lock:
+            warm_containers, self._retiring = self._retiring, []
+        while True:
+            try:
+                warm_containers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for warm in warm_containers:
+            self._destroy(warm)
+        logger.info(f"[SandboxPool] Closed, removed {len(warm_containers)} containers")
+
+    def _maintain(self):
+        while not self._stop.is_set():
+            try:
+                self._reap()
+                self._health_check()
+                self._fill()
+            except Exception as e:
+                logger.exception(f"[SandboxPool] Maintenance failed: {e}")
+            self._wakeup.wait(settings.SANDBOX_POOL_HEALTH_CHECK_INTERVAL)
+            self._wakeup.clear()
+
+    def _fill(self):
+        """补足到 size 个容器"""
+        while not self._stop.is_set():
+            with self._lock:
+                if self._total >= self.size:
+                    return
+                self._total += 1
+            try:
+                warm = self._start_container()
+            except Exception as e:
+                with self._lock:
+                    self._total -= 1
+                self._stats["start_failures"] += 1
+                logger.warning(f"[SandboxPool] Failed to start container, retrying later: {e}")
+                return
+            self._stats["started"] += 1
+            self._idle.put(warm)
+
+    def _start_container(self) -> _WarmContainer:
+        started = time.perf_counter()
+        job_dir = tempfile.mkdtemp(prefix="sandbox-pool-")
+        os.chmod(job_dir, 0o755)
+
+        # 宿主机停止健康检查后 worker 自行退出（auto_remove 删除容器）
+        idle_timeout = max(settings.SANDBOX_POOL_HEALTH_CHECK_INTERVAL * 4, 120)
+        try:
+            container = self.client.containers.run(
+                image=self.image,
+                command=['python', CONTAINER_WORKER_PATH, 'serve', str(idle_timeout)],
+                volumes={
+                    job_dir: {'bind': '/workspace', 'mode': 'ro'},
+                    self.output_dir: {'bind': '/output', 'mode': 'rw'},
+                    WORKER_PATH: {'bind': CONTAINER_WORKER_PATH, 'mode': 'ro'},
+                },
+                working_dir='/output',
+                # worker 以 root 运行，fork 出的任务进程再切换到 sandbox 用户
+                user='root',
+                mem_limit=self.mem_limit,
+                cpu_period=100000,
+                cpu_quota=self.cpu_quota,
+                network_disabled=True,
+                labels={POOL_LABEL: self.image},
+                auto_remove=True,
+                detach=True,
+            )
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        warm = _WarmContainer(container, job_dir)
+        deadline = time.monotonic() + settings.SANDBOX_POOL_STARTUP_TIMEOUT
+        while True:
+            meta = self._ping(warm)
+            if meta is not None:
+                warm.baseline_memory = warm.memory = meta.get("memory")
+                break
+            if time.monotonic() > deadline or self._stop.is_set():
+                self._destroy(warm)
+                raise SandboxPoolError(f"worker not ready within {settings.SANDBOX_POOL_STARTUP_TIMEOUT}s")
+            time.sleep(0.5)
+
+        logger.info(
+            f"[SandboxPool] Container {container.short_id} ready "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return warm
+
+    def _health_check(self):
+        """ping 所有空闲容器，替换无响应的容器"""
+        idle: List[_WarmContainer] = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for warm in idle:
+            meta = self._ping(warm)
+            if meta is None:
+                self._retire(warm, "unhealthy")
+                continue
+            warm.memory = meta.get("memory")
+            self._release(warm, healthy=True)
+
+    def _retire(self, warm: _WarmContainer, reason: str):
+        with self._lock:
+            self._total -= 1
+            self._retiring.append(warm)
+        if reason == "unhealthy":
+            self._stats["unhealthy"] += 1
+        else:
+            self._stats[f"recycled_{reason}"] += 1
+        logger.info(f"[SandboxPool] Retiring container {warm.container.short_id} ({reason}, runs={warm.runs})")
+        self._wakeup.set()
+
+    def _reap(self):
+        with self._lock:
+            retiring, self._retiring = self._retiring, []
+        for warm in retiring:
+            self._destroy(warm)
+
+    def _destroy(self, warm: _WarmContainer):
+        try:
+            warm.container.remove(force=True)
+        except docker.errors.NotFound:
+            pass
+        except Exception as e:
+            logger.warning(f"[SandboxPool] Failed to remove container {warm.container.short_id}: {e}")
+        shutil.rmtree(warm.job_dir, ignore_errors=True)
+
+    # ============================================
+    # 执行
+    # ============================================
+
+    def _exec(self, warm: _WarmContainer, args: List[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        在容器内调用 worker，返回 (输出, 结果元信息)；请求已发给 worker 但没有收到结果时元信息为 None
+
+        Raises:
+            SandboxPoolError: docker exec 调用失败或无法连接 worker（请求没有下发）
+        """
+        try:
+            exit_code, output = warm.container.exec_run(['python', '-S', CONTAINER_WORKER_PATH, *args], user='root')
+        except Exception as e:
+            raise SandboxPoolError(f"exec failed: {e}")
+        text = output.decode('utf-8', errors='replace')
+        if exit_code == EXIT_UNAVAILABLE:
+            raise SandboxPoolError(text.strip()[:200])
+        body, marker, meta = text.rpartition(RESULT_MARKER)
+        if not marker:
+            return text, None
+        try:
+            meta = json.loads(meta)
+        except ValueError:
+            return text, None
+        return body[:-1] if body.endswith("\n") else body, meta
+
+    def _ping(self, warm: _WarmContainer) -> Optional[Dict[str, Any]]:
+        try:
+            return self._exec(warm, ['ping'])[1]
+        except Exception:
+            return None
+
+    def execute(self, code: str, timeout: int) -> str:
+        """
+        在空闲容器中执行代码
+
+        Returns:
+            与一次性容器相同格式的输出（失败时以 ❌ 开头；任务下发后 worker 无响应也作为执行错误返回）
+
+        Raises:
+            SandboxPoolError: 容器池已关闭、没有空闲容器或任务没有下发（代码未执行，调用方可退回一次性容器）
+        """
+        if self._stop.is_set():
+            raise SandboxPoolError("pool is closed")
+        try:
+            warm = self._idle.get(timeout=settings.SANDBOX_POOL_ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise SandboxPoolError(f"no idle container within {settings.SANDBOX_POOL_ACQUIRE_TIMEOUT}s")
+
+        script_name = f"{uuid.uuid4().hex}.py"
+        script_path = os.path.join(warm.job_dir, script_name)
+        healthy = False
+        try:
+            try:
+                with open(script_path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+                os.chmod(script_path, 0o644)
+            except OSError as e:
+                raise SandboxPoolError(f"failed to write script: {e}")
+
+            started = time.perf_counter()
+            output, meta = self._exec(warm, ['run', f'/workspace/{script_name}', str(timeout)])
+            if meta is None:
+                # 代码可能已经执行（已写出图表文件），不能退回一次性容器重复执行
+                logger.warning(f"[SandboxPool] Worker in {warm.container.short_id} did not respond: {output[:200]}")
+                return f"❌ 代码执行错误:\n沙箱 worker 没有返回执行结果\n{output}"
+            # 清理后仍有残留进程的容器不再复用
+            healthy = not meta.get("stray")
+            warm.runs += 1
+            warm.memory = meta.get("memory")
+            self._stats["executions"] += 1
+            logger.info(
+                f"[SandboxPool] Executed in {warm.container.short_id} "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms, exit={meta['exit_code']})"
+            )
+            if meta.get("stray"):
+                logger.warning(
+                    f"[SandboxPool] {meta['stray']} stray processes survived cleanup in {warm.container.short_id}"
+                )
+
+        finally:
+            try:
+                os.unlink(script_path)
+            except OSError:
+                pass
+            self._release(warm, healthy)
+
+        if meta.get("timed_out"):
+            return f"❌ 代码执行错误:\n执行超时（{timeout}s）\n{output}"
+        if meta["exit_code"] != 0:
+            return f"❌ 代码执行错误:\n{output}"
+        return output
+
+    def _release(self, warm: _WarmContainer, healthy: bool):
+        """归还容器，需要回收时销毁重建"""
+        if self._stop.is_set():
+            with self._lock:
+                self._total -= 1
+            self._destroy(warm)
+        elif not healthy:
+            self._retire(warm, "unhealthy")
+        elif warm.runs >= settings.SANDBOX_POOL_MAX_RUNS:
+            self._retire(warm, "runs")
+        elif warm.memory_growth > settings.SANDBOX_POOL_MAX_MEMORY_GROWTH:
+            self._retire(warm, "memory")
+        else:
+            self._idle.put(warm)
+
+    # ============================================
+    # 统计
+    # ============================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._total
+        return {
+            "size": self.size,
+            "containers": total,
+            "idle": self._idle.qsize(),
+            **self._stats,
+        }
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   sandbox_worker.py
+@Desc    :   沙箱容器内的常驻 worker（挂载到容器内运行，只依赖标准库和镜像中的绘图库）
+
+serve:  以 root 运行，预先导入 matplotlib / pandas / seaborn 后监听容器内的 unix socket；
+        每个任务 fork 一个子进程执行，子进程继承已导入的模块，切换到 sandbox 用户后执行，执行完即退出。
+        socket 位于只有 root 可访问的目录，任务进程无法替换 socket 或连接 worker；
+        子进程退出后 SIGKILL 容器内除 worker 和本次 run 进程以外的所有进程，仍有残留进程时在结果中标记 stray，
+        由容器池销毁该容器，任务之间互不影响。
+        超过 idle_timeout 秒没有任何请求（宿主机进程已退出、不再做健康检查）时自行退出，容器随之删除
+run:    宿主机通过 docker exec（root）调用，把任务转发给 serve 进程并原样输出子进程的 stdout / stderr，
+        最后一行是 RESULT_MARKER 开头的 JSON（退出码、是否超时、残留进程数、容器内存占用）；
+        无法连接 serve 进程（任务未下发）时以 EXIT_UNAVAILABLE 退出
+ping:   健康检查，只输出 RESULT_MARKER 行
+"""
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+
+SOCKET_DIR = "/run/sandbox_worker"
+SOCKET_PATH = os.path.join(SOCKET_DIR, "worker.sock")
+RESULT_MARKER = "__SANDBOX_RESULT__"
+
+# run 无法连接 serve 进程时的退出码（任务没有下发，调用方可以改用一次性容器）
+EXIT_UNAVAILABLE = 3
+
+# 任务进程使用的用户（镜像中的 sandbox 用户）
+JOB_USER = "sandbox"
+
+# 清理残留进程的最大轮数（进程可能在扫描和 kill 之间继续 fork）
+_CLEANUP_ROUNDS = 5
+
+# 预加载的字体（推荐绘图模板中使用的中文字体）
+PRELOAD_FONTS = ["/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
+
+# cgroup v2 / v1 的容器内存占用
+_MEMORY_FILES = ["/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory/memory.usage_in_bytes"]
+
+
+def _preload():
+    """导入绘图库并加载字体，fork 出的子进程直接复用"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import seaborn  # noqa: F401
+    from matplotlib import font_manager
+
+    for path in PRELOAD_FONTS:
+        if os.path.exists(path):
+            font_manager.get_font(path)
+
+
+def _memory_usage():
+    for path in _MEMORY_FILES:
+        try:
+            with open(path) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def _send_result(conn, **result):
+    result["memory"] = _memory_usage()
+    conn.sendall(f"\n{RESULT_MARKER}{json.dumps(result)}\n".encode("utf-8"))
+
+
+def _read_request(conn):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode("utf-8"))
+
+
+# ============================================
+# serve
+# ============================================
+
+def _run_child(conn, script):
+    """子进程：stdout / stderr 指向连接，以 __main__ 身份执行脚本"""
+    exit_code = 0
+    try:
+        # 独立进程组，超时时连同脚本启动的子进程一起终止
+        os.setsid()
+        _drop_privileges()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+
+        # fork 继承了 serve 进程的随机数状态，按新解释器的行为重新播种
+        import random
+        import numpy
+        random.seed()
+        numpy.random.seed()
+
+        with open(script, encoding="utf-8") as f:
+            source = f.read()
+        sys.argv = [script]
+        exec(compile(source, script, "exec"), {"__name__": "__main__", "__file__": script})
+
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def _drop_privileges():
+    """切换到 JOB_USER（worker 以 root 运行时），任务进程无法访问 SOCKET_DIR"""
+    if os.getuid() != 0:
+        return
+    import pwd
+    user = pwd.getpwnam(JOB_USER)
+    os.setgroups([])
+    os.setgid(user.pw_gid)
+    os.setuid(user.pw_uid)
+    os.environ["HOME"] = user.pw_dir
+    os.environ["USER"] = JOB_USER
+
+
+def _kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _peer_pid(conn):
+    """本次 run 进程（docker exec）的 pid，需要等它输出结果，不能清理"""
+    pid, _, _ = struct.unpack("3i", conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+    return pid
+
+
+def _live_pids(keep):
+    """容器内除 keep 以外仍在运行的进程（不含僵尸进程；1 号进程是 worker 或容器的 init）"""
+    pids = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit() or int(name) in keep:
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                state = f.read().rpartition(")")[2].split()[0]
+        except (OSError, IndexError):
+            continue
+        if state != "Z":
+            pids.append(int(name))
+    return pids
+
+
+def _reap():
+    """回收已退出的子进程（worker 是容器的 1 号进程，孤儿进程都由它回收）"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if not pid:
+            return
+
+
+def _kill_strays(keep):
+    """
+    SIGKILL 容器内除 keep 以外的所有进程（脚本启动的后台进程可能已用 setsid 脱离任务的进程组），
+    返回清理后仍然存活的进程数
+    """
+    for _ in range(_CLEANUP_ROUNDS):
+        pids = _live_pids(keep)
+        if not pids:
+            return 0
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        time.sleep(0.05)
+        _reap()
+    return len(_live_pids(keep))
+
+
+def _handle(server, conn):
+    request = _read_request(conn)
+    if request.get("action") == "ping":
+        _send_result(conn, exit_code=0, timed_out=False)
+        return
+
+    pid = os.fork()
+    if pid == 0:
+        server.close()
+        _run_child(conn, request["script"])
+
+    deadline = time.monotonic() + float(request.get("timeout", 120))
+    timed_out = False
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() > deadline:
+            timed_out = True
+            _kill_group(pid)
+            _, status = os.waitpid(pid, 0)
+            break
+        time.sleep(0.01)
+
+    # 脚本启动的后台进程不能留到下一个任务（可读取其他报告的脚本），子进程退出后清理容器内的其他进程
+    stray = _kill_strays({1, os.getpid(), _peer_pid(conn)})
+
+    exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    _send_result(conn, exit_code=exit_code, timed_out=timed_out, stray=stray)
+
+
+def serve(idle_timeout):
+    _preload()
+
+    os.makedirs(SOCKET_DIR, mode=0o700, exist_ok=True)
+    os.chmod(SOCKET_DIR, 0o700)
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_PATH)
+    server.listen(8)
+    server.settimeout(idle_timeout)
+    print("sandbox worker ready", flush=True)
+
+    while True:
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            print(f"sandbox worker idle for {idle_timeout}s, exiting", flush=True)
+            return
+        conn.settimeout(None)
+        try:
+            _handle(server, conn)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            conn.close()
+
+
+# ============================================
+# run / ping（docker exec 调用）
+# ============================================
+
+def forward(request, timeout):
+    """把请求转发给 serve 进程，原样输出响应"""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(SOCKET_PATH)
+    except OSError as e:
+        conn.close()
+        print(f"sandbox worker unavailable: {e}", file=sys.stderr)
+        sys.exit(EXIT_UNAVAILABLE)
+    try:
+        conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        out = sys.stdout.buffer
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            out.write(chunk)
+        out.flush()
+    except OSError as e:
+        print(f"sandbox worker connection lost: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+    if command == "serve":
+        serve(float(sys.argv[2]) if len(sys.argv) > 2 else 300)
+    elif command == "run":
+        run_timeout = float(sys.argv[3])
+        forward({"action": "run", "script": sys.argv[2], "timeout": run_timeout}, run_timeout + 30)
+    elif command == "ping":
+        forward({"action": "ping"}, 10)
+    else:
+        sys.exit(f"unknown command: {command}")
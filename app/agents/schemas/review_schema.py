@@ -41,6 +41,51 @@ class ReviewResult(BaseModel):
     )
 
 
+class ChapterSuggestion(BaseModel):
+    """定位到章节的修改建议"""
+    chapter: str = Field(
+        description="建议针对的章节锚点：必须与「章节锚点」列表中的标题完全一致；跨多个章节或全局性的问题填写 'global'。"
+    )
+
+    suggestion: str = Field(
+        description="具体、明确的修改指令（与 actionable_suggestions 中的对应条目相同）。"
+    )
+
+
+class DocumentReviewResult(ReviewResult):
+    """
+    文档级审查结果：在 ReviewResult 基础上把每条建议定位到章节，
+    修订时只重新生成受影响的章节
+    """
+    chapter_suggestions: List[ChapterSuggestion] = Field(
+        description="actionable_suggestions 中每条建议及其所属章节锚点。",
+        default=[]
+    )
+
+
+class ChapterReviewFinding(BaseModel):
+    """
+    单章审查结果（map-reduce 审查的 map 阶段），按章节内容哈希缓存，
+    章节未修改时在后续修订轮次中复用
+    """
+    score: int = Field(
+        description="0-100分，本章相对大纲要求的完成质量。",
+        ge=0, le=100
+    )
+
+    summary: str = Field(
+        description="本章内容摘要（2-3 句），供全局审查了解章节要点，不要评价。"
+    )
+
+    issues: List[str] = Field(
+        description="本章存在的问题（偏离大纲、内容缺口、事实或逻辑问题、风格不一致等）。",
+        default=[]
+    )
+
+    suggestions: List[str] = Field(
+        description="针对本章的具体、可执行的修改指令，最多 3 条。",
+        default=[]
+    )
 
 
 class SuggestedFix(BaseModel):
@@ -12,6 +12,7 @@ import re
 import os
 import uuid
 import base64
+import threading
 from langchain_core.tools import tool
 
 
@@ -20,20 +21,31 @@ from app.database.minio_db import upload_chart
 
 
 _sandbox = None
+_sandbox_lock = threading.Lock()
 
 def get_sandbox():
     """获取或创建 DockerSandbox 实例"""
     global _sandbox
-    if _sandbox is None:
-        _sandbox = DockerSandbox(
-            output_dir='charts',
-            image='sandbox:latest',
-            mem_limit='512m',
-            cpu_quota=50000
-        )
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = DockerSandbox(
+                output_dir='charts',
+                image='sandbox:latest',
+                mem_limit='512m',
+                cpu_quota=50000
+            )
     return _sandbox
 
 
+def close_sandbox():
+    """关闭 DockerSandbox（删除预热容器）"""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is not None:
+            _sandbox.close()
+            _sandbox = None
+
+
 @tool
 def generate_chart(code: str, report_id: str = None) -> dict:
     """
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   evidence_packer.py
+@Desc    :   搜索素材打包（段落级检索 + token 预算）
+
+章节写作原先把所有搜索结果整页拼进 prompt，页面只按字符截断：
+保留了页头、导航等样板内容，却丢掉了页面后半部分的相关段落。这里改为：
+1. 页面按空行 / 句子切分为段落（writing_evidence.passage_chars），过滤链接密集（导航、相关推荐）和过短的样板段落
+2. 用 BM25 按章节标题、描述、内容要求对所有段落打分（英文词 + 中文 2-gram 词项），
+   产生该页面的搜索查询以较低权重参与打分
+3. 按分数从高到低填充 token 预算（writing_evidence.token_budget），单个来源最多 max_passages_per_source 段
+4. 选中的段落按来源分组、按原文顺序输出，附来源标题和 URL，便于写作时引用
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.agents.tools.search.similarity import tokenize
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[。！？!?；;])|(?<=\.)\s+")
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_CJK = re.compile(r"[一-鿿]")
+
+# 短于该长度（去掉链接后）的段落视为样板内容
+MIN_PASSAGE_CHARS = 40
+# 短于该长度的块（标题、短句）并入下一段
+MERGE_CHARS = 100
+# 每个来源标题、URL 的额外 token 开销
+SOURCE_HEADER_TOKENS = 30
+# 最多附带的图片数
+MAX_IMAGES = 5
+# 产生该页面的搜索查询在打分中的权重（章节描述为 1）
+SEARCH_QUERY_WEIGHT = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算 token 数（DeepSeek 换算：1 个中文字符约 0.6 token，1 个英文字符约 0.3 token）
+
+    不同模型的分词器不同，这里只用于预算控制，不需要精确计数。
+    """
+    cjk = len(_CJK.findall(text))
+    return int(cjk * 0.6 + (len(text) - cjk) * 0.3) + 1
+
+
+def split_passages(text: str, passage_chars: int) -> List[str]:
+    """按段落切分页面，短段落（标题、短句）并入下一段，过长段落按句子切分到 passage_chars 以内"""
+    passages: List[str] = []
+    current = ""
+
+    def flush():
+        nonlocal current
+        if current:
+            passages.append(current)
+            current = ""
+
+    for block in (b.strip() for b in _PARAGRAPH_SPLIT.split(text or "")):
+        if not block or (not block.startswith("#") and _is_link_dense(block)):
+            continue
+        if len(block) > passage_chars:
+            flush()
+            for sentence in (s.strip() for s in _SENTENCE_SPLIT.split(block)):
+                # 没有句子边界的超长文本（表格、代码等）按长度硬切
+                while len(sentence) > passage_chars:
+                    flush()
+                    passages.append(sentence[:passage_chars])
+                    sentence = sentence[passage_chars:]
+                if not sentence:
+                    continue
+                if current and len(current) + len(sentence) + 1 > passage_chars:
+                    flush()
+                current = f"{current} {sentence}" if current else sentence
+            flush()
+        elif current and (len(current) >= MERGE_CHARS or len(current) + len(block) + 2 > passage_chars):
+            flush()
+            current = block
+        else:
+            current = f"{current}\n\n{block}" if current else block
+    flush()
+
+    return [p for p in passages if len(_MARKDOWN_LINK.sub("", p).strip()) >= MIN_PASSAGE_CHARS]
+
+
+def _is_link_dense(block: str) -> bool:
+    """导航、相关推荐等样板块：链接文字占大部分，或由多行很短的文本组成"""
+    without_links = _MARKDOWN_LINK.sub("", block).strip()
+    if len(without_links) < len(block) * 0.3:
+        return True
+    lines = [line for line in _MARKDOWN_LINK.sub(r"\1", block).splitlines() if line.strip()]
+    return len(lines) >= 4 and sum(len(line) for line in lines) / len(lines) < 20
+
+
+class BM25:
+    """Okapi BM25（k1=1.5, b=0.75），支持增量添加文档"""
+
+    def __init__(self, documents: List[List[str]] = (), k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: List[Counter] = []
+        self.lengths: List[int] = []
+        self.document_freq: Counter = Counter()
+        self._total_length = 0
+        self._idf: Optional[Dict[str, float]] = None
+        for doc in documents:
+            self.add(doc)
+
+    def add(self, document: List[str]):
+        """添加一个文档（IDF 在下次打分时重新计算）"""
+        tf = Counter(document)
+        self.term_freqs.append(tf)
+        self.lengths.append(len(document))
+        self.document_freq.update(tf.keys())
+        self._total_length += len(document)
+        self._idf = None
+
+    @property
+    def idf(self) -> Dict[str, float]:
+        if self._idf is None:
+            total = len(self.term_freqs)
+            self._idf = {
+                term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+                for term, freq in self.document_freq.items()
+            }
+        return self._idf
+
+    def scores(self, query: List[str]) -> List[float]:
+        idf = self.idf
+        terms = [t for t in set(query) if t in idf]
+        avg_length = self._total_length / len(self.lengths) if self.lengths else 0.0
+        results = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length) if avg_length else self.k1
+            results.append(sum(
+                idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm)
+                for t in terms if t in tf
+            ))
+        return results
+
+
+def count_pages(results: Any) -> int:
+    """搜索结果中的页面数（不含图片；搜索失败的提示文本为 0）"""
+    if not isinstance(results, list):
+        return 0
+    return sum(1 for item in results if isinstance(item, dict) and item.get("type") != "image")
+
+
+def collect_sources(search_results: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """从章节搜索结果中提取页面（按 URL 去重）和图片"""
+    sources: List[Dict[str, Any]] = []
+    images: List[Dict[str, Any]] = []
+    seen = set()
+    for entry in search_results:
+        content = entry.get("content")
+        if not isinstance(content, list):
+            continue
+        for item in content:
+            if not isinstance(item, dict):
+                continue
+            if item.get("type") == "image":
+                if item.get("image_url") and item["image_url"] not in seen:
+                    seen.add(item["image_url"])
+                    images.append(item)
+                continue
+            url = item.get("url")
+            if url in seen:
+                continue
+            seen.add(url)
+            sources.append({
+                "url": url,
+                "title": item.get("title") or url,
+                "text": item.get("raw_content") or item.get("content", ""),
+                "query": entry.get("query", ""),
+            })
+    return sources, images
+
+
+def source_queries(source: Dict[str, Any]) -> List[str]:
+    """返回该页面的所有搜索查询（素材库中的页面记录在 queries 中，单次搜索的来源只有 query）"""
+    queries = source.get("queries")
+    if queries is None:
+        queries = [source["query"]]
+    return [q for q in queries if q]
+
+
+def score_passages(
+    bm25: BM25,
+    passages: List[Tuple[int, int, str]],
+    sources: List[Dict[str, Any]],
+    query_text: str,
+    boost_queries: Optional[Set[str]] = None,
+) -> List[float]:
+    """
+    BM25 打分：检索词为章节描述，返回该页面的搜索查询以 SEARCH_QUERY_WEIGHT 参与打分
+    （页面被多个查询返回时取得分最高的查询）
+
+    Args:
+        boost_queries: 只有这些查询返回的页面参与查询加权（None 表示所有来源都加权）
+    """
+    scores = bm25.scores(tokenize(query_text))
+    queries = {q for s in sources for q in source_queries(s)}
+    if boost_queries is not None:
+        queries &= boost_queries
+    query_scores = {q: bm25.scores(tokenize(q)) for q in queries}
+    for idx, (source_idx, _, _) in enumerate(passages):
+        boosts = [query_scores[q][idx] for q in source_queries(sources[source_idx]) if q in query_scores]
+        if boosts:
+            scores[idx] += SEARCH_QUERY_WEIGHT * max(boosts)
+    return scores
+
+
+def pack_passages(
+    sources: List[Dict[str, Any]],
+    passages: List[Tuple[int, int, str]],
+    scores: List[float],
+    token_budget: int,
+    max_passages_per_source: int = 4,
+    images: Optional[List[Dict[str, Any]]] = None,
+    allow_fallback: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    按分数填充 token 预算并输出素材文本
+
+    Args:
+        sources: [{"url", "title", "text", "query"}]
+        passages: [(来源下标, 段落在来源中的位置, 文本)]
+        scores: 与 passages 对应的相关性分数（分数为 0 的段落不选；全部为 0 时——例如英文大纲配中文来源，
+            查询与原文没有共同词——退回按各来源的开头段落轮流填充，避免丢掉全部素材）
+        allow_fallback: 是否允许上述退回（passages 不全是当前章节的来源时应关闭）
+
+    Returns:
+        (素材文本（没有选中任何内容时为空字符串）, 统计信息)
+    """
+    fallback = allow_fallback and bool(passages) and not any(score > 0 for score in scores)
+    if fallback:
+        ranked = sorted(range(len(passages)), key=lambda i: (passages[i][1], passages[i][0]))
+    else:
+        ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    # === 1. 按分数填充预算 ===
+    used = 0
+    per_source: Counter = Counter()
+    selected: Dict[int, List[Tuple[int, str]]] = {}
+    source_rank: Dict[int, int] = {}
+    for idx in ranked:
+        if scores[idx] <= 0 and not fallback:
+            break
+        source_idx, position, text = passages[idx]
+        if per_source[source_idx] >= max_passages_per_source:
+            continue
+        cost = estimate_tokens(text) + (SOURCE_HEADER_TOKENS if source_idx not in selected else 0)
+        if used + cost > token_budget:
+            continue
+        used += cost
+        per_source[source_idx] += 1
+        selected.setdefault(source_idx, []).append((position, text))
+        source_rank.setdefault(source_idx, len(source_rank))
+
+    # === 2. 按来源分组输出（来源按最佳段落排序，段落按原文顺序） ===
+    blocks = []
+    for number, source_idx in enumerate(sorted(selected, key=source_rank.get), start=1):
+        source = sources[source_idx]
+        body = "\n\n".join(text for _, text in sorted(selected[source_idx]))
+        blocks.append(f"**[{number}] {source['title']}**\nURL: {source['url']}\n\n{body}")
+
+    image_lines = []
+    for image in (images or [])[:MAX_IMAGES]:
+        line = f"- {image.get('image_url')}: {image.get('image_description') or image.get('title') or ''}".rstrip(": ")
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        used += cost
+        image_lines.append(line)
+    if image_lines:
+        blocks.append("**Images**\n" + "\n".join(image_lines))
+
+    stats = {
+        "sources": len(sources),
+        "passages": len(passages),
+        "selected_passages": sum(per_source.values()),
+        "selected_sources": len(selected),
+        "tokens": used,
+        "token_budget": token_budget,
+        "fallback": fallback,
+    }
+    return "\n\n---\n\n".join(blocks), stats
+
+
+def pack_evidence(
+    search_results: List[Dict[str, Any]],
+    query_text: str,
+    token_budget: int,
+    passage_chars: int = 800,
+    max_passages_per_source: int = 4,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    把章节的搜索结果打包为 token 预算内的写作素材
+
+    Args:
+        search_results: [{"query": str, "content": List[Dict] | str}]
+        query_text: 检索用的章节描述（标题、描述、内容要求）
+        token_budget: 素材的 token 预算
+        passage_chars: 段落长度上限（字符）
+        max_passages_per_source: 单个来源最多选取的段落数
+
+    Returns:
+        (素材文本（没有可用段落时为空字符串）, 统计信息)
+    """
+    sources, images = collect_sources(search_results)
+
+    passages: List[Tuple[int, int, str]] = []  # (来源下标, 段落在来源中的位置, 文本)
+    for source_idx, source in enumerate(sources):
+        for position, passage in enumerate(split_passages(source["text"], passage_chars)):
+            passages.append((source_idx, position, passage))
+
+    if not passages:
+        return pack_passages(sources, passages, [], token_budget)
+
+    scores = score_passages(BM25([tokenize(text) for _, _, text in passages]), passages, sources, query_text)
+    return pack_passages(sources, passages, scores, token_budget, max_passages_per_source, images)
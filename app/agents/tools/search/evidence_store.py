@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   evidence_store.py
+@Desc    :   报告级素材库（跨迭代、跨章节、修订时复用搜索素材）
+
+章节写作每轮 write 之后 search_results 会被清空，后续迭代看不到前几轮的素材，
+章节修订（revise_draft）也完全看不到来源。素材库按文档运行保存本报告抓取过的所有页面：
+- 页面按 URL 去重保存，新增页面时切分段落并增量加入 BM25 索引（已保存的页面不会重新分词）；
+  页面记录返回过它的所有查询（包括复用已有结果的相似查询），检索时按这些查询加权
+- 查询索引：规范化查询 -> 该查询返回的页面；与已执行查询足够相似（evidence_store.query_reuse_threshold）
+  的新查询直接复用已有结果，不再搜索（其他章节、后续迭代的重复查询）
+- 检索：按章节描述（和修订建议）从整个报告的素材中挑选相关段落，填充 token 预算
+
+素材库归属由 document_scope 设置的上下文决定（与进度事件相同），不在文档运行中时各调用方退回原有行为。
+add_search / retrieve 需要分词和打分，异步节点通过 asyncio.to_thread 调用，不阻塞事件循环。
+开启 evidence_store.persist 后，未完成的运行（中止、失败）结束时素材以 zstd 压缩的 JSON 保存到 evidence_store.dir，
+恢复运行时重新加载，运行完成时删除；未开启时运行结束即释放。
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import zstandard
+from loguru import logger
+
+from app.agents.execution.concurrency import current_document_id
+from app.agents.tools.search.evidence_packer import (
+    BM25,
+    collect_sources,
+    pack_passages,
+    score_passages,
+    source_queries,
+    split_passages,
+)
+from app.agents.tools.search.similarity import NearDuplicateIndex, jaccard, normalize_query, shingles, tokenize
+from app.config import settings
+
+
+class ReportEvidence:
+    """单个报告的素材库"""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self._pages: Dict[str, Dict[str, Any]] = {}  # url -> {"url", "title", "text", "query", "queries"}
+        self._images: Dict[str, Dict[str, Any]] = {}  # image_url -> 图片结果
+        self._queries: Dict[str, Dict[str, Any]] = {}  # 规范化查询 -> {"query", "shingles", "urls", "images"}
+        self._lock = threading.Lock()
+
+        # 不同查询返回的转载 / 镜像页面只保存一份，查询索引指向保留的页面
+        threshold = settings.SEARCH_NEAR_DUPLICATE_THRESHOLD
+        self._dedup = NearDuplicateIndex(threshold) if threshold else None
+
+        # 段落索引（随页面增量构建）
+        self._sources: List[Dict[str, Any]] = []
+        self._passages: List[Tuple[int, int, str]] = []
+        self._bm25 = BM25()
+
+    # ============================================
+    # 写入
+    # ============================================
+
+    def add_search(self, query: str, results: Any):
+        """
+        记录一次搜索的结果
+
+        Args:
+            query: 搜索查询
+            results: 后处理后的结果列表（搜索失败的提示文本不记录）
+        """
+        if not isinstance(results, list):
+            return
+
+        with self._lock:
+            urls, image_urls = [], []
+            sources, images = collect_sources([{"query": query, "content": results}])
+            for source in sources:
+                url = source["url"]
+                if not url:
+                    continue
+                if url not in self._pages:
+                    duplicate_of = self._dedup.check_and_add(source["text"], key=url) if self._dedup else None
+                    if duplicate_of is not None:
+                        url = duplicate_of
+                    elif len(self._pages) >= settings.EVIDENCE_STORE_MAX_PAGES:
+                        logger.warning(f"[EvidenceStore] {self.document_id} reached max pages, {url} not stored")
+                        continue
+                    else:
+                        self._pages[url] = {**source, "queries": []}
+                        self._index_page(self._pages[url])
+                urls.append(url)
+                self._record_query(url, query)
+            for image in images:
+                image_urls.append(image["image_url"])
+                self._images.setdefault(image["image_url"], image)
+
+            self._queries[normalize_query(query)] = {
+                "query": query,
+                "shingles": shingles(query),
+                "urls": urls,
+                "images": image_urls,
+            }
+
+    # ============================================
+    # 读取
+    # ============================================
+
+    def _record_query(self, url: str, query: str):
+        """记录返回该页面的查询（调用方持有锁）"""
+        page = self._pages.get(url)
+        if page is not None and query not in page["queries"]:
+            page["queries"].append(query)
+
+    def lookup_query(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        查找已执行过的相同或相似查询
+
+        命中相似查询时把当前查询记录到复用的页面上，检索时这些页面同样按当前查询加权。
+
+        Returns:
+            命中时返回该查询的结果（与 search_pages 的返回格式相同），否则返回 None
+        """
+        threshold = settings.EVIDENCE_STORE_QUERY_REUSE_THRESHOLD
+        with self._lock:
+            entry = self._queries.get(normalize_query(query))
+            if entry is None:
+                current = shingles(query)
+                entry = next(
+                    (e for e in self._queries.values() if jaccard(current, e["shingles"]) >= threshold),
+                    None
+                )
+            if entry is None:
+                return None
+            for url in entry["urls"]:
+                self._record_query(url, query)
+
+            results: List[Dict[str, Any]] = [
+                {
+                    "type": "page",
+                    "url": url,
+                    "title": self._pages[url]["title"],
+                    "content": "",
+                    "raw_content": self._pages[url]["text"],
+                }
+                for url in entry["urls"] if url in self._pages
+            ]
+            results.extend(self._images[u] for u in entry["images"] if u in self._images)
+            return results or None
+
+    def _index_page(self, source: Dict[str, Any]):
+        """切分新页面并加入段落索引（调用方持有锁）"""
+        source_idx = len(self._sources)
+        self._sources.append(source)
+        for position, passage in enumerate(split_passages(source["text"], settings.WRITING_EVIDENCE_PASSAGE_CHARS)):
+            self._passages.append((source_idx, position, passage))
+            self._bm25.add(tokenize(passage))
+
+    def retrieve(
+        self,
+        query_text: str,
+        token_budget: int,
+        images: Optional[List[Dict[str, Any]]] = None,
+        queries: Optional[List[str]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        从整个报告的素材中检索相关段落
+
+        Args:
+            query_text: 检索文本（章节标题、描述、内容要求，修订时附加审查建议）
+            token_budget: 素材的 token 预算
+            images: 附带的图片（图片不参与检索，由调用方按本轮搜索结果提供）
+            queries: 本轮搜索的查询，只有这些查询返回的页面参与查询加权（其他章节的页面只按检索文本打分）；
+                没有任何段落命中时只在这些查询返回的页面中退回开头段落，为 None 时不退回
+
+        Returns:
+            (素材文本（没有相关内容时为空字符串）, 统计信息)
+        """
+        with self._lock:
+            if not self._passages:
+                return pack_passages(self._sources, self._passages, [], token_budget, images=images)
+            round_queries = set(queries or ())
+            passages = self._passages
+            scores = score_passages(self._bm25, passages, self._sources, query_text, round_queries)
+            if round_queries and not any(score > 0 for score in scores):
+                round_passages = [
+                    (i, passage) for i, passage in enumerate(passages)
+                    if round_queries.intersection(source_queries(self._sources[passage[0]]))
+                ]
+                passages = [passage for _, passage in round_passages]
+                scores = [scores[i] for i, _ in round_passages]
+            return pack_passages(
+                self._sources,
+                passages,
+                scores,
+                token_budget,
+                settings.WRITING_EVIDENCE_MAX_PASSAGES_PER_SOURCE,
+                images,
+                allow_fallback=bool(round_queries),
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "document_id": self.document_id,
+                "pages": len(self._pages),
+                "images": len(self._images),
+                "queries": len(self._queries),
+                "passages": len(self._passages),
+            }
+
+    # ============================================
+    # 持久化
+    # ============================================
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pages": list(self._pages.values()),
+                "images": list(self._images.values()),
+                "queries": [{k: v for k, v in e.items() if k != "shingles"} for e in self._queries.values()],
+            }
+
+    @classmethod
+    def from_dict(cls, document_id: str, data: Dict[str, Any]) -> "ReportEvidence":
+        evidence = cls(document_id)
+        evidence._pages = {page["url"]: page for page in data.get("pages", [])}
+        for page in evidence._pages.values():
+            page.setdefault("queries", [page["query"]] if page.get("query") else [])
+            evidence._index_page(page)
+            if evidence._dedup is not None:
+                evidence._dedup.check_and_add(page["text"], key=page["url"])
+        evidence._images = {image["image_url"]: image for image in data.get("images", [])}
+        evidence._queries = {
+            normalize_query(entry["query"]): {**entry, "shingles": shingles(entry["query"])}
+            for entry in data.get("queries", [])
+        }
+        return evidence
+
+
+class EvidenceStore:
+    """按文档运行管理素材库"""
+
+    def __init__(self):
+        self._reports: Dict[str, ReportEvidence] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, document_id: str) -> str:
+        return os.path.join(settings.EVIDENCE_STORE_DIR, f"{document_id}.json.zst")
+
+    def open(self, document_id: str) -> Optional[ReportEvidence]:
+        """开始（或恢复）文档运行时调用；开启持久化时加载之前保存的素材"""
+        if not settings.EVIDENCE_STORE_ENABLED:
+            return None
+
+        with self._lock:
+            evidence = self._reports.get(document_id)
+            if evidence is not None:
+                return evidence
+
+            evidence = ReportEvidence(document_id)
+            path = self._path(document_id)
+            if settings.EVIDENCE_STORE_PERSIST and os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+                    evidence = ReportEvidence.from_dict(document_id, data)
+                    logger.info(f"[EvidenceStore] Loaded {len(evidence._pages)} pages for {document_id}")
+                except Exception as e:
+                    logger.warning(f"[EvidenceStore] Failed to load {path}, starting empty: {e}")
+            self._reports[document_id] = evidence
+            return evidence
+
+    def current(self) -> Optional[ReportEvidence]:
+        """当前文档运行的素材库（不在文档运行中或未启用时返回 None）"""
+        document_id = current_document_id()
+        if document_id is None:
+            return None
+        return self._reports.get(document_id)
+
+    def release(self, document_id: str, completed: bool = False):
+        """
+        文档运行结束时调用：开启持久化时保存素材（运行已完成时删除素材文件），然后释放内存
+
+        Args:
+            completed: 运行是否已完成（已完成的运行不会再恢复）
+        """
+        with self._lock:
+            evidence = self._reports.pop(document_id, None)
+        if evidence is None or not settings.EVIDENCE_STORE_PERSIST:
+            return
+
+        path = self._path(document_id)
+        if completed:
+            try:
+                os.remove(path)
+                logger.info(f"[EvidenceStore] Removed {path} (run completed)")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"[EvidenceStore] Failed to remove {path}: {e}")
+            return
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            started = time.perf_counter()
+            payload = zstandard.ZstdCompressor().compress(
+                json.dumps(evidence.to_dict(), ensure_ascii=False).encode("utf-8")
+            )
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            logger.info(
+                f"[EvidenceStore] Saved {document_id} ({len(payload)} bytes) "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            logger.warning(f"[EvidenceStore] Failed to save {path}: {e}")
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """当前内存中各报告素材库的统计"""
+        with self._lock:
+            reports = list(self._reports.values())
+        return [evidence.get_stats() for evidence in reports]
+
+
+# 单例导出
+evidence_store = EvidenceStore()
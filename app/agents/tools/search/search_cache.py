@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   search_cache.py
+@Desc    :   持久化搜索结果缓存（跨章节 / 报告 / 用户共享）
+
+同一报告的不同章节、相近主题的不同报告会反复发出相同或几乎相同的 Tavily 查询。
+web_search 在调用 Tavily 之前先查询本缓存：
+- 存储：本地 SQLite（WAL 模式，同一机器上的多个 worker 进程共享），Tavily 原始响应以 zstd 压缩存储；
+  缓存的是清洗前的原始响应，调整后处理参数后缓存仍然有效
+- 键：规范化查询（NFKC、小写、合并空白、去掉首尾标点）+ 搜索参数的 sha256
+- 过期：按时效类别配置 TTL（search_cache.ttl），查询包含时效性关键词（最新、今天、股价等）时归为 realtime，
+  topic=news 时归为 news，其余为 general
+- 淘汰：按最近访问时间 LRU，条目数（max_entries）或压缩后总大小（max_bytes）超限时淘汰最久未访问的条目
+- 缓存不可用（文件损坏、磁盘满等）时只记录日志，搜索照常进行
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import zstandard
+from loguru import logger
+
+from app.agents.tools.search.similarity import normalize_query
+from app.config import settings
+
+FRESHNESS_CLASSES = ("realtime", "news", "general")
+
+# 每写入多少条检查一次容量
+EVICT_CHECK_INTERVAL = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    freshness TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_last_accessed ON search_cache (last_accessed);
+CREATE INDEX IF NOT EXISTS idx_search_cache_expires_at ON search_cache (expires_at);
+"""
+
+
+def cache_key(query: str, options: Dict[str, Any]) -> str:
+    """规范化查询 + 搜索参数 -> 缓存键"""
+    raw = json.dumps({"q": normalize_query(query), "o": options}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def classify_freshness(query: str, options: Dict[str, Any]) -> str:
+    """判断查询的时效类别"""
+    text = normalize_query(query)
+    if any(keyword.lower() in text for keyword in settings.SEARCH_CACHE_REALTIME_KEYWORDS):
+        return "realtime"
+    if options.get("topic") == "news":
+        return "news"
+    return "general"
+
+
+class SearchCache:
+    """持久化搜索结果缓存"""
+
+    def __init__(self):
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=settings.SEARCH_CACHE_COMPRESSION_LEVEL)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._writes_since_evict = 0
+        self._stats = {
+            name: {"hits": 0, "misses": 0, "expired": 0, "writes": 0}
+            for name in FRESHNESS_CLASSES
+        }
+        self._evicted = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = settings.SEARCH_CACHE_PATH
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ============================================
+    # 读写
+    # ============================================
+
+    def get(self, query: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的 Tavily 原始响应
+
+        Returns:
+            未命中、已过期或缓存不可用时返回 None
+        """
+        if not settings.SEARCH_CACHE_ENABLED:
+            return None
+
+        key = cache_key(query, options)
+        freshness = classify_freshness(query, options)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._stats[freshness]["misses"] += 1
+                    return None
+                if row[1] <= now:
+                    conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self._stats[freshness]["expired"] += 1
+                    self._stats[freshness]["misses"] += 1
+                    return None
+                conn.execute(
+                    "UPDATE search_cache SET last_accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+                conn.commit()
+                self._stats[freshness]["hits"] += 1
+            return json.loads(self._decompressor.decompress(row[0]))
+
+        except Exception as e:
+            logger.warning(f"[SearchCache] Read failed, bypassing cache: {e}")
+            return None
+
+    def put(self, query: str, options: Dict[str, Any], response: Dict[str, Any]):
+        """写入 Tavily 原始响应"""
+        if not settings.SEARCH_CACHE_ENABLED:
+            return
+
+        key = cache_key(query, options)
+        freshness = classify_freshness(query, options)
+        ttl = settings.SEARCH_CACHE_TTL.get(freshness, settings.SEARCH_CACHE_TTL["general"])
+        now = time.time()
+        try:
+            payload = self._compressor.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache "
+                    "(key, query, freshness, payload, size, created_at, expires_at, last_accessed, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, normalize_query(query), freshness, payload, len(payload), now, now + ttl, now)
+                )
+                conn.commit()
+                self._stats[freshness]["writes"] += 1
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= EVICT_CHECK_INTERVAL:
+                    self._evict(conn)
+
+        except Exception as e:
+            logger.warning(f"[SearchCache] Write failed: {e}")
+
+    # ============================================
+    # 淘汰和清理
+    # ============================================
+
+    def _evict(self, conn: sqlite3.Connection):
+        """删除过期条目，再按 LRU 淘汰到容量以内（调用方持有锁）"""
+        self._writes_since_evict = 0
+        removed = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache").fetchone()
+        max_entries = settings.SEARCH_CACHE_MAX_ENTRIES
+        max_bytes = settings.SEARCH_CACHE_MAX_BYTES
+        if count > max_entries or total > max_bytes:
+            rows = conn.execute("SELECT key, size FROM search_cache ORDER BY last_accessed").fetchall()
+            victims = []
+            for key, size in rows:
+                if count <= max_entries and total <= max_bytes:
+                    break
+                victims.append((key,))
+                count -= 1
+                total -= size
+            conn.executemany("DELETE FROM search_cache WHERE key = ?", victims)
+            removed += len(victims)
+
+        conn.commit()
+        if removed:
+            self._evicted += removed
+            logger.info(f"[SearchCache] Evicted {removed} entries")
+
+    def purge(self, freshness: Optional[str] = None, query: Optional[str] = None,
+              expired_only: bool = False) -> int:
+        """
+        清理缓存，返回删除的条目数
+
+        Args:
+            freshness: 只清理该时效类别
+            query: 只清理该查询（规范化后匹配，不区分搜索参数）
+            expired_only: 只清理已过期的条目
+        """
+        conditions, params = [], []
+        if freshness:
+            conditions.append("freshness = ?")
+            params.append(freshness)
+        if query:
+            conditions.append("query = ?")
+            params.append(normalize_query(query))
+        if expired_only:
+            conditions.append("expires_at <= ?")
+            params.append(time.time())
+        sql = "DELETE FROM search_cache" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute(sql, params).rowcount
+            conn.commit()
+        logger.info(f"[SearchCache] Purged {removed} entries")
+        return removed
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ============================================
+    # 统计
+    # ============================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中率（本进程启动以来）和缓存占用（所有进程共享）"""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT freshness, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) "
+                "FROM search_cache GROUP BY freshness"
+            ).fetchall()
+        stored = {row[0]: {"entries": row[1], "bytes": row[2], "lifetime_hits": row[3]} for row in rows}
+
+        classes = {}
+        for name in FRESHNESS_CLASSES:
+            stats = self._stats[name]
+            lookups = stats["hits"] + stats["misses"]
+            classes[name] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else None,
+                "ttl": settings.SEARCH_CACHE_TTL.get(name),
+                **stored.get(name, {"entries": 0, "bytes": 0, "lifetime_hits": 0}),
+            }
+
+        hits = sum(s["hits"] for s in self._stats.values())
+        lookups = hits + sum(s["misses"] for s in self._stats.values())
+        return {
+            "enabled": settings.SEARCH_CACHE_ENABLED,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "entries": sum(s["entries"] for s in stored.values()),
+            "bytes": sum(s["bytes"] for s in stored.values()),
+            "max_entries": settings.SEARCH_CACHE_MAX_ENTRIES,
+            "max_bytes": settings.SEARCH_CACHE_MAX_BYTES,
+            "evicted": self._evicted,
+            "classes": classes,
+        }
+
+
+# 单例导出
+search_cache = SearchCache()
@@ -11,11 +11,13 @@
 import base64
 import logging
 import re
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 from urllib.parse import urlparse
 from loguru import logger
 
+from app.agents.tools.search.similarity import NearDuplicateIndex
+
 
 @dataclass
 class ProcessingStats:
@@ -24,6 +26,8 @@ class ProcessingStats:
     after_dedup: int = 0
     after_filter: int = 0
     after_clean: int = 0
+    after_near_dedup: int = 0
+    near_duplicate_count: int = 0  # 内容近似重复（转载、镜像站点）被移除的页面数
     final_count: int = 0
     base64_removed_count: int = 0
     truncated_count: int = 0
@@ -44,7 +48,9 @@ class SearchResultPostProcessor:
             self,
             min_score_threshold: Optional[float] = None,
             max_content_length_per_page: Optional[int] = None,
-            enable_stats: bool = False
+            enable_stats: bool = False,
+            near_duplicate_threshold: Optional[float] = None,
+            dedup_index: Optional[NearDuplicateIndex] = None
     ):
         """
         Initialize the post-processor
@@ -53,10 +59,14 @@ class SearchResultPostProcessor:
             min_score_threshold: 最低相关性分数阈值（None 表示不过滤）
             max_content_length_per_page: 每页最大内容长度（None 表示不截断）
             enable_stats: 是否启用统计信息收集
+            near_duplicate_threshold: 页面内容近似重复的相似度阈值（MinHash 估计的 Jaccard，None 表示只按 URL 去重）
+            dedup_index: 共享的近似重复索引（跨多次处理去重，如同一章节的多次搜索），None 时每次处理单独去重
         """
         self.min_score_threshold = min_score_threshold or self.DEFAULT_MIN_SCORE
         self.max_content_length_per_page = max_content_length_per_page or self.DEFAULT_MAX_LENGTH
         self.enable_stats = enable_stats
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.dedup_index = dedup_index
         self.stats = ProcessingStats() if enable_stats else None
 
     def process_results(self, results: List[Dict]) -> List[Dict]:
@@ -77,6 +87,12 @@ class SearchResultPostProcessor:
 
         cleaned_results = []
         seen_urls: Set[str] = set()
+        dedup_index = self.dedup_index
+        if dedup_index is None and self.near_duplicate_threshold:
+            dedup_index = NearDuplicateIndex(self.near_duplicate_threshold)
+
+        # 先按相关性排序，近似重复的页面中保留分数最高的一个
+        results = self._sort_results(results)
 
         for result in results:
             # 1. 去重
@@ -101,13 +117,20 @@ class SearchResultPostProcessor:
             if self.enable_stats:
                 self.stats.after_clean += 1
 
-            # 4. 截断长内容
+            # 4. 内容近似重复（不同 URL 的转载、镜像页面）
+            if dedup_index is not None and self._is_near_duplicate(cleaned_result, dedup_index):
+                continue
+
+            if self.enable_stats:
+                self.stats.after_near_dedup += 1
+
+            # 5. 截断长内容
             if self.max_content_length_per_page:
                 cleaned_result = self._truncate_content(cleaned_result)
 
             cleaned_results.append(cleaned_result)
 
-        # 5. 排序
+        # 6. 排序
         sorted_results = self._sort_results(cleaned_results)
 
         if self.enable_stats:
@@ -133,6 +156,23 @@ class SearchResultPostProcessor:
         seen_urls.add(url)
         return True
 
+    def _is_near_duplicate(self, result: Dict, dedup_index: NearDuplicateIndex) -> bool:
+        """判断页面内容是否与已保留的页面近似重复（只比较页面，按清洗后、截断前的完整内容）"""
+        if result.get("type") != "page":
+            return False
+
+        duplicate_of = dedup_index.check_and_add(
+            result.get("raw_content") or result.get("content", ""),
+            key=result.get("url")
+        )
+        if duplicate_of is None:
+            return False
+
+        logger.debug(f"移除近似重复页面: {result.get('url', 'unknown')} (与 {duplicate_of} 重复)")
+        if self.enable_stats:
+            self.stats.near_duplicate_count += 1
+        return True
+
     def _meets_quality_threshold(self, result: Dict) -> bool:
         """判断结果是否满足质量阈值"""
         if result.get("type") != "page":
@@ -261,6 +301,8 @@ class SearchResultPostProcessor:
             f"去重后={self.stats.after_dedup}, "
             f"过滤后={self.stats.after_filter}, "
             f"清洗后={self.stats.after_clean}, "
+            f"内容去重后={self.stats.after_near_dedup}, "
+            f"近似重复={self.stats.near_duplicate_count}, "
             f"最终={self.stats.final_count}, "
             f"移除base64={self.stats.base64_removed_count}, "
             f"截断={self.stats.truncated_count}"
@@ -268,4 +310,47 @@ class SearchResultPostProcessor:
 
     def get_stats(self) -> Optional[ProcessingStats]:
         """获取统计信息"""
-        return self.stats
\ No newline at end of file
+        return self.stats
+
+
+def dedupe_search_results(search_results: List[Dict], threshold: float) -> Tuple[List[Dict], int]:
+    """
+    跨多次搜索去重（同一章节的所有搜索结果）
+
+    不同查询经常返回同一页面或其转载页面；按结果顺序保留首次出现的页面，
+    之后 URL 相同或内容近似重复的页面被移除。非列表内容（搜索失败的提示文本）原样保留。
+
+    Args:
+        search_results: [{"query": str, "content": List[Dict] | str}]
+        threshold: 内容近似重复的相似度阈值
+
+    Returns:
+        (去重后的搜索结果, 移除的页面数)
+    """
+    index = NearDuplicateIndex(threshold)
+    seen_urls: Set[str] = set()
+    removed = 0
+    deduped = []
+
+    for entry in search_results:
+        content = entry.get("content")
+        if not isinstance(content, list):
+            deduped.append(entry)
+            continue
+
+        kept = []
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "page":
+                url = item.get("url")
+                if url and url in seen_urls:
+                    removed += 1
+                    continue
+                if index.check_and_add(item.get("raw_content") or item.get("content", ""), key=url) is not None:
+                    removed += 1
+                    continue
+                if url:
+                    seen_urls.add(url)
+            kept.append(item)
+        deduped.append({**entry, "content": kept})
+
+    return deduped, removed
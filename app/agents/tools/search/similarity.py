@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   similarity.py
+@Desc    :   文本 shingle 和相似度工具（查询去重、页面近似重复检测）
+
+查询 shingle 同时适用于中英文：
+- 英文 / 数字按词切分（词序无关，"market size 2024" 与 "2024 market size" 完全相同）
+- 中文按连续字符的 2-gram 切分（不依赖分词器）
+
+页面内容使用有序的 k-shingle（英文词 / 中文单字组成的连续 k 个 token）和 bottom-k MinHash：
+每个 shingle 只计算一次 64 位哈希，保留最小的 num_hashes 个作为签名，
+用签名估计两页内容的 Jaccard 相似度（转载、镜像站点的内容相似度接近 1）。
+"""
+import hashlib
+import heapq
+import re
+import unicodedata
+from typing import Any, FrozenSet, List, Optional, Tuple
+
+_PUNCTUATION = " \t\r\n.,;:!?，。；：！？、\"'“”‘’()（）[]【】"
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询：NFKC、小写、合并空白、去掉首尾标点"""
+    text = unicodedata.normalize("NFKC", query or "").lower()
+    return re.sub(r"\s+", " ", text).strip(_PUNCTUATION)
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'-][a-z0-9]+)*|[一-鿿]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """规范化文本 -> 词项列表（英文词 + 中文字符 2-gram，保留重复，用于 BM25 等词频统计）"""
+    terms: List[str] = []
+    for token in _TOKEN_PATTERN.findall(normalize_query(text)):
+        if "一" <= token[0] <= "鿿" and len(token) > 1:
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    """规范化文本 -> shingle 集合（英文词 + 中文字符 2-gram）"""
+    return frozenset(tokenize(text))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """两个 shingle 集合的 Jaccard 相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def cluster_texts(texts: List[str], threshold: float) -> List[List[int]]:
+    """
+    按 shingle 相似度贪心聚类
+
+    依次处理每个文本，与某个已有簇中任一成员的相似度达到阈值时并入该簇，否则新建一个簇。
+
+    Returns:
+        簇列表，每个簇为 texts 中的下标（保持输入顺序，首个下标为代表）
+    """
+    clusters: List[List[int]] = []
+    cluster_shingles: List[List[FrozenSet[str]]] = []
+    for idx, text in enumerate(texts):
+        current = shingles(text)
+        for members, member_shingles in zip(clusters, cluster_shingles):
+            if any(jaccard(current, other) >= threshold for other in member_shingles):
+                members.append(idx)
+                member_shingles.append(current)
+                break
+        else:
+            clusters.append([idx])
+            cluster_shingles.append([current])
+    return clusters
+
+
+# ============================================
+# 页面内容近似重复检测
+# ============================================
+
+_CONTENT_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]")
+
+# 签名大小和 shingle 长度
+DEFAULT_NUM_HASHES = 128
+DEFAULT_SHINGLE_SIZE = 5
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash_signature(text: str, num_hashes: int = DEFAULT_NUM_HASHES,
+                      shingle_size: int = DEFAULT_SHINGLE_SIZE) -> Tuple[int, ...]:
+    """
+    bottom-k MinHash 签名
+
+    Returns:
+        最小的 num_hashes 个 shingle 哈希（升序），文本过短没有 shingle 时返回空元组
+    """
+    tokens = _CONTENT_TOKEN_PATTERN.findall(normalize_query(text))
+    if not tokens:
+        return ()
+    if len(tokens) <= shingle_size:
+        hashes = {_hash64(" ".join(tokens))}
+    else:
+        hashes = {_hash64(" ".join(tokens[i:i + shingle_size])) for i in range(len(tokens) - shingle_size + 1)}
+    return tuple(heapq.nsmallest(num_hashes, hashes))
+
+
+def estimate_jaccard(a: Tuple[int, ...], b: Tuple[int, ...], num_hashes: int = DEFAULT_NUM_HASHES) -> float:
+    """根据两个 bottom-k 签名估计 Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    union = heapq.nsmallest(num_hashes, set(a) | set(b))
+    common = set(a) & set(b)
+    return sum(1 for h in union if h in common) / len(union)
+
+
+class NearDuplicateIndex:
+    """
+    近似重复内容索引
+
+    保存已接受内容的签名，新内容与任一已有内容的估计相似度达到阈值时判定为重复。
+    条目数通常只有几十（单次搜索或单个章节的页面），线性比较即可。
+    """
+
+    def __init__(self, threshold: float, num_hashes: int = DEFAULT_NUM_HASHES):
+        self.threshold = threshold
+        self.num_hashes = num_hashes
+        self._entries: List[Tuple[Tuple[int, ...], Any]] = []
+
+    def check_and_add(self, text: str, key: Any = None) -> Optional[Any]:
+        """
+        检查内容是否与已有内容近似重复，不重复时加入索引
+
+        Returns:
+            重复时返回已有内容的 key，否则返回 None（没有可比较内容的短文本总是视为不重复）
+        """
+        signature = minhash_signature(text, self.num_hashes)
+        if not signature:
+            return None
+        for existing, existing_key in self._entries:
+            if estimate_jaccard(signature, existing, self.num_hashes) >= self.threshold:
+                return existing_key if existing_key is not None else True
+        self._entries.append((signature, key))
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
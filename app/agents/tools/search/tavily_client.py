@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   tavily_client.py
+@Desc    :   Tavily 搜索 HTTP 客户端（共享连接池 + 超时 + 抖动重试）
+
+web_search 每次调用都新建 TavilyClient，每次请求都要重新建立 TLS 连接，且单次超时长达 120 秒。
+这里直接调用 Tavily REST API：
+- 连接池：进程内共享 httpx 客户端（异步 / 同步各一个），复用 keep-alive 连接
+- 超时：连接超时和读取超时分别配置（tavily_search.connect_timeout / tavily_search.timeout），按延迟目标收紧
+- 重试：超时、连接错误、429、5xx 时按指数退避 + 全抖动重试，429 优先使用 Retry-After；
+  退避期间不占用 governor 的搜索槽位
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from app.agents.execution.concurrency import governor
+from app.config import settings
+
+# 可重试的 HTTP 状态码
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TavilySearchError(Exception):
+    """Tavily 搜索失败（不可重试的错误或重试次数耗尽）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class TavilySearchClient:
+    """Tavily 搜索客户端（共享连接池）"""
+
+    def __init__(self):
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    # ============================================
+    # 连接池
+    # ============================================
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "timeout": httpx.Timeout(settings.TAVILY_TIMEOUT, connect=settings.TAVILY_CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=settings.TAVILY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TAVILY_MAX_CONNECTIONS,
+                keepalive_expiry=30.0,
+            ),
+            "headers": {"Authorization": f"Bearer {settings.TAVILY_API_KEY}"},
+            "base_url": settings.TAVILY_BASE_URL,
+        }
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # httpx 异步客户端绑定创建它的事件循环，事件循环变化时（如脚本中多次 asyncio.run）重新创建
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(**self._client_options())
+            self._async_loop = loop
+        return self._async_client
+
+    def _get_sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(**self._client_options())
+        return self._sync_client
+
+    # ============================================
+    # 请求
+    # ============================================
+
+    @staticmethod
+    def _payload(query: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        return {"query": query, **options}
+
+    @staticmethod
+    def _handle_response(response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get("Retry-After")
+            raise _RetryableError(
+                f"HTTP {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise TavilySearchError(f"Tavily search failed: HTTP {response.status_code} {detail}", response.status_code)
+        return response.json()
+
+    @staticmethod
+    def _backoff(attempt: int, error: _RetryableError) -> float:
+        """指数退避 + 全抖动（429 带 Retry-After 时以其为准）"""
+        if error.retry_after is not None:
+            return min(error.retry_after, settings.TAVILY_BACKOFF_MAX)
+        return random.uniform(0, min(settings.TAVILY_BACKOFF_MAX, settings.TAVILY_BACKOFF_BASE * 2 ** attempt))
+
+    async def search(self, query: str, **options) -> Dict[str, Any]:
+        """
+        异步搜索
+
+        Args:
+            query: 搜索词
+            **options: Tavily 搜索参数（max_results、include_images、include_raw_content 等）
+
+        Raises:
+            TavilySearchError: 不可重试的错误或重试次数耗尽
+        """
+        payload = self._payload(query, options)
+        attempts = settings.TAVILY_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                async with governor.search("tavily"):
+                    response = await self._get_async_client().post("/search", json=payload)
+                return self._handle_response(response)
+
+            except (httpx.TimeoutException, httpx.TransportError, _RetryableError) as e:
+                error = e if isinstance(e, _RetryableError) else _RetryableError(type(e).__name__)
+                if attempt + 1 >= attempts:
+                    raise TavilySearchError(f"Tavily search failed after {attempts} attempts: {error}") from e
+                delay = self._backoff(attempt, error)
+                logger.warning(
+                    f"Tavily search attempt {attempt + 1} failed after "
+                    f"{time.perf_counter() - started:.1f}s ({error}), retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    def search_sync(self, query: str, **options) -> Dict[str, Any]:
+        """同步搜索（同步节点和 Agent 的同步工具调用），行为与 search 一致"""
+        payload = self._payload(query, options)
+        attempts = settings.TAVILY_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                with governor.search_sync("tavily"):
+                    response = self._get_sync_client().post("/search", json=payload)
+                return self._handle_response(response)
+
+            except (httpx.TimeoutException, httpx.TransportError, _RetryableError) as e:
+                error = e if isinstance(e, _RetryableError) else _RetryableError(type(e).__name__)
+                if attempt + 1 >= attempts:
+                    raise TavilySearchError(f"Tavily search failed after {attempts} attempts: {error}") from e
+                delay = self._backoff(attempt, error)
+                logger.warning(
+                    f"Tavily search attempt {attempt + 1} failed after "
+                    f"{time.perf_counter() - started:.1f}s ({error}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    # ============================================
+    # 生命周期
+    # ============================================
+
+    async def close(self):
+        """关闭连接池"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+
+# 单例导出
+tavily_client = TavilySearchClient()
@@ -6,25 +6,41 @@
 @Version :   1.0
 @Contact :   pygao.1@outlook.com
 @License :   (C)Copyright 2025, GienTech Technology Co.,Ltd. All rights reserved.
-@Desc    :   文件描述
+@Desc    :   Tavily 网页搜索工具
+
+web_search 同时提供同步和异步实现：
+- invoke：同步客户端（Agent 工具调用、同步节点）
+- ainvoke：异步客户端（异步节点中不阻塞事件循环，也不占用线程池）
+- search_pages：章节写作使用的异步搜索，页面保留更长的正文，由 evidence_packer 按段落挑选
+
+两者共用 tavily_client 中的共享连接池，超时和重试由 tavily_search 配置控制。
+调用 Tavily 之前先查询持久化搜索缓存（search_cache），命中时直接使用缓存的原始响应。
 """
-from tavily import TavilyClient
+import asyncio
+from typing import Any, Dict, List
 
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
+from app.agents.tools.search.search_cache import search_cache
 from app.agents.tools.search.search_postprocessor import SearchResultPostProcessor
+from app.agents.tools.search.tavily_client import tavily_client
 from app.config import settings
 
+SEARCH_OPTIONS = dict(
+    max_results=3,
+    include_images=True,
+    include_raw_content="markdown",
+    include_image_descriptions=True,
+)
 
-@tool("web_search")
-def searcher(query: str, ):
-    """
-    user for web search
-    """
-    client = TavilyClient(api_key=settings.TAVILY_API_KEY)
 
-    response = client.search(query, max_results=3, include_images=True , include_raw_content="markdown", include_image_descriptions=True, timeout=120)
+def _clean_response(response: Dict[str, Any], max_page_chars: int = 5000):
+    """
+    整理页面和图片结果，并一次性清洗
 
-    all_results = []
+    Args:
+        max_page_chars: 页面 content 截断长度（raw_content 为其 2 倍）
+    """
+    all_results: List[Dict[str, Any]] = []
 
     # 添加页面结果
     for result in response.get("results", []):
@@ -49,10 +65,53 @@ def searcher(query: str, ):
     # 一次性清洗所有结果
     postprocessor = SearchResultPostProcessor(
         min_score_threshold=0.45,
-        max_content_length_per_page=5000,
-        enable_stats=True
+        max_content_length_per_page=max_page_chars,
+        enable_stats=True,
+        near_duplicate_threshold=settings.SEARCH_NEAR_DUPLICATE_THRESHOLD,
     )
-    cleaned_results = postprocessor.process_results(all_results)
+    return postprocessor.process_results(all_results)
+
+
+def _search(query: str):
+    """
+    user for web search
+    """
+    response = search_cache.get(query, SEARCH_OPTIONS)
+    if response is None:
+        response = tavily_client.search_sync(query, **SEARCH_OPTIONS)
+        search_cache.put(query, SEARCH_OPTIONS, response)
+
+    return _clean_response(response)
+
+
+async def _afetch(query: str) -> Dict[str, Any]:
+    response = await asyncio.to_thread(search_cache.get, query, SEARCH_OPTIONS)
+    if response is None:
+        response = await tavily_client.search(query, **SEARCH_OPTIONS)
+        await asyncio.to_thread(search_cache.put, query, SEARCH_OPTIONS, response)
+    return response
+
+
+async def _asearch(query: str):
+    """
+    user for web search
+    """
+    return _clean_response(await _afetch(query))
+
+
+async def search_pages(query: str) -> List[Dict[str, Any]]:
+    """
+    章节写作使用的搜索：与 web_search 相同，但页面保留更长的正文（writing_evidence.max_page_chars）。
+
+    web_search 作为 Agent 工具时结果直接进入对话上下文，需要较短的截断；
+    章节写作由 evidence_packer 按段落相关性挑选内容，截断只会丢掉页面后半部分的相关段落。
+    """
+    return _clean_response(await _afetch(query), max_page_chars=settings.WRITING_EVIDENCE_MAX_PAGE_CHARS)
 
-    return cleaned_results
 
+searcher = StructuredTool.from_function(
+    func=_search,
+    coroutine=_asearch,
+    name="web_search",
+    description="user for web search",
+)
@@ -1,4 +1,5 @@
 import json
+import time
 from loguru import logger
 from typing import Optional
 import asyncio
@@ -14,6 +15,10 @@ from app.curd.chats import Chats
 from app.curd.tags import Tags
 from app.curd.folders import Folders
 from app.curd.model_providers import ModelProviders
+from app.services.chat_router import chat_router
+from app.services.llm_factory import DEFAULT_OLLAMA_BASE_URL, create_chat_llm, resolve_model_name
+from app.services.ollama_warmup import ollama_warmup
+from app.services.provider_health import provider_health
 
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
@@ -22,7 +27,6 @@ from app.constants import ERROR_MESSAGES
 
 # LangChain imports for streaming chat
 from langchain_openai import ChatOpenAI
-from langchain_deepseek import ChatDeepSeek
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 
 router = APIRouter()
@@ -165,6 +169,7 @@ class StreamChatRequest(BaseModel):
     stream: bool = True
     provider_id: Optional[str] = None  # 模型供应商配置ID
     model_name: Optional[str] = None   # 模型名称（用于Ollama等需要指定具体模型的场景）
+    model_class: Optional[str] = None  # 模型类别（指定后忽略 provider_id，按延迟和错误率在用户的供应商间路由）
 
 
 def convert_messages_to_langchain(messages: dict) -> list[BaseMessage]:
@@ -207,7 +212,8 @@ async def stream_chat_response(
     chat_id: Optional[str],
     user_id: str,
     provider_id: Optional[str] = None,
-    model_name: Optional[str] = None
+    model_name: Optional[str] = None,
+    model_class: Optional[str] = None
 ):
     """流式生成聊天响应并保存到数据库"""
     try:
@@ -221,7 +227,6 @@ async def stream_chat_response(
         # 如果没有chat_id，创建新的chat
         if not chat_id:
             import uuid
-            import time
 
             is_new_chat = True
             chat_id = str(uuid.uuid4())
@@ -251,100 +256,89 @@ async def stream_chat_response(
         # 修剪历史，保留最近10轮对话
         langchain_messages = trim_langchain_messages(langchain_messages, max_rounds=10)
 
-        # 获取模型配置
-        llm_model = "qwen2.5:32b"  # 默认模型
-        llm_base_url = "http://localhost:11434/v1"  # 默认 Ollama
-        llm_api_key = "ollama"  # 默认
-        extra_kwargs = {}  # 额外参数
-
-        if provider_id:
+        # 获取模型配置（未指定供应商时使用本地 Ollama 默认配置）
+        provider = None
+        if model_class:
+            # 路由模式：首 token 前失败或超时会自动切换供应商
+            routed = await chat_router.open_stream(langchain_messages, user_id, model_class)
+            provider, llm_model = routed.provider, routed.model
+            stream_started = routed.started
+            chunks = routed.chunks()
+            yield f"data: {json.dumps({'route': {'provider_id': provider.id, 'model': llm_model, 'attempts': routed.attempts}}, ensure_ascii=False)}\n\n"
+        elif provider_id:
             # 使用 get_provider_by_id 而不是 get_provider_by_id_and_user_id
             # 因为前端的 useChat 和 useModelProviders 可能使用不同的默认 user_id
             provider = ModelProviders.get_provider_by_id(provider_id)
             if provider:
                 logger.info(f"Found provider: {provider.name}, type: {provider.provider_type}")
-
-                # 根据 provider_type 配置 LLM
-                if provider.provider_type == "ollama":
-                    llm_base_url = (provider.base_url or "http://localhost:11434") + "/v1"
-                    llm_api_key = "ollama"
-                    # Ollama 模型名从 provider_config 或 model_name 参数获取
-                    config = provider.provider_config or {}
-                    llm_model = model_name or config.get("model_name", "qwen2.5:32b")
-                elif provider.provider_type == "deepseek":
-                    llm_base_url = provider.base_url or "https://api.deepseek.com/v1"
-                    llm_api_key = provider.api_key or ""
-                    llm_model = model_name or "deepseek-chat"
-                    # DeepSeek Reasoner 模型需要特殊处理
-                    if llm_model in ["deepseek-reasoner"]:
-                        extra_kwargs["model_kwargs"] = {"stream_options": {"include_usage": True}}
-                elif provider.provider_type == "openai":
-                    llm_base_url = provider.base_url or "https://api.openai.com/v1"
-                    llm_api_key = provider.api_key or ""
-                    llm_model = model_name or "gpt-4o"
-                elif provider.provider_type == "anthropic":
-                    # Anthropic 需要使用专门的 ChatAnthropic
-                    # 这里暂时用 OpenAI 兼容模式（如果有代理）
-                    llm_base_url = provider.base_url or "https://api.anthropic.com/v1"
-                    llm_api_key = provider.api_key or ""
-                    llm_model = model_name or "claude-3-opus-20240229"
-                else:
-                    # 其他供应商使用通用 OpenAI 兼容方式
-                    if provider.base_url:
-                        llm_base_url = provider.base_url
-                    if provider.api_key:
-                        llm_api_key = provider.api_key
-                    if model_name:
-                        llm_model = model_name
-
-                logger.info(f"Configured LLM: model={llm_model}, base_url={llm_base_url}")
             else:
                 logger.warning(f"Provider not found: {provider_id}, using default config")
         else:
             logger.info("No provider_id specified, using default Ollama config")
 
-        # 配置LLM
-        # 对于 DeepSeek 使用专门的 ChatDeepSeek 以获得 reasoning_content 支持
-        if provider and provider.provider_type == "deepseek":
-            llm = ChatDeepSeek(
-                model=llm_model,
-                api_key=llm_api_key,
-                streaming=True,
-            )
-            logger.info(f"Using ChatDeepSeek for model={llm_model}")
-        else:
-            llm = ChatOpenAI(
-                model=llm_model,
-                base_url=llm_base_url,
-                api_key=llm_api_key,
-                temperature=0.7,
-                streaming=True,
-                **extra_kwargs
-            )
+        if not model_class:
+            llm_model = resolve_model_name(provider, model_name)
+            llm = create_chat_llm(provider, llm_model)
+            logger.info(f"Configured LLM: model={llm_model}")
+            stream_started = time.perf_counter()
+            chunks = llm.astream(langchain_messages)
+
+        # 记录 Ollama 模型使用情况（高频模型由后台延长 keep_alive）
+        if provider is None or provider.provider_type == "ollama":
+            ollama_warmup.touch(provider.base_url if provider and provider.base_url else DEFAULT_OLLAMA_BASE_URL, llm_model)
 
         # 流式调用LLM
         accumulated_content = ""
         accumulated_reasoning = ""
-        async for chunk in llm.astream(langchain_messages):
-            # 检查 reasoning_content (DeepSeek Reasoner 推理模型的思考过程)
-            # LangChain 会将非标准字段放到 additional_kwargs 中
-            reasoning_content = chunk.additional_kwargs.get('reasoning_content', '')
-            if reasoning_content:
-                accumulated_reasoning += reasoning_content
-                # 发送思考过程
-                yield f"data: {json.dumps({'reasoning_content': reasoning_content}, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.01)
-
-            # 处理正式内容
-            if chunk.content:
-                accumulated_content += chunk.content
-                # 发送SSE格式的数据
-                yield f"data: {json.dumps({'content': chunk.content}, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.01)
+        first_token_at = None
+        token_chunks = 0
+        try:
+            async for chunk in chunks:
+                # 检查 reasoning_content (DeepSeek Reasoner 推理模型的思考过程)
+                # LangChain 会将非标准字段放到 additional_kwargs 中
+                reasoning_content = chunk.additional_kwargs.get('reasoning_content', '')
+                if reasoning_content or chunk.content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    token_chunks += 1
+                if reasoning_content:
+                    accumulated_reasoning += reasoning_content
+                    # 发送思考过程
+                    yield f"data: {json.dumps({'reasoning_content': reasoning_content}, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(0.01)
+
+                # 处理正式内容
+                if chunk.content:
+                    accumulated_content += chunk.content
+                    # 发送SSE格式的数据
+                    yield f"data: {json.dumps({'content': chunk.content}, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(0.01)
+        except Exception as e:
+            # 流中途失败同样计入失败样本，避免只统计成功的流而高估成功率
+            if provider:
+                provider_health.record(
+                    provider.id,
+                    llm_model,
+                    success=False,
+                    error=str(e) or type(e).__name__,
+                    provider_type=provider.provider_type
+                )
+            raise
+
+        # 上报真实流量的延迟样本（供健康监控和路由使用）
+        if provider and first_token_at is not None:
+            generation_time = time.perf_counter() - first_token_at
+            provider_health.record(
+                provider.id,
+                llm_model,
+                success=True,
+                ttft=first_token_at - stream_started,
+                tokens_per_second=(token_chunks - 1) / generation_time if token_chunks > 1 and generation_time > 0 else None,
+                provider_type=provider.provider_type
+            )
 
         # 保存用户消息和AI响应到数据库
         import uuid
-        import time
 
         user_message_id = str(uuid.uuid4())
         ai_message_id = str(uuid.uuid4())
@@ -446,7 +440,8 @@ async def chat_stream_endpoint(request: StreamChatRequest):
                 request.chat_id,
                 request.user_id,
                 request.provider_id,
-                request.model_name
+                request.model_name,
+                request.model_class
             ),
             media_type="text/event-stream",
             headers={
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   documents.py
+@Desc    :   文档写作运行接口 - 启动写作、查询运行状态、从失败处恢复、订阅实时进度
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from app.schemas.documents import DocumentRunCreate, DocumentRunStatus
+from app.agents.execution.concurrency import governor
+from app.agents.execution.graph_registry import graph_registry
+from app.agents.execution.progress import run_events
+from app.agents.tools.search.search_cache import FRESHNESS_CLASSES, search_cache
+from app.agents.tools.search.evidence_store import evidence_store
+from app.services.document_writing import document_writing, WritingRunConflictError
+from app.config import settings
+
+router = APIRouter()
+
+
+@router.get("/concurrency")
+async def get_concurrency_stats():
+    """获取 LLM / 搜索并发槽位的使用和排队统计"""
+    return governor.get_stats()
+
+
+@router.get("/graphs")
+async def get_graph_registry_stats():
+    """获取 publisher 编译图的编译耗时和缓存命中统计"""
+    return graph_registry.get_stats()
+
+
+@router.get("/search-cache")
+async def get_search_cache_stats():
+    """获取持久化搜索缓存的命中率和占用统计"""
+    return await asyncio.to_thread(search_cache.get_stats)
+
+
+@router.delete("/search-cache")
+async def purge_search_cache(
+    freshness: Optional[str] = Query(None, description="只清理该时效类别（realtime / news / general）"),
+    query: Optional[str] = Query(None, description="只清理该查询"),
+    expired_only: bool = Query(False, description="只清理已过期的条目")
+):
+    """清理持久化搜索缓存，返回删除的条目数"""
+    if freshness and freshness not in FRESHNESS_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Unknown freshness class: {freshness}")
+    removed = await asyncio.to_thread(search_cache.purge, freshness, query, expired_only)
+    return {"removed": removed}
+
+
+@router.get("/evidence")
+async def get_evidence_stats():
+    """获取运行中各报告素材库的页面数、查询数统计"""
+    return {"enabled": settings.EVIDENCE_STORE_ENABLED, "reports": evidence_store.get_stats()}
+
+
+@router.post("/{document_id}/run", response_model=DocumentRunStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_document_run(
+    document_id: str,
+    run_data: DocumentRunCreate,
+    llm_limit: Optional[int] = Query(None, ge=1),
+    search_limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    按已确认的大纲启动写作（后台执行）
+
+    运行以 document_id 为 thread 持久化 checkpoint，可通过 GET /{document_id}/run 查询状态、
+    GET /{document_id}/events 订阅实时进度，失败或中止后通过 POST /{document_id}/resume 继续。
+
+    Args:
+        llm_limit / search_limit: 覆盖该文档的 LLM / 搜索并发上限
+    """
+    inputs = {
+        "chat_id": run_data.chat_id or document_id,
+        "document_outline": run_data.document_outline,
+    }
+    try:
+        return await document_writing.start(document_id, inputs, llm_limit, search_limit)
+    except WritingRunConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Document run is already {e.status}, use resume to continue"
+        )
+
+
+@router.get("/{document_id}/run", response_model=DocumentRunStatus)
+async def get_document_run(document_id: str):
+    """获取文档写作运行状态（基于持久化 checkpoint，进程重启后仍可查询）"""
+    run = await document_writing.get_status(document_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Document run not found")
+    return run
+
+
+@router.post("/{document_id}/resume", response_model=DocumentRunStatus, status_code=status.HTTP_202_ACCEPTED)
+async def resume_document_run(
+    document_id: str,
+    llm_limit: Optional[int] = Query(None, ge=1),
+    search_limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    从最近完成的 super-step 恢复写作
+
+    已完成的章节（包括失败步骤中已完成的并发章节）不会重新生成，
+    恢复在后台执行，可通过 GET /{document_id}/run 查询进度。
+
+    Args:
+        llm_limit / search_limit: 覆盖该文档的 LLM / 搜索并发上限
+    """
+    try:
+        run = await document_writing.resume(document_id, llm_limit, search_limit)
+    except WritingRunConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Document run is already {e.status}"
+        )
+
+    if run is None:
+        raise HTTPException(status_code=404, detail="Document run not found")
+    return run
+
+
+@router.post("/{document_id}/abort", response_model=bool)
+async def abort_document_run(document_id: str):
+    """中止运行中的写作，进行中的 LLM / 搜索调用随之取消（已保存的进度可通过 resume 继续）"""
+    if not document_writing.abort(document_id):
+        raise HTTPException(status_code=404, detail="No running document run")
+    return True
+
+
+@router.get("/{document_id}/events")
+async def stream_document_events(
+    document_id: str,
+    last_event_id: Optional[int] = Query(None, ge=0),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    订阅文档写作的实时进度（SSE）
+
+    先补齐当前运行已缓存的事件，再推送实时事件，收到 run_completed / run_failed / run_aborted 后结束。
+    断线重连时浏览器会自动携带 Last-Event-ID，只补发之后的事件。
+    事件通道在 POST /{document_id}/run 或 /resume 返回之前打开，调用返回后立即订阅不会漏掉事件；
+    本进程中没有事件通道的运行（进程重启后、超过保留时长）只推送一条 run_status 事件（当前状态）后结束。
+
+    Args:
+        last_event_id: 从该事件之后开始（也可通过 Last-Event-ID 请求头指定）
+    """
+    if not run_events.has_run(document_id):
+        run = await document_writing.get_status(document_id)
+        if run is None:
+            raise HTTPException(status_code=404, detail="No progress events for this document")
+        payload = json.dumps(run, ensure_ascii=False, default=str)
+        return StreamingResponse(
+            iter([f"event: run_status\ndata: {payload}\n\n"]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+
+    async def event_stream():
+        async for record in run_events.subscribe(document_id, last_event_id):
+            if record is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield record.to_sse()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -9,6 +9,11 @@ from loguru import logger
 import httpx
 
 from app.curd.model_providers import ModelProviders
+from app.curd.model_catalog import ModelCatalogs
+from app.services.model_catalog import model_catalog
+from app.services.provider_health import provider_health
+from app.services.ollama_warmup import ollama_warmup
+from app.services.llm_factory import DEFAULT_OLLAMA_BASE_URL, resolve_model_name
 from app.schemas.model_providers import (
     ModelProviderResponse,
     ModelProviderCreateForm,
@@ -22,6 +27,8 @@ from app.schemas.model_providers import (
     ProviderType,
     ModelType,
     AvailableModelsResponse,
+    ProviderHealthStats,
+    OllamaModelLoadState,
 )
 
 router = APIRouter()
@@ -61,6 +68,18 @@ async def get_user_providers(
         )
 
 
+@router.get("/health", response_model=List[ProviderHealthStats])
+async def get_providers_health(user_id: str = "user-123"):
+    """
+    获取用户所有供应商的健康统计
+
+    按供应商/模型返回滚动窗口内的成功率、TTFT 分位数（毫秒）和 tokens/s 分位数，
+    样本来自后台探测和真实聊天流量。
+    """
+    providers = ModelProviders.get_providers_by_user_id(user_id)
+    return provider_health.get_all_stats([p.id for p in providers])
+
+
 @router.get("/{provider_id}", response_model=ModelProviderResponse)
 async def get_provider(provider_id: str, user_id: str = "user-123"):
     """获取指定的供应商配置"""
@@ -144,6 +163,9 @@ async def update_provider(
             detail="Provider not found"
         )
 
+    # 凭据或端点可能已变化，后台重新同步模型目录
+    model_catalog.schedule_refresh(provider)
+
     return ModelProviderResponse.from_model(provider)
 
 
@@ -162,6 +184,8 @@ async def update_ollama_provider(
             detail="Ollama provider not found"
         )
 
+    model_catalog.schedule_refresh(provider)
+
     return ModelProviderResponse.from_model(provider)
 
 
@@ -206,6 +230,8 @@ async def delete_provider(provider_id: str, user_id: str = "user-123"):
             detail="Provider not found"
         )
 
+    ModelCatalogs.delete_models(provider_id)
+
     return True
 
 
@@ -253,18 +279,20 @@ async def test_saved_provider(provider_id: str, user_id: str = "user-123"):
             result = await _test_ollama_connection(
                 provider.base_url or "http://localhost:11434"
             )
-        else:
-            # TODO: 实现其他供应商的连接测试
-            result = ConnectionTestResponse(
-                success=True,
-                message="Connection test not implemented for this provider yet"
-            )
 
-        # 更新连接状态
-        status_value = "connected" if result.success else "failed"
-        ModelProviders.update_connection_status(provider_id, status_value)
+            # 更新连接状态
+            status_value = "connected" if result.success else "failed"
+            ModelProviders.update_connection_status(provider_id, status_value)
+            return result
 
-        return result
+        # 其他供应商：发送最小请求探测（同时记录延迟样本并更新连接状态）
+        sample = await provider_health.probe(provider)
+        if sample.success:
+            return ConnectionTestResponse(
+                success=True,
+                message=f"Connected. TTFT {sample.ttft * 1000:.0f} ms"
+            )
+        return ConnectionTestResponse(success=False, message=sample.error or "Probe failed")
 
     except Exception as e:
         logger.exception(f"Connection test failed: {e}")
@@ -277,20 +305,43 @@ async def test_saved_provider(provider_id: str, user_id: str = "user-123"):
 
 # ===================== Available Models Endpoints =====================
 
+@router.get("/{provider_id}/health", response_model=List[ProviderHealthStats])
+async def get_provider_health(provider_id: str, user_id: str = "user-123", probe: bool = False):
+    """
+    获取单个供应商的健康统计
+
+    Args:
+        probe: 是否先立即探测一次
+    """
+    provider = ModelProviders.get_provider_by_id_and_user_id(provider_id, user_id)
+
+    if not provider:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Provider not found"
+        )
+
+    if probe:
+        await provider_health.probe(provider)
+
+    return provider_health.get_stats(provider_id)
+
+
 @router.get("/{provider_id}/models", response_model=AvailableModelsResponse)
-async def get_available_models(provider_id: str, user_id: str = "user-123"):
+async def get_available_models(
+    provider_id: str,
+    user_id: str = "user-123",
+    refresh: bool = False
+):
     """
     获取指定供应商的可用模型列表
 
-    从供应商 API 动态获取可用模型：
-    - OpenAI: GET https://api.openai.com/v1/models
-    - DeepSeek: GET https://api.deepseek.com/models
-    - Anthropic: 硬编码列表
-    - Ollama: GET {base_url}/api/tags
-    - 等...
+    从模型目录（model_catalog 表）读取，目录由后台任务按供应商 TTL 从厂商 API 同步：
+    - 首次访问时同步拉取一次
+    - 超过 TTL 时直接返回现有列表并在后台刷新（is_stale=true）
+    - 厂商 API 不可用时返回上一次成功获取的列表
+    - refresh=true 时强制从厂商 API 重新拉取
     """
-    from app.services.model_fetcher import model_fetcher
-
     # 获取供应商配置
     provider = ModelProviders.get_provider_by_id_and_user_id(provider_id, user_id)
 
@@ -300,15 +351,7 @@ async def get_available_models(provider_id: str, user_id: str = "user-123"):
             detail="Provider not found"
         )
 
-    # 调用模型获取服务
-    result = await model_fetcher.fetch_models(
-        provider_type=provider.provider_type,
-        api_key=provider.api_key,
-        base_url=provider.base_url,
-        provider_config=provider.provider_config
-    )
-
-    return result
+    return await model_catalog.get_models(provider, force_refresh=refresh)
 
 
 # ===================== Ollama-specific Endpoints =====================
@@ -376,6 +419,59 @@ async def detect_ollama_models(base_url: str = "http://localhost:11434"):
         )
 
 
+def _get_ollama_provider(provider_id: str, user_id: str):
+    provider = ModelProviders.get_provider_by_id_and_user_id(provider_id, user_id)
+
+    if not provider or provider.provider_type != ProviderType.OLLAMA.value:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ollama provider not found"
+        )
+    return provider
+
+
+@router.post("/ollama/{provider_id}/preload", response_model=OllamaModelLoadState)
+async def preload_ollama_model(
+    provider_id: str,
+    user_id: str = "user-123",
+    model_name: Optional[str] = None,
+    keep_alive: Optional[str] = None
+):
+    """
+    预加载 Ollama 模型（等待加载完成后返回状态）
+
+    Args:
+        model_name: 要加载的模型（默认为供应商配置的 model_name）
+        keep_alive: 常驻时长（如 "10m"、"-1"），默认按使用频率选择
+    """
+    provider = _get_ollama_provider(provider_id, user_id)
+    if keep_alive:
+        return await ollama_warmup.preload(
+            provider.base_url or DEFAULT_OLLAMA_BASE_URL, resolve_model_name(provider, model_name), keep_alive
+        )
+    return await ollama_warmup.preload_provider(provider, model_name)
+
+
+@router.post("/ollama/{provider_id}/unload", response_model=bool)
+async def unload_ollama_model(
+    provider_id: str,
+    user_id: str = "user-123",
+    model_name: Optional[str] = None
+):
+    """立即卸载 Ollama 模型，释放内存/显存"""
+    provider = _get_ollama_provider(provider_id, user_id)
+    return await ollama_warmup.unload(
+        provider.base_url or DEFAULT_OLLAMA_BASE_URL, resolve_model_name(provider, model_name)
+    )
+
+
+@router.get("/ollama/{provider_id}/load-state", response_model=List[OllamaModelLoadState])
+async def get_ollama_load_state(provider_id: str, user_id: str = "user-123"):
+    """获取 Ollama 服务上各模型的加载状态（包括当前常驻内存的模型）"""
+    provider = _get_ollama_provider(provider_id, user_id)
+    return await ollama_warmup.get_status(provider.base_url or DEFAULT_OLLAMA_BASE_URL)
+
+
 # ===================== Helper Functions =====================
 
 async def _test_ollama_connection(base_url: str) -> ConnectionTestResponse:
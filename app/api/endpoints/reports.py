@@ -8,7 +8,10 @@
 @License :   (C)Copyright 2025, GienTech Technology Co.,Ltd. All rights reserved.
 @Desc    :   文件描述
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import List, Optional
 
 from app.schemas.reports import (
@@ -18,13 +21,20 @@ from app.schemas.reports import (
     ReportListItem,
     ReportVersionResponse,
     ReportVersionDetail,
+    ReportVersionDiffResponse,
+    ReportExportResponse,
     VersionRollbackRequest,
     ReportSessionCreate,
     ReportSessionResponse,
-    OutlineUpdateRequest
+    OutlineUpdateRequest,
+    ReportChapterItem,
+    ChapterUpdateRequest
 )
-from app.curd.reports import Reports, ReportVersions
+from app.curd.reports import Reports, ReportVersions, ReportVersionConflictError
 from app.models.reports import ReportStatus
+from app.database.minio_db import get_minio_client
+from app.services.report_diff import diff_versions, GRANULARITIES, FORMATS
+from app.services.report_export import report_exporter, EXPORT_FORMATS
 
 router = APIRouter()
 
@@ -76,6 +86,33 @@ async def get_report(
     return report
 
 
+@router.get("/{report_id}/content")
+async def stream_report_content(
+    report_id: str,
+    user_id: str = "user-123"
+):
+    """
+    流式获取报告正文（text/markdown）
+
+    按章节顺序输出，存储在MinIO中的章节块直接从对象存储流式转发，不在内存中组装完整正文
+    """
+    segments = Reports.get_content_segments(report_id, user_id)
+
+    if segments is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    def iter_content():
+        minio = get_minio_client()
+        for kind, value in segments:
+            if kind == "object":
+                yield from minio.stream_object(value)
+            else:
+                yield value.encode("utf-8")
+
+    # 同步生成器由Starlette在线程池中迭代，不阻塞事件循环
+    return StreamingResponse(iter_content(), media_type="text/markdown; charset=utf-8")
+
+
 @router.get("/", response_model=List[ReportListItem])
 async def list_reports(
     user_id: str = "user-123",
@@ -114,20 +151,25 @@ async def update_report(
     - 自动创建版本快照
     - 用户编辑会标记is_manually_edited=True
     - 支持change_summary记录变更说明
+    - 传入expected_version时，版本已被其他编辑更新则返回409
     """
-    report = Reports.update_report(
-        report_id=report_id,
-        user_id=user_id,
-        title=report_update.title,
-        content=report_update.content,
-        description=report_update.description,
-        outline=report_update.outline,
-        status=ReportStatus(report_update.status) if report_update.status else None,
-        category=report_update.category,
-        tags=report_update.tags,
-        change_summary=report_update.change_summary,
-        changed_by="user"
-    )
+    try:
+        report = Reports.update_report(
+            report_id=report_id,
+            user_id=user_id,
+            title=report_update.title,
+            content=report_update.content,
+            description=report_update.description,
+            outline=report_update.outline,
+            status=ReportStatus(report_update.status) if report_update.status else None,
+            category=report_update.category,
+            tags=report_update.tags,
+            change_summary=report_update.change_summary,
+            changed_by="user",
+            expected_version=report_update.expected_version
+        )
+    except ReportVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     if not report:
         raise HTTPException(status_code=404, detail="Report not found or update failed")
@@ -172,27 +214,83 @@ async def delete_report(
         raise HTTPException(status_code=404, detail="Report not found")
 
 
+# ==================== 章节级编辑 ====================
+
+@router.get("/{report_id}/chapters", response_model=List[ReportChapterItem])
+async def get_report_chapters(
+    report_id: str,
+    user_id: str = "user-123"
+):
+    """
+    获取报告的章节清单
+
+    返回每个章节的key、标题、内容哈希和字数，不包含正文
+    """
+    chapters = Reports.get_chapters(report_id, user_id)
+
+    if chapters is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return chapters
+
+
+@router.put("/{report_id}/chapters/{chapter_key}", response_model=ReportResponse)
+async def update_report_chapter(
+    report_id: str,
+    chapter_key: str,
+    chapter_update: ChapterUpdateRequest,
+    user_id: str = "user-123"
+):
+    """
+    重写单个章节
+
+    特性：
+    - 只写入该章节的内容块，其余章节不会被重写
+    - 创建CHAPTER_REWRITTEN版本快照
+    - 传入expected_version时，版本已被其他编辑更新则返回409
+    """
+    try:
+        report = Reports.update_chapter(
+            report_id=report_id,
+            user_id=user_id,
+            chapter_key=chapter_key,
+            content=chapter_update.content,
+            title=chapter_update.title,
+            change_summary=chapter_update.change_summary,
+            changed_by="user",
+            expected_version=chapter_update.expected_version
+        )
+    except ReportVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if not report:
+        raise HTTPException(status_code=404, detail="Report or chapter not found")
+
+    return report
+
+
 # ==================== 版本管理操作 ====================
 
 @router.get("/{report_id}/versions", response_model=List[ReportVersionResponse])
 async def get_report_versions(
     report_id: str,
     user_id: str = "user-123",
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=200),
+    before_version: Optional[int] = Query(None, ge=1, description="分页游标：上一页最后一条的版本号")
 ):
     """
     获取报告的版本历史列表
 
     返回：
-    - 版本号、变更类型、变更人、时间等元数据
-    - 不包含完整content（节省带宽）
+    - 版本号、变更类型、变更人、时间、字数等元数据
+    - 不包含content/outline快照（节省带宽），查看具体版本时再获取
+    - 按版本号倒序，使用before_version分页
     """
-    # 验证权限
-    report = Reports.get_report_by_id_and_user_id(report_id, user_id)
-    if not report:
+    # 验证权限（不加载报告正文）
+    if not Reports.is_report_owner(report_id, user_id):
         raise HTTPException(status_code=404, detail="Report not found")
 
-    versions = ReportVersions.get_versions_by_report_id(report_id, limit)
+    versions = ReportVersions.get_versions_by_report_id(report_id, limit, before_version)
     return versions
 
 
@@ -221,6 +319,88 @@ async def get_version_detail(
     return version
 
 
+@router.get("/{report_id}/versions/{from_version}/diff/{to_version}", response_model=ReportVersionDiffResponse)
+async def get_version_diff(
+    report_id: str,
+    from_version: int,
+    to_version: int,
+    user_id: str = "user-123",
+    granularity: str = Query("line", description="比较粒度: line/paragraph"),
+    format: str = Query("json", description="输出格式: json/unified"),
+    context: int = Query(3, ge=0, le=20, description="unified格式的上下文行数")
+):
+    """
+    比较两个版本的差异（服务端计算）
+
+    特性：
+    - 内容未变的章节不读取、不比较，大文档只计算被修改的章节
+    - json返回按章节组织的结构化操作，unified返回unified diff文本
+    - 结果按版本对缓存
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {GRANULARITIES}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {FORMATS}")
+
+    if not Reports.is_report_owner(report_id, user_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
+        diff = await asyncio.to_thread(
+            diff_versions, report_id, from_version, to_version, granularity, format, context
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to diff versions: {e}")
+
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    if format == "unified":
+        return PlainTextResponse(diff, media_type="text/x-diff")
+    return diff
+
+
+@router.get("/{report_id}/versions/{version_number}/export/{export_format}", response_model=ReportExportResponse)
+async def export_version(
+    report_id: str,
+    version_number: int,
+    export_format: str,
+    user_id: str = "user-123"
+):
+    """
+    导出指定版本（html/pdf/docx）
+
+    特性：
+    - 产物按（报告, 版本, 格式）存储在MinIO，已导出的直接返回下载链接
+    - 渲染在独立进程池中执行，不阻塞API
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {tuple(EXPORT_FORMATS)}")
+
+    if not Reports.is_report_owner(report_id, user_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
+        artifact = await report_exporter.export(report_id, version_number, export_format)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=f"Export renderer not installed: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export report: {e}")
+
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    return ReportExportResponse(
+        report_id=report_id,
+        version_number=version_number,
+        format=export_format,
+        url=artifact["url"],
+        size=artifact["size"],
+        content_type=artifact["content_type"],
+        cached=artifact["cached"]
+    )
+
+
 @router.post("/{report_id}/rollback", response_model=ReportResponse)
 async def rollback_to_version(
     report_id: str,
@@ -235,11 +415,15 @@ async def rollback_to_version(
     - 创建新版本（不是真删除）
     - 保留完整历史记录
     """
-    report = ReportVersions.rollback_to_version(
-        report_id=report_id,
-        user_id=user_id,
-        version_number=rollback_request.version_number
-    )
+    try:
+        report = ReportVersions.rollback_to_version(
+            report_id=report_id,
+            user_id=user_id,
+            version_number=rollback_request.version_number,
+            expected_version=rollback_request.expected_version
+        )
+    except ReportVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     if not report:
         raise HTTPException(status_code=404, detail="Rollback failed")
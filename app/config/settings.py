@@ -7,7 +7,7 @@
 """
 import os
 import yaml
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -152,6 +152,434 @@ class Settings(BaseSettings):
         """数据库连接回收时间（秒）"""
         return self._yaml_config.get('database', {}).get('pool', {}).get('pool_recycle', 3600)
 
+    # ==================== 报告存储配置（从 yaml）====================
+    @property
+    def REPORT_CONTENT_CACHE_SIZE(self) -> int:
+        """组装后报告内容的缓存条目数（按 report_id + 版本号缓存）"""
+        return self._yaml_config.get('reports', {}).get('content_cache', {}).get('max_entries', 128)
+
+    @property
+    def REPORT_DIFF_CACHE_SIZE(self) -> int:
+        """版本差异结果的缓存条目数（按 report_id + 版本对缓存）"""
+        return self._yaml_config.get('reports', {}).get('diff_cache', {}).get('max_entries', 64)
+
+    @property
+    def REPORT_OFFLOAD_ENABLED(self) -> bool:
+        """是否将较大的章节块正文存储到 MinIO（数据库只保留对象指针和大小）"""
+        return self._yaml_config.get('reports', {}).get('offload', {}).get('enabled', False)
+
+    @property
+    def REPORT_OFFLOAD_MIN_BYTES(self) -> int:
+        """章节块正文达到该字节数时存储到 MinIO"""
+        return self._yaml_config.get('reports', {}).get('offload', {}).get('min_bytes', 32768)
+
+    @property
+    def REPORT_EXPORT_WORKERS(self) -> int:
+        """报告导出渲染进程池大小"""
+        return self._yaml_config.get('reports', {}).get('export', {}).get('workers', 2)
+
+    @property
+    def REPORT_EXPORT_URL_EXPIRES(self) -> int:
+        """导出文件预签名下载链接有效期（秒）"""
+        return self._yaml_config.get('reports', {}).get('export', {}).get('url_expires', 3600)
+
+    # ==================== 模型目录配置（从 yaml）====================
+    @property
+    def MODEL_CATALOG_REFRESH_INTERVAL(self) -> int:
+        """模型目录后台刷新任务的检查间隔（秒）"""
+        return self._yaml_config.get('model_catalog', {}).get('refresh_interval', 60)
+
+    @property
+    def MODEL_CATALOG_DEFAULT_TTL(self) -> int:
+        """模型目录默认 TTL（秒）"""
+        return self._yaml_config.get('model_catalog', {}).get('default_ttl', 21600)
+
+    @property
+    def MODEL_CATALOG_TTL(self) -> Dict[str, int]:
+        """按供应商类型覆盖的模型目录 TTL（秒）"""
+        return self._yaml_config.get('model_catalog', {}).get('ttl', {'ollama': 300, 'anthropic': 86400})
+
+    @property
+    def MODEL_CATALOG_REFRESH_CONCURRENCY(self) -> int:
+        """后台刷新时同时请求的供应商数量"""
+        return self._yaml_config.get('model_catalog', {}).get('refresh_concurrency', 4)
+
+    # ==================== 供应商健康监控配置（从 yaml）====================
+    @property
+    def PROVIDER_HEALTH_ENABLED(self) -> bool:
+        """是否启用后台健康探测"""
+        return self._yaml_config.get('provider_health', {}).get('enabled', True)
+
+    @property
+    def PROVIDER_HEALTH_INTERVAL(self) -> int:
+        """健康探测间隔（秒）"""
+        return self._yaml_config.get('provider_health', {}).get('interval', 300)
+
+    @property
+    def PROVIDER_HEALTH_PROBE_TIMEOUT(self) -> int:
+        """单次探测超时（秒）"""
+        return self._yaml_config.get('provider_health', {}).get('probe_timeout', 30)
+
+    @property
+    def PROVIDER_HEALTH_CONCURRENCY(self) -> int:
+        """同时探测的供应商数量"""
+        return self._yaml_config.get('provider_health', {}).get('concurrency', 4)
+
+    @property
+    def PROVIDER_HEALTH_WINDOW_SIZE(self) -> int:
+        """每个供应商/模型保留的最大样本数"""
+        return self._yaml_config.get('provider_health', {}).get('window_size', 100)
+
+    @property
+    def PROVIDER_HEALTH_WINDOW_SECONDS(self) -> int:
+        """统计滚动窗口时长（秒）"""
+        return self._yaml_config.get('provider_health', {}).get('window_seconds', 3600)
+
+    # ==================== Ollama 预加载配置（从 yaml）====================
+    @property
+    def OLLAMA_PRELOAD_ON_STARTUP(self) -> bool:
+        """启动时是否预加载所有启用的 Ollama 供应商模型"""
+        return self._yaml_config.get('ollama_warmup', {}).get('preload_on_startup', True)
+
+    @property
+    def OLLAMA_KEEP_ALIVE(self) -> str:
+        """普通模型的 keep_alive（Ollama 时长格式，如 5m）"""
+        return self._yaml_config.get('ollama_warmup', {}).get('keep_alive', '5m')
+
+    @property
+    def OLLAMA_HOT_KEEP_ALIVE(self) -> str:
+        """高频使用模型的 keep_alive"""
+        return self._yaml_config.get('ollama_warmup', {}).get('hot_keep_alive', '30m')
+
+    @property
+    def OLLAMA_HOT_THRESHOLD(self) -> int:
+        """统计窗口内使用次数达到该值即视为高频模型"""
+        return self._yaml_config.get('ollama_warmup', {}).get('hot_threshold', 3)
+
+    @property
+    def OLLAMA_HOT_WINDOW(self) -> int:
+        """高频统计窗口（秒）"""
+        return self._yaml_config.get('ollama_warmup', {}).get('hot_window', 1800)
+
+    @property
+    def OLLAMA_KEEP_ALIVE_INTERVAL(self) -> int:
+        """后台续期高频模型的检查间隔（秒）"""
+        return self._yaml_config.get('ollama_warmup', {}).get('refresh_interval', 120)
+
+    @property
+    def OLLAMA_LOAD_TIMEOUT(self) -> int:
+        """单次模型加载超时（秒）"""
+        return self._yaml_config.get('ollama_warmup', {}).get('load_timeout', 300)
+
+    # ==================== 聊天路由配置（从 yaml）====================
+    @property
+    def CHAT_ROUTING_TTFT_DEADLINE(self) -> float:
+        """首 token 截止时间（秒），超时未出 token 则切换到下一个供应商"""
+        return self._yaml_config.get('chat_routing', {}).get('ttft_deadline', 10)
+
+    @property
+    def CHAT_ROUTING_MAX_ATTEMPTS(self) -> int:
+        """单次请求最多尝试的供应商数量"""
+        return self._yaml_config.get('chat_routing', {}).get('max_attempts', 3)
+
+    @property
+    def CHAT_MODEL_CLASSES(self) -> Dict[str, Dict[str, str]]:
+        """模型类别 -> {供应商类型: 模型名称}"""
+        return self._yaml_config.get('chat_routing', {}).get('model_classes', {
+            'fast': {'deepseek': 'deepseek-chat', 'openai': 'gpt-4o-mini', 'ollama': 'qwen2.5:7b'},
+            'standard': {'deepseek': 'deepseek-chat', 'openai': 'gpt-4o', 'ollama': 'qwen2.5:32b'},
+            'reasoning': {'deepseek': 'deepseek-reasoner', 'openai': 'o1-mini'},
+        })
+
+    # ==================== 写作图 Checkpoint 配置（从 yaml）====================
+    @property
+    def WRITING_CHECKPOINT_BACKEND(self) -> str:
+        """写作主图 checkpointer 后端：sqlite（本地）/ mysql（生产）/ memory（不持久化）"""
+        return self._yaml_config.get('writing_checkpoint', {}).get('backend', 'sqlite')
+
+    @property
+    def WRITING_CHECKPOINT_SQLITE_PATH(self) -> str:
+        """SQLite checkpoint 文件路径"""
+        return self._yaml_config.get('writing_checkpoint', {}).get('sqlite_path', 'data/writing_checkpoints.db')
+
+    @property
+    def WRITING_CHECKPOINT_MYSQL_URL(self) -> str:
+        """MySQL checkpoint 连接串（默认复用 DATABASE_URL，去掉 SQLAlchemy 驱动后缀）"""
+        url = self._yaml_config.get('writing_checkpoint', {}).get('mysql_url')
+        if url:
+            return url
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        return f"{scheme.split('+')[0]}://{rest}"
+
+    @property
+    def WRITING_RECURSION_LIMIT(self) -> int:
+        """写作主图的递归上限（super-step 数）"""
+        return self._yaml_config.get('writing_checkpoint', {}).get('recursion_limit', 100)
+
+    # ==================== 写作并发控制配置（从 yaml）====================
+    @property
+    def LLM_CONCURRENCY(self) -> Dict[str, int]:
+        """LLM 调用的全局并发上限（按供应商，default 为未配置供应商的上限）"""
+        return {'default': 8, **self._yaml_config.get('concurrency', {}).get('llm', {})}
+
+    @property
+    def SEARCH_CONCURRENCY(self) -> Dict[str, int]:
+        """搜索调用的全局并发上限（按搜索供应商）"""
+        return {'default': 8, **self._yaml_config.get('concurrency', {}).get('search', {})}
+
+    @property
+    def DOCUMENT_LLM_CONCURRENCY(self) -> int:
+        """单个文档运行内的 LLM 并发上限"""
+        return self._yaml_config.get('concurrency', {}).get('per_document', {}).get('llm', 4)
+
+    @property
+    def DOCUMENT_SEARCH_CONCURRENCY(self) -> int:
+        """单个文档运行内的搜索并发上限"""
+        return self._yaml_config.get('concurrency', {}).get('per_document', {}).get('search', 6)
+
+    # ==================== 运行进度事件配置（从 yaml）====================
+    @property
+    def RUN_EVENTS_BUFFER_SIZE(self) -> int:
+        """每个运行缓存的事件数（晚加入的订阅者从缓存补齐）"""
+        return self._yaml_config.get('run_events', {}).get('buffer_size', 2000)
+
+    @property
+    def RUN_EVENTS_RETENTION(self) -> int:
+        """运行结束后事件缓存的保留时长（秒）"""
+        return self._yaml_config.get('run_events', {}).get('retention', 3600)
+
+    @property
+    def RUN_EVENTS_HEARTBEAT(self) -> int:
+        """SSE 心跳间隔（秒）"""
+        return self._yaml_config.get('run_events', {}).get('heartbeat', 15)
+
+    # ==================== 文档整合配置（从 yaml）====================
+    @property
+    def WRITING_INTEGRATION_MODE(self) -> str:
+        """文档整合方式：transitions（本地拼接 + LLM 生成引言/总结/过渡）/ llm（整篇由 LLM 重写）"""
+        return self._yaml_config.get('writing_integration', {}).get('mode', 'transitions')
+
+    @property
+    def WRITING_INTEGRATION_EXCERPT_CHARS(self) -> int:
+        """生成过渡/引言/总结时每个章节的首尾摘录长度（字符）"""
+        return self._yaml_config.get('writing_integration', {}).get('excerpt_chars', 600)
+
+    @property
+    def WRITING_REVISION_SCOPE(self) -> str:
+        """文档修订范围：chapters（只重写审查建议涉及的章节）/ document（整篇重写）"""
+        return self._yaml_config.get('writing_integration', {}).get('revision_scope', 'chapters')
+
+    @property
+    def WRITING_REVIEW_MODE(self) -> str:
+        """文档审查方式：map_reduce（并行单章审查 + 全局汇总）/ single（整篇一次调用）"""
+        return self._yaml_config.get('writing_integration', {}).get('review_mode', 'map_reduce')
+
+    @property
+    def WRITING_REVIEW_MAP_REDUCE_MIN_CHARS(self) -> int:
+        """文档达到该长度（字符）时才使用 map-reduce 审查，短文档仍整篇审查"""
+        return self._yaml_config.get('writing_integration', {}).get('review_map_reduce_min_chars', 12000)
+
+    @property
+    def WRITING_RESEARCH_PLANNING(self) -> bool:
+        """是否在分发章节前统一规划首轮搜索（跨章节查询去重）"""
+        return self._yaml_config.get('writing_research', {}).get('planning', True)
+
+    @property
+    def WRITING_RESEARCH_DEDUP_THRESHOLD(self) -> float:
+        """查询 shingle 相似度（Jaccard）达到该值时视为重复查询"""
+        return self._yaml_config.get('writing_research', {}).get('dedup_threshold', 0.6)
+
+    @property
+    def WRITING_EVIDENCE_PACKING(self) -> bool:
+        """是否按段落相关性（BM25）挑选写作素材；关闭时整页拼接搜索结果"""
+        return self._yaml_config.get('writing_evidence', {}).get('packing', True)
+
+    @property
+    def WRITING_EVIDENCE_TOKEN_BUDGET(self) -> int:
+        """每次写作 prompt 中搜索素材的 token 预算"""
+        return self._yaml_config.get('writing_evidence', {}).get('token_budget', 6000)
+
+    @property
+    def WRITING_EVIDENCE_PASSAGE_CHARS(self) -> int:
+        """段落长度上限（字符）"""
+        return self._yaml_config.get('writing_evidence', {}).get('passage_chars', 800)
+
+    @property
+    def WRITING_EVIDENCE_MAX_PASSAGES_PER_SOURCE(self) -> int:
+        """单个来源最多选取的段落数"""
+        return self._yaml_config.get('writing_evidence', {}).get('max_passages_per_source', 4)
+
+    @property
+    def WRITING_EVIDENCE_MAX_PAGE_CHARS(self) -> int:
+        """章节写作搜索保留的页面正文长度（content，raw_content 为其 2 倍）"""
+        return self._yaml_config.get('writing_evidence', {}).get('max_page_chars', 20000)
+
+    @property
+    def WRITING_EVIDENCE_REVISION_TOKEN_BUDGET(self) -> int:
+        """章节修订 prompt 中参考素材的 token 预算"""
+        return self._yaml_config.get('writing_evidence', {}).get('revision_token_budget', 3000)
+
+    @property
+    def EVIDENCE_STORE_ENABLED(self) -> bool:
+        """是否启用报告级素材库（跨迭代、跨章节、修订时复用搜索素材）"""
+        return self._yaml_config.get('evidence_store', {}).get('enabled', True)
+
+    @property
+    def EVIDENCE_STORE_PERSIST(self) -> bool:
+        """运行结束时是否持久化素材库（恢复运行时重新加载）"""
+        return self._yaml_config.get('evidence_store', {}).get('persist', False)
+
+    @property
+    def EVIDENCE_STORE_DIR(self) -> str:
+        """素材库持久化目录"""
+        return self._yaml_config.get('evidence_store', {}).get('dir', 'data/evidence')
+
+    @property
+    def EVIDENCE_STORE_QUERY_REUSE_THRESHOLD(self) -> float:
+        """新查询与已执行查询的 shingle 相似度达到该值时直接复用已有结果"""
+        return self._yaml_config.get('evidence_store', {}).get('query_reuse_threshold', 0.8)
+
+    @property
+    def EVIDENCE_STORE_MAX_PAGES(self) -> int:
+        """单个报告最多保存的页面数"""
+        return self._yaml_config.get('evidence_store', {}).get('max_pages', 500)
+
+    # ==================== 图表沙箱容器池配置（从 yaml）====================
+
+    @property
+    def SANDBOX_POOL_ENABLED(self) -> bool:
+        """是否启用图表沙箱预热容器池（关闭时每次执行创建一次性容器）"""
+        return self._yaml_config.get('sandbox_pool', {}).get('enabled', True)
+
+    @property
+    def SANDBOX_POOL_WARM_ON_STARTUP(self) -> bool:
+        """服务启动时预热容器池（否则第一次生成图表时启动）"""
+        return self._yaml_config.get('sandbox_pool', {}).get('warm_on_startup', True)
+
+    @property
+    def SANDBOX_POOL_SIZE(self) -> int:
+        """预热容器数"""
+        return self._yaml_config.get('sandbox_pool', {}).get('size', 2)
+
+    @property
+    def SANDBOX_POOL_MAX_RUNS(self) -> int:
+        """单个容器执行该次数后销毁重建"""
+        return self._yaml_config.get('sandbox_pool', {}).get('max_runs', 50)
+
+    @property
+    def SANDBOX_POOL_MAX_MEMORY_GROWTH(self) -> int:
+        """容器内存比就绪时增长超过该值（字节）后销毁重建"""
+        return int(self._yaml_config.get('sandbox_pool', {}).get('max_memory_growth_mb', 256) * 1024 * 1024)
+
+    @property
+    def SANDBOX_POOL_HEALTH_CHECK_INTERVAL(self) -> int:
+        """空闲容器健康检查间隔（秒）"""
+        return self._yaml_config.get('sandbox_pool', {}).get('health_check_interval', 30)
+
+    @property
+    def SANDBOX_POOL_STARTUP_TIMEOUT(self) -> int:
+        """容器启动并导入绘图库的超时（秒）"""
+        return self._yaml_config.get('sandbox_pool', {}).get('startup_timeout', 60)
+
+    @property
+    def SANDBOX_POOL_ACQUIRE_TIMEOUT(self) -> float:
+        """等待空闲容器的超时（秒），超时后使用一次性容器"""
+        return self._yaml_config.get('sandbox_pool', {}).get('acquire_timeout', 10)
+
+    # ==================== 编译图注册表配置（从 yaml）====================
+    @property
+    def GRAPH_WARMUP_ON_STARTUP(self) -> bool:
+        """启动时是否在后台预编译 publisher 图"""
+        return self._yaml_config.get('graph_registry', {}).get('warmup_on_startup', True)
+
+    @property
+    def GRAPH_WARMUP_GRAPHS(self) -> List[str]:
+        """启动时预编译的图（为空时预编译全部已注册的图）"""
+        return self._yaml_config.get('graph_registry', {}).get('warmup_graphs', [])
+
+    # ==================== Tavily 搜索客户端（从 yaml）====================
+    @property
+    def TAVILY_BASE_URL(self) -> str:
+        """Tavily API 地址"""
+        return self._yaml_config.get('tavily_search', {}).get('base_url', 'https://api.tavily.com')
+
+    @property
+    def TAVILY_TIMEOUT(self) -> float:
+        """单次搜索请求超时（秒）"""
+        return self._yaml_config.get('tavily_search', {}).get('timeout', 20.0)
+
+    @property
+    def TAVILY_CONNECT_TIMEOUT(self) -> float:
+        """建立连接超时（秒）"""
+        return self._yaml_config.get('tavily_search', {}).get('connect_timeout', 5.0)
+
+    @property
+    def TAVILY_MAX_RETRIES(self) -> int:
+        """超时 / 连接错误 / 429 / 5xx 时的最大重试次数"""
+        return self._yaml_config.get('tavily_search', {}).get('max_retries', 2)
+
+    @property
+    def TAVILY_BACKOFF_BASE(self) -> float:
+        """重试退避基数（秒），第 n 次重试在 [0, base * 2^n] 内随机等待"""
+        return self._yaml_config.get('tavily_search', {}).get('backoff_base', 0.5)
+
+    @property
+    def TAVILY_BACKOFF_MAX(self) -> float:
+        """单次重试最长等待（秒）"""
+        return self._yaml_config.get('tavily_search', {}).get('backoff_max', 8.0)
+
+    @property
+    def TAVILY_MAX_CONNECTIONS(self) -> int:
+        """共享连接池的最大连接数"""
+        return self._yaml_config.get('tavily_search', {}).get('max_connections', 20)
+
+    # ==================== 搜索结果缓存（从 yaml）====================
+    @property
+    def SEARCH_CACHE_ENABLED(self) -> bool:
+        """是否启用持久化搜索结果缓存"""
+        return self._yaml_config.get('search_cache', {}).get('enabled', True)
+
+    @property
+    def SEARCH_CACHE_PATH(self) -> str:
+        """缓存 SQLite 文件路径"""
+        return self._yaml_config.get('search_cache', {}).get('path', 'data/search_cache.db')
+
+    @property
+    def SEARCH_CACHE_TTL(self) -> Dict[str, int]:
+        """各时效类别的 TTL（秒）"""
+        ttl = {"realtime": 3600, "news": 6 * 3600, "general": 7 * 24 * 3600}
+        ttl.update(self._yaml_config.get('search_cache', {}).get('ttl', {}) or {})
+        return ttl
+
+    @property
+    def SEARCH_CACHE_REALTIME_KEYWORDS(self) -> List[str]:
+        """查询包含这些关键词时按 realtime 类别缓存"""
+        return self._yaml_config.get('search_cache', {}).get('realtime_keywords', [
+            "最新", "今天", "今日", "昨天", "本周", "实时", "股价", "汇率", "天气",
+            "latest", "today", "yesterday", "this week", "breaking", "stock price",
+        ])
+
+    @property
+    def SEARCH_CACHE_MAX_ENTRIES(self) -> int:
+        """最大条目数（超出后按 LRU 淘汰）"""
+        return self._yaml_config.get('search_cache', {}).get('max_entries', 50000)
+
+    @property
+    def SEARCH_CACHE_MAX_BYTES(self) -> int:
+        """压缩后最大总大小（字节，超出后按 LRU 淘汰）"""
+        return self._yaml_config.get('search_cache', {}).get('max_mb', 512) * 1024 * 1024
+
+    @property
+    def SEARCH_CACHE_COMPRESSION_LEVEL(self) -> int:
+        """zstd 压缩级别"""
+        return self._yaml_config.get('search_cache', {}).get('compression_level', 3)
+
+    # ==================== 搜索结果后处理（从 yaml）====================
+    @property
+    def SEARCH_NEAR_DUPLICATE_THRESHOLD(self) -> Optional[float]:
+        """页面内容近似重复阈值（MinHash 估计的 Jaccard 相似度），为空时只按 URL 去重"""
+        return self._yaml_config.get('search_postprocess', {}).get('near_duplicate_threshold', 0.8)
+
     # ==================== 模型参数配置（从 yaml）====================
     @property
     def model_params(self) -> Dict[str, Any]:
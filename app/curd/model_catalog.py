@@ -0,0 +1,166 @@
+"""
+Model Catalog CRUD Operations
+模型目录的数据库操作（供应商可用模型列表的持久化缓存）
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import or_
+
+from app.models.model_providers import ModelCatalog, ModelProvider
+from app.schemas.model_providers import AvailableModel, ModelProviderModel
+from app.database.db import get_db
+
+
+class ModelCatalogTable:
+    """模型目录 CRUD 操作类"""
+
+    # ===================== Read =====================
+
+    def get_models(self, provider_id: str) -> List[AvailableModel]:
+        """获取供应商的模型目录（按名称排序）"""
+        try:
+            with get_db() as db:
+                rows = db.query(ModelCatalog).filter(
+                    ModelCatalog.provider_id == provider_id
+                ).order_by(ModelCatalog.name).all()
+
+                return [
+                    AvailableModel(
+                        id=row.model_id,
+                        name=row.name,
+                        model_type=row.model_type,
+                        context_length=row.context_length,
+                        is_enabled=row.is_enabled,
+                    )
+                    for row in rows
+                ]
+
+        except Exception as e:
+            logger.exception(f"Failed to get model catalog: {e}")
+            return []
+
+    def get_context_length(self, provider_id: str, model_id: str) -> Optional[int]:
+        """获取模型的上下文长度（未知时返回 None）"""
+        try:
+            with get_db() as db:
+                row = db.query(ModelCatalog.context_length).filter(
+                    ModelCatalog.provider_id == provider_id,
+                    ModelCatalog.model_id == model_id
+                ).first()
+                return row.context_length if row else None
+
+        except Exception as e:
+            logger.exception(f"Failed to get context length: {e}")
+            return None
+
+    def get_providers_due_for_refresh(
+        self, ttl_by_type: Dict[str, int], default_ttl: int
+    ) -> List[ModelProviderModel]:
+        """
+        获取需要刷新模型目录的启用供应商
+
+        以最近一次尝试刷新时间判断，厂商 API 持续失败时也按 TTL 重试而不是每轮都请求。
+        """
+        try:
+            with get_db() as db:
+                now = int(time.time())
+                min_ttl = min([default_ttl, *ttl_by_type.values()])
+
+                # 先用最小 TTL 粗筛，再按供应商类型的 TTL 精确判断
+                candidates = db.query(ModelProvider).filter(
+                    ModelProvider.is_active == True,
+                    or_(
+                        ModelProvider.catalog_checked_at.is_(None),
+                        ModelProvider.catalog_checked_at <= now - min_ttl
+                    )
+                ).all()
+
+                return [
+                    ModelProviderModel.model_validate(p)
+                    for p in candidates
+                    if p.catalog_checked_at is None
+                    or p.catalog_checked_at <= now - ttl_by_type.get(p.provider_type, default_ttl)
+                ]
+
+        except Exception as e:
+            logger.exception(f"Failed to get providers due for refresh: {e}")
+            return []
+
+    # ===================== Write =====================
+
+    def replace_models(self, provider_id: str, models: List[AvailableModel]) -> bool:
+        """用最新获取的模型列表替换目录，并记录刷新成功（同一事务）"""
+        try:
+            with get_db() as db:
+                now = int(time.time())
+
+                db.query(ModelCatalog).filter(
+                    ModelCatalog.provider_id == provider_id
+                ).delete()
+
+                seen = set()
+                for model in models:
+                    if model.id in seen:
+                        continue
+                    seen.add(model.id)
+                    db.add(ModelCatalog(
+                        provider_id=provider_id,
+                        model_id=model.id,
+                        name=model.name,
+                        model_type=model.model_type,
+                        context_length=model.context_length,
+                        is_enabled=model.is_enabled,
+                        fetched_at=now,
+                    ))
+
+                db.query(ModelProvider).filter(ModelProvider.id == provider_id).update({
+                    "catalog_refreshed_at": now,
+                    "catalog_checked_at": now,
+                    "catalog_error": None,
+                })
+
+                db.commit()
+                logger.info(f"Refreshed model catalog for provider {provider_id}: {len(seen)} models")
+                return True
+
+        except Exception as e:
+            logger.exception(f"Failed to replace model catalog: {e}")
+            return False
+
+    def mark_refresh_failed(self, provider_id: str, message: str) -> bool:
+        """记录刷新失败（保留上一次成功获取的模型列表）"""
+        try:
+            with get_db() as db:
+                db.query(ModelProvider).filter(ModelProvider.id == provider_id).update({
+                    "catalog_checked_at": int(time.time()),
+                    "catalog_error": message,
+                })
+                db.commit()
+                return True
+
+        except Exception as e:
+            logger.exception(f"Failed to mark catalog refresh failure: {e}")
+            return False
+
+    # ===================== Delete =====================
+
+    def delete_models(self, provider_id: str) -> bool:
+        """删除供应商的模型目录"""
+        try:
+            with get_db() as db:
+                db.query(ModelCatalog).filter(
+                    ModelCatalog.provider_id == provider_id
+                ).delete()
+                db.commit()
+                return True
+
+        except Exception as e:
+            logger.exception(f"Failed to delete model catalog: {e}")
+            return False
+
+
+# 单例导出
+ModelCatalogs = ModelCatalogTable()
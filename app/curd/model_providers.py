@@ -196,6 +196,20 @@ class ModelProviderTable:
             logger.exception(f"Failed to get providers by user_id: {e}")
             return []
 
+    def get_active_providers(self) -> List[ModelProviderModel]:
+        """获取所有用户的启用供应商（供后台任务使用）"""
+        try:
+            with get_db() as db:
+                providers = db.query(ModelProvider).filter(
+                    ModelProvider.is_active == True
+                ).all()
+
+                return [ModelProviderModel.model_validate(p) for p in providers]
+
+        except Exception as e:
+            logger.exception(f"Failed to get active providers: {e}")
+            return []
+
     def get_providers_by_user_and_type(
         self, user_id: str, provider_type: str, active_only: bool = False
     ) -> List[ModelProviderModel]:
@@ -8,15 +8,135 @@
 """
 import uuid
 import time
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterable, Callable, Tuple, Union
 from datetime import datetime
 from sqlalchemy import desc, and_
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, defer
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.models.reports import Report, ReportVersion, ReportStatus, ChangeType
+from app.models.reports import Report, ReportVersion, ReportChapterBlock, ReportStatus, ChangeType
+from app.config import settings
 from app.database.db import get_db
+from app.database.minio_db import get_minio_client
+from app.services.report_content import (
+    split_markdown_chapters,
+    build_manifest,
+    assemble_markdown,
+    manifest_word_count,
+    extract_chapter_title,
+    hash_block,
+    count_words,
+    report_content_cache,
+    report_diff_cache,
+    CHAPTER_SEPARATOR,
+)
 from loguru import logger
 
+# 未指定 expected_version 时，并发冲突的最大尝试次数
+MAX_WRITE_ATTEMPTS = 3
+
+
+class ReportVersionConflictError(Exception):
+    """报告版本冲突：调用方基于的版本已被其他写入覆盖"""
+
+    def __init__(self, report_id: str, expected_version: Optional[int], current_version: Optional[int] = None):
+        self.report_id = report_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Report {report_id} version conflict: "
+            f"expected {expected_version}, current {current_version}"
+        )
+
+
+# ==================== 章节块存取（模块内部） ====================
+
+def _store_blocks(db: Session, report_id: str, blocks: Dict[str, str]) -> int:
+    """
+    只写入该报告尚不存在的章节块（按内容哈希去重），返回新写入的块数
+
+    启用 offload 时，达到阈值的块正文上传到 MinIO，数据库只保留对象指针和大小。
+    对象按内容哈希寻址，事务回滚时遗留的对象会在下次写入同一内容时被复用。
+    """
+    if not blocks:
+        return 0
+
+    existing = {
+        row.content_hash
+        for row in db.query(ReportChapterBlock.content_hash).filter(
+            ReportChapterBlock.report_id == report_id,
+            ReportChapterBlock.content_hash.in_(list(blocks.keys()))
+        )
+    }
+
+    new_hashes = [h for h in blocks if h not in existing]
+    for block_hash in new_hashes:
+        content = blocks[block_hash]
+        data = content.encode("utf-8")
+        object_key = None
+
+        if settings.REPORT_OFFLOAD_ENABLED and len(data) >= settings.REPORT_OFFLOAD_MIN_BYTES:
+            object_key = get_minio_client().upload_block(data, report_id, block_hash)
+
+        db.add(ReportChapterBlock(
+            report_id=report_id,
+            content_hash=block_hash,
+            content="" if object_key else content,
+            word_count=count_words(content),
+            object_key=object_key,
+            size=len(data)
+        ))
+    return len(new_hashes)
+
+
+def _query_blocks(db: Session, report_id: str, hashes: Iterable[str]) -> List:
+    """按哈希查询章节块行（content, object_key）"""
+    hashes = list(set(hashes))
+    if not hashes:
+        return []
+    return db.query(
+        ReportChapterBlock.content_hash,
+        ReportChapterBlock.content,
+        ReportChapterBlock.object_key
+    ).filter(
+        ReportChapterBlock.report_id == report_id,
+        ReportChapterBlock.content_hash.in_(hashes)
+    ).all()
+
+
+def _load_blocks(db: Session, report_id: str, hashes: Iterable[str]) -> Dict[str, str]:
+    """按哈希批量读取章节块内容（存储在 MinIO 的块从对象存储读取）"""
+    blocks = {}
+    for row in _query_blocks(db, report_id, hashes):
+        if row.object_key:
+            blocks[row.content_hash] = get_minio_client().get_object_bytes(row.object_key).decode("utf-8")
+        else:
+            blocks[row.content_hash] = row.content
+    return blocks
+
+
+def _load_content(db: Session, report_id: str, manifest: List[Dict], version_number: int) -> str:
+    """按清单组装指定版本的完整 Markdown（命中缓存时不访问数据库）"""
+    cached = report_content_cache.get(report_id, version_number)
+    if cached is not None:
+        return cached
+
+    blocks = _load_blocks(db, report_id, (entry["hash"] for entry in manifest))
+    content = assemble_markdown(manifest, blocks)
+    report_content_cache.put(report_id, version_number, content)
+    return content
+
+
+def _hydrate_content(db: Session, obj, version_number: int):
+    """为分块存储的报告/版本填充 content 属性（不标记为脏数据，不会写回数据库）"""
+    if obj is not None and obj.chapter_manifest is not None:
+        content = _load_content(db, obj.report_id if isinstance(obj, ReportVersion) else obj.id,
+                                obj.chapter_manifest, version_number)
+        set_committed_value(obj, "content", content)
+    return obj
+
 
 class ReportTable:
     """报告表CRUD操作"""
@@ -55,11 +175,18 @@ class ReportTable:
         try:
             with get_db() as db:
                 report_id = str(uuid.uuid4())
+
+                # 正文按章节分块存储
+                manifest, blocks = build_manifest(split_markdown_chapters(content or ""))
+                _store_blocks(db, report_id, blocks)
+                word_count = manifest_word_count(manifest)
+
                 report = Report(
                     id=report_id,
                     user_id=user_id,
                     title=title,
-                    content=content if content else "",
+                    content="",
+                    chapter_manifest=manifest,
                     description=description,
                     chat_id=chat_id,
                     outline=outline,
@@ -68,14 +195,12 @@ class ReportTable:
                     status=status,
                     current_version=1,
                     is_manually_edited=False,
-                    word_count=len(content) if content else 0,
-                    estimated_reading_time=self._calculate_reading_time(content) if content else 0
+                    word_count=word_count,
+                    estimated_reading_time=self._reading_time_from_count(word_count)
                 )
                 db.add(report)
-                db.commit()
-                db.refresh(report)
 
-                # 创建初始版本
+                # 初始版本与报告在同一事务中写入
                 self._create_version(
                     db=db,
                     report=report,
@@ -84,6 +209,13 @@ class ReportTable:
                     change_summary="初始版本"
                 )
 
+                db.commit()
+                db.refresh(report)
+
+                assembled = assemble_markdown(manifest, blocks)
+                report_content_cache.put(report_id, report.current_version, assembled)
+                set_committed_value(report, "content", assembled)
+
                 logger.info(f"Created report: {report_id} for user: {user_id}")
                 return report
         except Exception as e:
@@ -96,7 +228,8 @@ class ReportTable:
         """根据ID获取报告"""
         try:
             with get_db() as db:
-                return db.query(Report).filter(Report.id == report_id).first()
+                report = db.query(Report).filter(Report.id == report_id).first()
+                return _hydrate_content(db, report, report.current_version) if report else None
         except Exception as e:
             logger.error(f"Failed to get report {report_id}: {e}")
             return None
@@ -105,9 +238,10 @@ class ReportTable:
         """根据报告ID和用户ID获取报告（权限验证）"""
         try:
             with get_db() as db:
-                return db.query(Report).filter(
+                report = db.query(Report).filter(
                     and_(Report.id == report_id, Report.user_id == user_id)
                 ).first()
+                return _hydrate_content(db, report, report.current_version) if report else None
         except Exception as e:
             logger.error(f"Failed to get report {report_id} for user {user_id}: {e}")
             return None
@@ -133,7 +267,10 @@ class ReportTable:
         """
         try:
             with get_db() as db:
-                query = db.query(Report).filter(Report.user_id == user_id)
+                # 列表只需要元数据，不加载正文、章节清单和大纲
+                query = db.query(Report)\
+                    .options(defer(Report.content), defer(Report.chapter_manifest), defer(Report.outline))\
+                    .filter(Report.user_id == user_id)
 
                 if status:
                     query = query.filter(Report.status == status)
@@ -143,11 +280,64 @@ class ReportTable:
             logger.error(f"Failed to get reports for user {user_id}: {e}")
             return []
 
+    def get_content_segments(self, report_id: str, user_id: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        获取当前版本正文的组成片段（用于流式输出，不组装完整正文）
+
+        Returns:
+            [(kind, value)]：kind 为 "text"（正文片段）或 "object"（MinIO对象名称），
+            报告不存在时返回None
+        """
+        try:
+            with get_db() as db:
+                report = db.query(Report)\
+                    .options(load_only(Report.id, Report.content, Report.chapter_manifest, Report.current_version))\
+                    .filter(and_(Report.id == report_id, Report.user_id == user_id))\
+                    .first()
+
+                if not report:
+                    return None
+
+                if report.chapter_manifest is None:
+                    return [("text", report.content or "")]
+
+                cached = report_content_cache.get(report_id, report.current_version)
+                if cached is not None:
+                    return [("text", cached)]
+
+                rows = {
+                    row.content_hash: row
+                    for row in _query_blocks(db, report_id, (e["hash"] for e in report.chapter_manifest))
+                }
+
+                segments = []
+                for i, entry in enumerate(report.chapter_manifest):
+                    if i:
+                        segments.append(("text", CHAPTER_SEPARATOR))
+                    row = rows[entry["hash"]]
+                    segments.append(("object", row.object_key) if row.object_key else ("text", row.content))
+                return segments
+        except Exception as e:
+            logger.error(f"Failed to get content segments for report {report_id}: {e}")
+            return None
+
+    def is_report_owner(self, report_id: str, user_id: str) -> bool:
+        """检查报告是否属于该用户（只查询主键，不加载正文）"""
+        try:
+            with get_db() as db:
+                return db.query(Report.id).filter(
+                    and_(Report.id == report_id, Report.user_id == user_id)
+                ).first() is not None
+        except Exception as e:
+            logger.error(f"Failed to check owner of report {report_id}: {e}")
+            return False
+
     def get_report_by_chat_id(self, chat_id: str) -> Optional[Report]:
         """根据会话ID获取关联的报告"""
         try:
             with get_db() as db:
-                return db.query(Report).filter(Report.chat_id == chat_id).first()
+                report = db.query(Report).filter(Report.chat_id == chat_id).first()
+                return _hydrate_content(db, report, report.current_version) if report else None
         except Exception as e:
             logger.error(f"Failed to get report by chat_id {chat_id}: {e}")
             return None
@@ -166,7 +356,8 @@ class ReportTable:
         category: Optional[str] = None,
         tags: Optional[str] = None,
         change_summary: Optional[str] = None,
-        changed_by: str = "user"
+        changed_by: str = "user",
+        expected_version: Optional[int] = None
     ) -> Optional[Report]:
         """
         更新报告（会创建新版本）
@@ -177,9 +368,150 @@ class ReportTable:
             title/content/description/outline/status/category/tags: 更新字段
             change_summary: 变更摘要
             changed_by: 变更来源 ("ai" or "user")
+            expected_version: 调用方读取到的版本号，与当前版本不一致时抛出冲突
 
         Returns:
             更新后的Report对象
+
+        Raises:
+            ReportVersionConflictError: 版本冲突
+        """
+        def apply_changes(db: Session, report: Report) -> Optional[str]:
+            assembled = None
+            if title is not None:
+                report.title = title
+            if content is not None:
+                # 只写入内容哈希发生变化的章节块
+                manifest, blocks = build_manifest(
+                    split_markdown_chapters(content),
+                    report.chapter_manifest
+                )
+                new_blocks = _store_blocks(db, report.id, blocks)
+                self._apply_manifest(report, manifest)
+                assembled = assemble_markdown(manifest, blocks)
+                logger.debug(
+                    f"Report {report_id}: {len(manifest)} chapters, {new_blocks} blocks written"
+                )
+            if description is not None:
+                report.description = description
+            if outline is not None:
+                report.outline = outline
+            if status is not None:
+                report.status = status
+            if category is not None:
+                report.category = category
+            if tags is not None:
+                report.tags = tags
+            return assembled
+
+        try:
+            report = self._write_version(
+                report_id=report_id,
+                user_id=user_id,
+                apply_changes=apply_changes,
+                change_type=ChangeType.MANUAL_EDIT if changed_by == "user" else ChangeType.AI_GENERATED,
+                changed_by=changed_by,
+                change_summary=change_summary,
+                expected_version=expected_version
+            )
+            if report:
+                logger.info(f"Updated report {report_id} to version {report.current_version}")
+            return report
+        except ReportVersionConflictError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to update report {report_id}: {e}")
+            return None
+
+    def update_chapter(
+        self,
+        report_id: str,
+        user_id: str,
+        chapter_key: str,
+        content: str,
+        title: Optional[str] = None,
+        change_summary: Optional[str] = None,
+        changed_by: str = "user",
+        expected_version: Optional[int] = None
+    ) -> Optional[Report]:
+        """
+        重写单个章节（会创建 CHAPTER_REWRITTEN 版本）
+
+        只写入该章节的新内容块，其余章节沿用原有块，版本快照仅记录章节清单。
+        不传 expected_version 时，并发写入其他章节会自动重试，不会互相覆盖。
+
+        Args:
+            report_id: 报告ID
+            user_id: 用户ID（权限验证）
+            chapter_key: 章节 key（见 get_chapters）
+            content: 章节新的 Markdown 内容
+            title: 章节标题（为空时从内容首个标题提取）
+            change_summary: 变更摘要
+            changed_by: 变更来源 ("ai" or "user")
+            expected_version: 调用方读取到的版本号，与当前版本不一致时抛出冲突
+
+        Returns:
+            更新后的Report对象，报告或章节不存在时返回None
+
+        Raises:
+            ReportVersionConflictError: 版本冲突
+        """
+        block = content.strip("\n")
+        block_hash = hash_block(block)
+        summary = {"text": change_summary}
+
+        def apply_changes(db: Session, report: Report) -> None:
+            manifest = self._ensure_manifest(db, report)
+            position = next(
+                (i for i, entry in enumerate(manifest) if entry["key"] == chapter_key),
+                None
+            )
+            if position is None:
+                raise KeyError(chapter_key)
+
+            _store_blocks(db, report.id, {block_hash: block})
+
+            chapter_title = title or extract_chapter_title(block) or manifest[position]["title"]
+            new_manifest = list(manifest)
+            new_manifest[position] = {
+                "key": chapter_key,
+                "title": chapter_title,
+                "hash": block_hash,
+                "word_count": count_words(block),
+            }
+            self._apply_manifest(report, new_manifest)
+            summary["text"] = change_summary or f"重写章节：{chapter_title}"
+
+        try:
+            report = self._write_version(
+                report_id=report_id,
+                user_id=user_id,
+                apply_changes=apply_changes,
+                change_type=ChangeType.CHAPTER_REWRITTEN,
+                changed_by=changed_by,
+                change_summary=lambda: summary["text"],
+                expected_version=expected_version
+            )
+            if report:
+                logger.info(
+                    f"Rewrote chapter {chapter_key} of report {report_id}, "
+                    f"version {report.current_version}"
+                )
+            return report
+        except ReportVersionConflictError:
+            raise
+        except KeyError:
+            logger.warning(f"Chapter {chapter_key} not found in report {report_id}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to update chapter {chapter_key} of report {report_id}: {e}")
+            return None
+
+    def get_chapters(self, report_id: str, user_id: str) -> Optional[List[Dict]]:
+        """
+        获取报告的章节清单（不含正文）
+
+        整篇存储的旧报告会在首次访问时迁移为分块存储（不创建新版本）。
         """
         try:
             with get_db() as db:
@@ -188,51 +520,16 @@ class ReportTable:
                 ).first()
 
                 if not report:
-                    logger.warning(f"Report {report_id} not found or access denied")
                     return None
 
-                # 更新字段
-                if title is not None:
-                    report.title = title
-                if content is not None:
-                    report.content = content
-                    report.word_count = len(content)
-                    report.estimated_reading_time = self._calculate_reading_time(content)
-                if description is not None:
-                    report.description = description
-                if outline is not None:
-                    report.outline = outline
-                if status is not None:
-                    report.status = status
-                if category is not None:
-                    report.category = category
-                if tags is not None:
-                    report.tags = tags
-
-                # 版本管理
-                if changed_by == "user":
-                    report.is_manually_edited = True
-
-                report.current_version += 1
-
-                db.commit()
-                db.refresh(report)
-
-                # 创建版本快照
-                change_type = ChangeType.MANUAL_EDIT if changed_by == "user" else ChangeType.AI_GENERATED
-                self._create_version(
-                    db=db,
-                    report=report,
-                    change_type=change_type,
-                    changed_by=changed_by,
-                    user_id=user_id if changed_by == "user" else None,
-                    change_summary=change_summary
-                )
+                if report.chapter_manifest is None:
+                    self._apply_manifest(report, self._ensure_manifest(db, report))
+                    db.commit()
+                    logger.info(f"Migrated report {report_id} to chapter storage")
 
-                logger.info(f"Updated report {report_id} to version {report.current_version}")
-                return report
+                return report.chapter_manifest
         except Exception as e:
-            logger.error(f"Failed to update report {report_id}: {e}")
+            logger.error(f"Failed to get chapters for report {report_id}: {e}")
             return None
 
     def update_outline(self, report_id: str, outline: dict) -> Optional[Report]:
@@ -244,6 +541,7 @@ class ReportTable:
                     report.outline = outline
                     db.commit()
                     db.refresh(report)
+                    _hydrate_content(db, report, report.current_version)
                     logger.info(f"Updated outline for report {report_id}")
                 return report
         except Exception as e:
@@ -252,34 +550,23 @@ class ReportTable:
 
     def publish_report(self, report_id: str, user_id: str) -> Optional[Report]:
         """发布报告（状态变更为PUBLISHED）"""
-        try:
-            with get_db() as db:
-                report = db.query(Report).filter(
-                    and_(Report.id == report_id, Report.user_id == user_id)
-                ).first()
-
-                if not report:
-                    return None
-
-                report.status = ReportStatus.PUBLISHED
-                report.published_at = datetime.now()
-                report.current_version += 1
-
-                db.commit()
-                db.refresh(report)
-
-                # 创建发布版本
-                self._create_version(
-                    db=db,
-                    report=report,
-                    change_type=ChangeType.STATUS_CHANGED,
-                    changed_by="user",
-                    user_id=user_id,
-                    change_summary="报告已发布"
-                )
+        def apply_changes(db: Session, report: Report) -> None:
+            report.status = ReportStatus.PUBLISHED
+            report.published_at = datetime.now()
 
+        try:
+            report = self._write_version(
+                report_id=report_id,
+                user_id=user_id,
+                apply_changes=apply_changes,
+                change_type=ChangeType.STATUS_CHANGED,
+                changed_by="user",
+                change_summary="报告已发布",
+                mark_edited=False
+            )
+            if report:
                 logger.info(f"Published report {report_id}")
-                return report
+            return report
         except Exception as e:
             logger.error(f"Failed to publish report {report_id}: {e}")
             return None
@@ -299,15 +586,28 @@ class ReportTable:
         """
         try:
             with get_db() as db:
-                # 删除版本历史
-                db.query(ReportVersion).filter(ReportVersion.report_id == report_id).delete()
-
                 # 删除报告
                 deleted = db.query(Report).filter(
                     and_(Report.id == report_id, Report.user_id == user_id)
                 ).delete()
 
+                if not deleted:
+                    return False
+
+                # 删除版本历史和章节块
+                db.query(ReportVersion).filter(ReportVersion.report_id == report_id).delete()
+                has_offloaded = db.query(ReportChapterBlock.content_hash).filter(
+                    ReportChapterBlock.report_id == report_id,
+                    ReportChapterBlock.object_key.isnot(None)
+                ).first() is not None
+                db.query(ReportChapterBlock).filter(ReportChapterBlock.report_id == report_id).delete()
+
                 db.commit()
+
+                if has_offloaded:
+                    get_minio_client().delete_report_blocks(report_id)
+                report_content_cache.invalidate_report(report_id)
+                report_diff_cache.invalidate_report(report_id)
                 logger.info(f"Deleted report {report_id} and its versions")
                 return deleted > 0
         except Exception as e:
@@ -324,33 +624,128 @@ class ReportTable:
         changed_by: str,
         user_id: Optional[str] = None,
         change_summary: Optional[str] = None
-    ) -> Optional[ReportVersion]:
-        """创建版本快照（内部方法）"""
-        try:
-            version = ReportVersion(
-                id=str(uuid.uuid4()),
-                report_id=report.id,
-                version_number=report.current_version,
-                title=report.title,
-                content=report.content,
-                outline=report.outline,
-                change_type=change_type,
-                change_summary=change_summary,
-                changed_by=changed_by,
-                user_id=user_id
-            )
-            db.add(version)
-            db.commit()
-            return version
-        except Exception as e:
-            logger.error(f"Failed to create version: {e}")
-            return None
+    ) -> ReportVersion:
+        """创建版本快照（内部方法，只加入会话，由调用方统一提交）"""
+        version = ReportVersion(
+            id=str(uuid.uuid4()),
+            report_id=report.id,
+            version_number=report.current_version,
+            title=report.title,
+            # 分块存储的版本只记录章节清单，正文由章节块组装
+            content="" if report.chapter_manifest is not None else report.content,
+            chapter_manifest=report.chapter_manifest,
+            outline=report.outline,
+            word_count=report.word_count,
+            change_type=change_type,
+            change_summary=change_summary,
+            changed_by=changed_by,
+            user_id=user_id
+        )
+        db.add(version)
+        return version
+
+    def _write_version(
+        self,
+        report_id: str,
+        user_id: str,
+        apply_changes: Callable[[Session, Report], Optional[str]],
+        change_type: ChangeType,
+        changed_by: str,
+        change_summary: Union[str, Callable[[], Optional[str]], None] = None,
+        expected_version: Optional[int] = None,
+        mark_edited: bool = True
+    ) -> Optional[Report]:
+        """
+        乐观并发写入：报告更新与版本快照在同一事务中提交（内部方法）
+
+        报告的 UPDATE 带有 WHERE current_version = <读取时的版本> 条件，
+        (report_id, version_number) 唯一索引兜底，并发写入不会产生重复版本号或丢失更新。
+        指定 expected_version 时冲突直接抛出；未指定时重新读取并重试。
+
+        Args:
+            apply_changes: 就地修改报告的回调，返回组装后的正文（用于缓存，无正文变化返回None）
+            change_summary: 变更摘要，或在 apply_changes 之后求值的回调
+
+        Returns:
+            更新后的Report对象，报告不存在时返回None
+
+        Raises:
+            ReportVersionConflictError: 版本冲突（或重试耗尽）
+        """
+        attempts = 1 if expected_version is not None else MAX_WRITE_ATTEMPTS
+
+        for attempt in range(1, attempts + 1):
+            with get_db() as db:
+                report = db.query(Report).filter(
+                    and_(Report.id == report_id, Report.user_id == user_id)
+                ).first()
+
+                if not report:
+                    logger.warning(f"Report {report_id} not found or access denied")
+                    return None
+
+                if expected_version is not None and report.current_version != expected_version:
+                    raise ReportVersionConflictError(report_id, expected_version, report.current_version)
+
+                assembled = apply_changes(db, report)
+
+                if mark_edited and changed_by == "user":
+                    report.is_manually_edited = True
+                report.current_version += 1
+
+                self._create_version(
+                    db=db,
+                    report=report,
+                    change_type=change_type,
+                    changed_by=changed_by,
+                    user_id=user_id if changed_by == "user" else None,
+                    change_summary=change_summary() if callable(change_summary) else change_summary
+                )
+
+                try:
+                    db.commit()
+                except (StaleDataError, IntegrityError) as e:
+                    db.rollback()
+                    if attempt == attempts:
+                        raise ReportVersionConflictError(report_id, expected_version) from e
+                    logger.info(
+                        f"Concurrent write on report {report_id}, retrying ({attempt}/{attempts})"
+                    )
+                    continue
+
+                # updated_at 由数据库 onupdate 生成，提交后已过期，会话关闭前重新加载
+                db.refresh(report)
+                if assembled is not None:
+                    report_content_cache.put(report.id, report.current_version, assembled)
+                return _hydrate_content(db, report, report.current_version)
+
+    def _ensure_manifest(self, db: Session, report: Report) -> List[Dict]:
+        """返回报告的章节清单；整篇存储的旧报告先切分并写入章节块"""
+        if report.chapter_manifest is not None:
+            return report.chapter_manifest
+
+        manifest, blocks = build_manifest(split_markdown_chapters(report.content or ""))
+        _store_blocks(db, report.id, blocks)
+        return manifest
+
+    def _apply_manifest(self, report: Report, manifest: List[Dict]):
+        """应用新的章节清单并按清单更新统计信息（无需扫描完整正文）"""
+        report.chapter_manifest = manifest
+        if report.content:
+            report.content = ""
+        report.word_count = manifest_word_count(manifest)
+        report.estimated_reading_time = self._reading_time_from_count(report.word_count)
 
     def _calculate_reading_time(self, content: str) -> int:
         """计算阅读时间（假设200字/分钟）"""
         if not content:
             return 0
-        word_count = len(content)
+        return self._reading_time_from_count(len(content))
+
+    def _reading_time_from_count(self, word_count: int) -> int:
+        """根据字数计算阅读时间（假设200字/分钟）"""
+        if not word_count:
+            return 0
         return max(1, word_count // 200)
 
 
@@ -360,14 +755,44 @@ class ReportVersionTable:
     def get_versions_by_report_id(
         self,
         report_id: str,
-        limit: int = 50
+        limit: int = 50,
+        before_version: Optional[int] = None
     ) -> List[ReportVersion]:
-        """获取报告的所有版本历史"""
+        """
+        获取报告的版本历史（仅元数据，不加载 content / outline / chapter_manifest 快照）
+
+        按版本号倒序，使用 keyset 分页：下一页传入本页最后一条的 version_number
+        作为 before_version，无需 OFFSET 扫描。
+
+        Args:
+            report_id: 报告ID
+            limit: 返回条数
+            before_version: 只返回版本号小于该值的版本
+
+        Returns:
+            仅加载元数据列的ReportVersion列表
+        """
         try:
             with get_db() as db:
-                return db.query(ReportVersion)\
-                    .filter(ReportVersion.report_id == report_id)\
-                    .order_by(desc(ReportVersion.version_number))\
+                query = db.query(ReportVersion)\
+                    .options(load_only(
+                        ReportVersion.id,
+                        ReportVersion.report_id,
+                        ReportVersion.version_number,
+                        ReportVersion.title,
+                        ReportVersion.word_count,
+                        ReportVersion.change_type,
+                        ReportVersion.change_summary,
+                        ReportVersion.changed_by,
+                        ReportVersion.user_id,
+                        ReportVersion.created_at
+                    ))\
+                    .filter(ReportVersion.report_id == report_id)
+
+                if before_version is not None:
+                    query = query.filter(ReportVersion.version_number < before_version)
+
+                return query.order_by(desc(ReportVersion.version_number))\
                     .limit(limit)\
                     .all()
         except Exception as e:
@@ -382,27 +807,72 @@ class ReportVersionTable:
         """获取指定版本"""
         try:
             with get_db() as db:
-                return db.query(ReportVersion)\
+                version = db.query(ReportVersion)\
                     .filter(
                         and_(
                             ReportVersion.report_id == report_id,
                             ReportVersion.version_number == version_number
                         )
                     ).first()
+                return _hydrate_content(db, version, version_number) if version else None
         except Exception as e:
             logger.error(f"Failed to get version {version_number} for report {report_id}: {e}")
             return None
 
+    def get_version_snapshot(
+        self,
+        report_id: str,
+        version_number: int
+    ) -> Optional[ReportVersion]:
+        """
+        获取版本快照的存储形式（不组装正文）
+
+        分块存储的版本只加载章节清单，正文为空；调用方按需通过 get_chapter_blocks 读取章节块。
+        """
+        try:
+            with get_db() as db:
+                return db.query(ReportVersion)\
+                    .options(load_only(
+                        ReportVersion.id,
+                        ReportVersion.report_id,
+                        ReportVersion.version_number,
+                        ReportVersion.title,
+                        ReportVersion.content,
+                        ReportVersion.chapter_manifest
+                    ))\
+                    .filter(
+                        and_(
+                            ReportVersion.report_id == report_id,
+                            ReportVersion.version_number == version_number
+                        )
+                    ).first()
+        except Exception as e:
+            logger.error(f"Failed to get snapshot of version {version_number} for report {report_id}: {e}")
+            return None
+
+    def get_chapter_blocks(self, report_id: str, hashes: Iterable[str]) -> Dict[str, str]:
+        """
+        按内容哈希批量读取章节块，返回 {hash: content}
+
+        数据库 / MinIO 错误直接抛出：调用方（如版本 diff）会缓存结果，不能把读取失败当作空章节
+        """
+        with get_db() as db:
+            return _load_blocks(db, report_id, hashes)
+
     def rollback_to_version(
         self,
         report_id: str,
         user_id: str,
-        version_number: int
+        version_number: int,
+        expected_version: Optional[int] = None
     ) -> Optional[Report]:
         """
         回滚到指定版本
 
         实现方式：从历史版本复制内容，创建新版本
+
+        Raises:
+            ReportVersionConflictError: 版本冲突
         """
         try:
             # 获取目标版本
@@ -420,8 +890,11 @@ class ReportVersionTable:
                 content=target_version.content,
                 outline=target_version.outline,
                 change_summary=f"回滚到版本 {version_number}",
-                changed_by="user"
+                changed_by="user",
+                expected_version=expected_version
             )
+        except ReportVersionConflictError:
+            raise
         except Exception as e:
             logger.error(f"Failed to rollback report {report_id} to version {version_number}: {e}")
             return None
@@ -10,7 +10,7 @@
 """
 
 import io
-from typing import Optional
+from typing import Iterator, Optional
 from datetime import timedelta
 from minio import Minio
 from minio.error import S3Error
@@ -196,6 +196,160 @@ class MinIOClient:
             logger.error(f"Failed to delete chart from MinIO: {e}")
             return False
 
+    def upload_export(
+        self,
+        file_data: bytes,
+        report_id: str,
+        version_number: int,
+        extension: str,
+        content_type: str
+    ) -> str:
+        """
+        上传报告导出文件到MinIO
+
+        Args:
+            file_data: 导出文件的二进制数据
+            report_id: 报告ID
+            version_number: 版本号
+            extension: 文件扩展名（html/pdf/docx）
+            content_type: MIME类型
+
+        Returns:
+            str: MinIO中的对象名称
+        """
+        if not self._initialized:
+            self.initialize()
+
+        object_name = self.export_object_name(report_id, version_number, extension)
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=io.BytesIO(file_data),
+                length=len(file_data),
+                content_type=content_type
+            )
+            logger.info(f"Uploaded export to MinIO: {object_name} ({len(file_data)} bytes)")
+            return object_name
+        except S3Error as e:
+            logger.error(f"Failed to upload export to MinIO: {e}")
+            raise
+
+    def export_object_name(self, report_id: str, version_number: int, extension: str) -> str:
+        """导出文件对象路径: reports/{report_id}/exports/v{version}.{ext}"""
+        return f"reports/{report_id}/exports/v{version_number}.{extension}"
+
+    def get_object_size(self, object_name: str) -> Optional[int]:
+        """
+        获取对象大小
+
+        Returns:
+            Optional[int]: 对象字节数，对象不存在时返回None
+        """
+        if not self._initialized:
+            self.initialize()
+
+        try:
+            return self.client.stat_object(self.bucket_name, object_name).size
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            logger.error(f"Failed to stat object {object_name}: {e}")
+            raise
+
+    def block_object_name(self, report_id: str, content_hash: str) -> str:
+        """章节块对象路径（按内容哈希寻址）: reports/{report_id}/blocks/{hash}"""
+        return f"reports/{report_id}/blocks/{content_hash}"
+
+    def upload_block(self, data: bytes, report_id: str, content_hash: str) -> str:
+        """
+        上传章节块正文到MinIO
+
+        对象按内容哈希寻址，重复上传同一内容是幂等的。
+
+        Returns:
+            str: MinIO中的对象名称
+        """
+        if not self._initialized:
+            self.initialize()
+
+        object_name = self.block_object_name(report_id, content_hash)
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type="text/markdown; charset=utf-8"
+            )
+            logger.debug(f"Uploaded block to MinIO: {object_name} ({len(data)} bytes)")
+            return object_name
+        except S3Error as e:
+            logger.error(f"Failed to upload block to MinIO: {e}")
+            raise
+
+    def get_object_bytes(self, object_name: str) -> bytes:
+        """读取对象的完整内容"""
+        if not self._initialized:
+            self.initialize()
+
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, object_name)
+            return response.read()
+        except S3Error as e:
+            logger.error(f"Failed to read object {object_name}: {e}")
+            raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+    def stream_object(self, object_name: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """按块流式读取对象内容"""
+        if not self._initialized:
+            self.initialize()
+
+        response = self.client.get_object(self.bucket_name, object_name)
+        try:
+            for chunk in response.stream(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def delete_report_blocks(self, report_id: str) -> int:
+        """
+        删除某个报告存储在MinIO中的所有章节块
+
+        Returns:
+            int: 删除的对象数量
+        """
+        if not self._initialized:
+            self.initialize()
+
+        try:
+            objects = self.client.list_objects(
+                bucket_name=self.bucket_name,
+                prefix=f"reports/{report_id}/blocks/",
+                recursive=True
+            )
+
+            count = 0
+            for obj in objects:
+                self.client.remove_object(
+                    bucket_name=self.bucket_name,
+                    object_name=obj.object_name
+                )
+                count += 1
+
+            logger.info(f"Deleted {count} blocks for report {report_id}")
+            return count
+
+        except S3Error as e:
+            logger.error(f"Failed to delete report blocks: {e}")
+            return 0
+
     def delete_report_charts(self, report_id: str) -> int:
         """
         删除某个报告的所有图表
@@ -2,5 +2,5 @@ from .chats import Chat
 from .folders import Folder
 from .tags import Tag
 from .files import File
-from .reports import Report, ReportStatus
-from .model_providers import ModelProvider, ProviderType, ModelType
\ No newline at end of file
+from .reports import Report, ReportStatus, ReportVersion, ReportChapterBlock
+from .model_providers import ModelProvider, ModelCatalog, ProviderType, ModelType
\ No newline at end of file
@@ -4,7 +4,7 @@ Model Provider Configuration Table
 """
 
 from app.database.db import Base
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, Index
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Text, Index
 from sqlalchemy.dialects.mysql import JSON
 import enum
 
@@ -78,6 +78,11 @@ class ModelProvider(Base):
     connection_status = Column(String(20), default="unknown", nullable=False)  # connected, failed, unknown
     last_tested_at = Column(BigInteger, nullable=True)
 
+    # 模型目录刷新状态（见 model_catalog 表）
+    catalog_refreshed_at = Column(BigInteger, nullable=True)  # 最近一次成功刷新时间
+    catalog_checked_at = Column(BigInteger, nullable=True)    # 最近一次尝试刷新时间
+    catalog_error = Column(Text, nullable=True)               # 最近一次刷新失败原因（成功时清空）
+
     # 时间戳 (Unix timestamp)
     created_at = Column(BigInteger, nullable=False)
     updated_at = Column(BigInteger, nullable=False)
@@ -86,3 +91,24 @@ class ModelProvider(Base):
     __table_args__ = (
         Index('idx_model_provider_user_type', 'user_id', 'provider_type'),
     )
+
+
+class ModelCatalog(Base):
+    """
+    模型目录表
+
+    缓存每个供应商配置可用的模型列表，由后台刷新任务按供应商 TTL 从厂商 API 同步，
+    模型下拉框直接读取此表。厂商 API 不可用时保留上一次成功获取的列表。
+    """
+    __tablename__ = "model_catalog"
+
+    provider_id = Column(String(36), primary_key=True)   # 关联的供应商配置 ID
+    model_id = Column(String(255), primary_key=True)     # 模型 ID（如 deepseek-chat, gpt-4o）
+
+    name = Column(String(255), nullable=False)           # 显示名称
+    model_type = Column(String(20), nullable=False, default="llm")
+    context_length = Column(Integer, nullable=True)      # 上下文长度（未知时为空）
+    is_enabled = Column(Boolean, default=True, nullable=False)
+
+    # 同步时间 (Unix timestamp)
+    fetched_at = Column(BigInteger, nullable=False)
@@ -47,8 +47,12 @@ class Report(Base):
     description = Column(Text)
 
     # Markdown 内容（MinIO图片URL直接嵌入）
+    # 分块存储的报告此列为空，正文由 chapter_manifest 指向的章节块组装
     content = Column(Text, nullable=False)
 
+    # 章节块清单 [{"key", "title", "hash", "word_count"}]，为空表示整篇存储的旧报告
+    chapter_manifest = Column(JSON, nullable=True)
+
     # 状态
     status = Column(
         Enum(ReportStatus),
@@ -92,6 +96,13 @@ class Report(Base):
     )
     published_at = Column(TIMESTAMP)
 
+    # 乐观并发控制：UPDATE 语句附带 WHERE current_version = <读取时的版本>，
+    # 版本号由业务代码递增（version_id_generator=False）
+    __mapper_args__ = {
+        "version_id_col": current_version,
+        "version_id_generator": False,
+    }
+
     def __repr__(self):
         return f"<Report(id={self.id}, title='{self.title}', version={self.current_version})>"
 
@@ -108,8 +119,10 @@ class ReportVersion(Base):
 
     # 版本快照内容
     title = Column(VARCHAR(255), nullable=False)
-    content = Column(Text, nullable=False)  # Markdown内容快照
+    content = Column(Text, nullable=False)  # Markdown内容快照（分块存储的版本为空）
+    chapter_manifest = Column(JSON, nullable=True)  # 章节块清单快照
     outline = Column(JSON, nullable=True)  # 章节结构快照
+    word_count = Column(Integer, default=0)  # 快照字数（版本列表展示，无需读取正文）
 
     # 版本元数据
     change_type = Column(
@@ -129,10 +142,37 @@ class ReportVersion(Base):
         index=True
     )
 
-    # 复合索引：report_id + version_number 确保查询效率
+    # 复合唯一索引：report_id + version_number 确保查询效率，并防止并发写入产生重复版本号
     __table_args__ = (
-        Index('idx_report_version', 'report_id', 'version_number'),
+        Index('idx_report_version', 'report_id', 'version_number', unique=True),
     )
 
     def __repr__(self):
         return f"<ReportVersion(report_id={self.report_id}, v={self.version_number}, type={self.change_type})>"
+
+
+
+# ==================== 报告章节块表 ====================
+
+class ReportChapterBlock(Base):
+    """报告章节内容块表 - 按内容哈希寻址，未变更的章节在版本之间共享"""
+    __tablename__ = "report_chapter_blocks"
+
+    report_id = Column(String(36), primary_key=True)  # 关联的报告ID
+    content_hash = Column(String(64), primary_key=True)  # sha256(content)
+
+    content = Column(Text, nullable=False)  # 章节 Markdown 内容（存储在 MinIO 时为空）
+    word_count = Column(Integer, default=0)  # 章节字数
+
+    # 大块正文存储在 MinIO 时的对象指针（reports/{report_id}/blocks/{content_hash}）
+    object_key = Column(String(255), nullable=True)
+    size = Column(Integer, default=0)  # 正文字节数
+
+    created_at = Column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"<ReportChapterBlock(report_id={self.report_id}, hash={self.content_hash[:12]})>"
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   documents.py
+@Desc    :   文档写作运行相关 Pydantic Schema
+"""
+
+from pydantic import BaseModel
+from typing import Optional, List
+
+from app.agents.schemas.document_outline_schema import DocumentOutline
+
+
+class DocumentRunCreate(BaseModel):
+    """启动写作运行"""
+    chat_id: Optional[str] = None
+    document_outline: DocumentOutline           # 已确认的文档大纲
+
+
+class DocumentRunStatus(BaseModel):
+    """写作主图运行状态"""
+    document_id: str
+    status: str                                 # pending / running / failed / interrupted / completed
+    next_nodes: List[str] = []                  # 恢复时将执行的节点
+    completed_chapters: List[int] = []          # 已完成（恢复时不会重新生成）的章节
+    total_chapters: Optional[int] = None
+    checkpoint_id: Optional[str] = None         # 最近一次 checkpoint
+    step: Optional[int] = None                  # 最近完成的 super-step
+    updated_at: Optional[str] = None            # checkpoint 写入时间
+    started_at: Optional[int] = None            # 本进程内最近一次启动/恢复时间
+    error: Optional[str] = None
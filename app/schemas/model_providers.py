@@ -84,6 +84,9 @@ class ModelProviderModel(BaseModel):
     is_default: bool = False
     connection_status: str = "unknown"
     last_tested_at: Optional[int] = None
+    catalog_refreshed_at: Optional[int] = None
+    catalog_checked_at: Optional[int] = None
+    catalog_error: Optional[str] = None
     created_at: int
     updated_at: int
 
@@ -232,3 +235,42 @@ class AvailableModelsResponse(BaseModel):
     success: bool
     message: str
     models: List[AvailableModel] = []
+    refreshed_at: Optional[int] = None          # 模型目录最近一次成功同步时间
+    is_stale: bool = False                      # 是否超过 TTL（后台正在刷新）
+
+
+# ============================================
+# PROVIDER HEALTH SCHEMAS
+# ============================================
+
+class ProviderHealthStats(BaseModel):
+    """供应商/模型在滚动窗口内的延迟统计"""
+    provider_id: str
+    provider_type: Optional[str] = None
+    model: str
+    samples: int                                # 窗口内样本数
+    success_rate: Optional[float] = None
+    ttft_ms_p50: Optional[float] = None         # 首 token 延迟（毫秒）
+    ttft_ms_p90: Optional[float] = None
+    ttft_ms_p99: Optional[float] = None
+    tokens_per_second_p10: Optional[float] = None
+    tokens_per_second_p50: Optional[float] = None
+    tokens_per_second_p90: Optional[float] = None
+    last_sample_at: Optional[int] = None
+    last_error: Optional[str] = None
+
+
+class OllamaModelLoadState(BaseModel):
+    """Ollama 模型加载状态"""
+    model: str
+    base_url: str
+    state: str                                  # unloaded / loading / loaded / failed
+    keep_alive: Optional[str] = None            # 当前使用的 keep_alive
+    is_hot: bool = False                        # 是否为高频模型（使用更长的 keep_alive）
+    use_count: int = 0                          # 统计窗口内的使用次数
+    last_used_at: Optional[int] = None
+    loaded_at: Optional[int] = None
+    expires_at: Optional[str] = None            # Ollama 报告的卸载时间
+    size_vram: Optional[int] = None             # 占用显存（字节）
+    load_duration_ms: Optional[float] = None    # 最近一次加载耗时
+    error: Optional[str] = None
@@ -38,6 +38,7 @@ class ReportUpdate(BaseModel):
     tags: Optional[str] = Field(None, max_length=500)
     status: Optional[str] = None
     change_summary: Optional[str] = Field(None, description="变更摘要")
+    expected_version: Optional[int] = Field(None, ge=1, description="编辑所基于的版本号（不一致时返回409）")
 
 
 class ReportResponse(BaseModel):
@@ -88,14 +89,13 @@ class ReportListItem(BaseModel):
 # ==================== 版本相关 Schema ====================
 
 class ReportVersionResponse(BaseModel):
-    """版本历史响应"""
+    """版本历史响应（仅元数据，不返回content/outline快照）"""
     id: str
     report_id: str
     version_number: int
 
-    # 版本快照（简化版，不返回完整content）
     title: str
-    outline: Optional[Dict[str, Any]]
+    word_count: Optional[int] = 0  # 快照字数
 
     # 版本元数据
     change_type: str  # ai_generated, manual_edit, chapter_added, etc.
@@ -132,9 +132,47 @@ class ReportVersionDetail(BaseModel):
         from_attributes = True
 
 
+class DiffOperation(BaseModel):
+    """差异操作（equal 只返回单元数量）"""
+    op: str  # equal, insert, delete, replace
+    count: Optional[int] = None
+    old: Optional[List[str]] = None
+    new: Optional[List[str]] = None
+
+
+class ChapterDiff(BaseModel):
+    """章节差异"""
+    key: Optional[str] = None  # 整篇存储的旧版本没有章节key
+    title: str
+    status: str  # unchanged, modified, added, removed
+    ops: Optional[List[DiffOperation]] = None
+
+
+class ReportVersionDiffResponse(BaseModel):
+    """版本差异响应（结构化）"""
+    report_id: str
+    from_version: int
+    to_version: int
+    granularity: str  # line, paragraph
+    stats: Dict[str, int]
+    chapters: List[ChapterDiff]
+
+
+class ReportExportResponse(BaseModel):
+    """版本导出响应"""
+    report_id: str
+    version_number: int
+    format: str  # html, pdf, docx
+    url: str  # 预签名下载链接
+    size: int  # 文件字节数
+    content_type: str
+    cached: bool  # 是否命中已导出的产物
+
+
 class VersionRollbackRequest(BaseModel):
     """版本回滚请求"""
     version_number: int = Field(..., ge=1, description="要回滚到的版本号")
+    expected_version: Optional[int] = Field(None, ge=1, description="回滚所基于的当前版本号（不一致时返回409）")
 
 
 # ==================== 会话报告关联 Schema ====================
@@ -183,4 +221,21 @@ class OutlineResponse(BaseModel):
 
 class OutlineUpdateRequest(BaseModel):
     """更新大纲请求"""
-    outline: Dict[str, Any] = Field(..., description="完整的大纲JSON结构")
\ No newline at end of file
+    outline: Dict[str, Any] = Field(..., description="完整的大纲JSON结构")
+
+# ==================== 章节内容块相关 Schema ====================
+
+class ReportChapterItem(BaseModel):
+    """报告章节清单项（不含正文）"""
+    key: str = Field(..., description="章节key（编辑之间保持稳定）")
+    title: str
+    hash: str = Field(..., description="章节内容哈希")
+    word_count: int
+
+
+class ChapterUpdateRequest(BaseModel):
+    """重写单个章节请求"""
+    content: str = Field(..., description="章节新的Markdown内容（含章节标题）")
+    title: Optional[str] = Field(None, max_length=255, description="章节标题（为空时从内容提取）")
+    change_summary: Optional[str] = Field(None, description="变更摘要")
+    expected_version: Optional[int] = Field(None, ge=1, description="编辑所基于的版本号（不一致时返回409）")
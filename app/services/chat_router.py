@@ -0,0 +1,189 @@
+"""
+Chat Router
+按模型类别在用户的启用供应商之间路由聊天请求
+
+- 候选：用户启用的供应商中，配置了该类别模型的供应商
+- 排序：按滚动窗口内的 TTFT p90 和成功率（来自 provider_health），无样本时使用中性先验
+- 故障切换：仅在首个 token 输出之前进行——候选报错或超过 TTFT 截止时间未出 token 时切换到下一个；
+  首个 token 输出后不再切换，避免向前端输出两段不同的回复
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.messages import BaseMessage
+from loguru import logger
+
+from app.config import settings
+from app.curd.model_providers import ModelProviders
+from app.schemas.model_providers import ModelProviderModel
+from app.services.llm_factory import create_chat_llm
+from app.services.provider_health import provider_health
+
+# 成功率下限，避免除零并让持续失败的供应商排到最后
+MIN_SUCCESS_RATE = 0.05
+
+
+class NoAvailableProviderError(Exception):
+    """没有可用的供应商（无候选或全部候选在首 token 前失败）"""
+
+    def __init__(self, model_class: str, errors: Optional[List[str]] = None):
+        self.model_class = model_class
+        self.errors = errors or []
+        detail = "; ".join(self.errors) if self.errors else "no provider configured for this model class"
+        super().__init__(f"No available provider for model class '{model_class}': {detail}")
+
+
+@dataclass
+class RouteCandidate:
+    """路由候选（供应商 + 模型）"""
+    provider: ModelProviderModel
+    model: str
+    score: float
+
+
+@dataclass
+class RoutedStream:
+    """已输出首个 token 的流"""
+    provider: ModelProviderModel
+    model: str
+    started: float                      # 开始请求时间（perf_counter）
+    first_token_at: Optional[float]     # 首 token 时间（perf_counter），空流为 None
+    attempts: int
+    first_chunk: Optional[Any] = None
+    rest: Optional[AsyncIterator] = field(default=None, repr=False)
+
+    async def chunks(self) -> AsyncIterator:
+        """依次产出首个 chunk 和剩余 chunk"""
+        if self.first_chunk is not None:
+            yield self.first_chunk
+        if self.rest is not None:
+            async for chunk in self.rest:
+                yield chunk
+
+
+def _has_token(chunk) -> bool:
+    return bool(chunk.content or chunk.additional_kwargs.get("reasoning_content"))
+
+
+class ChatRouter:
+    """基于延迟和错误率的聊天路由"""
+
+    def model_classes(self) -> List[str]:
+        """获取已配置的模型类别"""
+        return list(settings.CHAT_MODEL_CLASSES)
+
+    def _model_for(self, provider: ModelProviderModel, model_class: str) -> Optional[str]:
+        """获取供应商在该类别下使用的模型（provider_config.model_classes 优先）"""
+        overrides = (provider.provider_config or {}).get("model_classes") or {}
+        if model_class in overrides:
+            return overrides[model_class]
+        return settings.CHAT_MODEL_CLASSES.get(model_class, {}).get(provider.provider_type)
+
+    def _score(self, provider_id: str, model: str) -> float:
+        """
+        预期首 token 延迟（秒）/ 成功率，越小越优先
+
+        无样本时以截止时间的一半作为先验：健康且已知较快的供应商优先，
+        但未探测过的供应商也有机会被选中。
+        """
+        ttft = provider_health.ttft_percentile(provider_id, model, 90)
+        if ttft is None:
+            ttft = settings.CHAT_ROUTING_TTFT_DEADLINE / 2
+        success_rate = provider_health.success_rate(provider_id, model)
+        if success_rate is None:
+            success_rate = 1.0
+        return ttft / max(success_rate, MIN_SUCCESS_RATE)
+
+    def get_candidates(self, user_id: str, model_class: str) -> List[RouteCandidate]:
+        """获取按优先级排序的路由候选"""
+        candidates = []
+        for provider in ModelProviders.get_providers_by_user_id(user_id, active_only=True):
+            model = self._model_for(provider, model_class)
+            if model:
+                candidates.append(RouteCandidate(provider, model, self._score(provider.id, model)))
+
+        # 分数相同时默认供应商优先
+        candidates.sort(key=lambda c: (c.score, not c.provider.is_default))
+        return candidates
+
+    async def open_stream(
+        self,
+        messages: List[BaseMessage],
+        user_id: str,
+        model_class: str,
+        ttft_deadline: Optional[float] = None
+    ) -> RoutedStream:
+        """
+        按优先级依次尝试候选，返回第一个在截止时间内输出首 token 的流
+
+        Raises:
+            NoAvailableProviderError: 无候选或全部候选失败
+        """
+        deadline = ttft_deadline or settings.CHAT_ROUTING_TTFT_DEADLINE
+        candidates = await asyncio.to_thread(self.get_candidates, user_id, model_class)
+        candidates = candidates[:settings.CHAT_ROUTING_MAX_ATTEMPTS]
+        if not candidates:
+            raise NoAvailableProviderError(model_class)
+
+        errors = []
+        for attempt, candidate in enumerate(candidates, start=1):
+            provider, model = candidate.provider, candidate.model
+            started = time.perf_counter()
+            iterator = create_chat_llm(provider, model).astream(messages).__aiter__()
+
+            try:
+                async with asyncio.timeout(deadline):
+                    first_chunk = None
+                    async for chunk in iterator:
+                        if _has_token(chunk):
+                            first_chunk = chunk
+                            break
+
+                first_token_at = time.perf_counter() if first_chunk is not None else None
+                logger.info(
+                    f"Routed '{model_class}' to {provider.provider_type}/{provider.id} ({model}), "
+                    f"attempt {attempt}, score {candidate.score:.2f}"
+                )
+                return RoutedStream(
+                    provider=provider,
+                    model=model,
+                    started=started,
+                    first_token_at=first_token_at,
+                    attempts=attempt,
+                    first_chunk=first_chunk,
+                    rest=iterator if first_chunk is not None else None,
+                )
+
+            except Exception as e:
+                if isinstance(e, TimeoutError):
+                    error = f"no first token within {deadline}s"
+                else:
+                    error = str(e) or type(e).__name__
+                logger.warning(
+                    f"Failover from {provider.provider_type}/{provider.id} ({model}): {error}"
+                )
+                errors.append(f"{provider.name}: {error}")
+                provider_health.record(
+                    provider.id, model, success=False, error=error,
+                    provider_type=provider.provider_type
+                )
+                await self._close(iterator)
+
+        raise NoAvailableProviderError(model_class, errors)
+
+    async def _close(self, iterator):
+        """关闭未完成的流，释放底层连接"""
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is None:
+            return
+        try:
+            await aclose()
+        except Exception as e:
+            logger.debug(f"Failed to close abandoned stream: {e}")
+
+
+# 单例导出
+chat_router = ChatRouter()
@@ -0,0 +1,326 @@
+"""
+Document Writing Runner
+写作主图的运行管理：持久化 checkpointer + 按 document_id 启动 / 恢复 / 查询运行状态
+
+- 每个文档使用独立的 thread（thread_id = document_id），每个 super-step 结束后写入 checkpoint
+- 并发章节中已完成的章节以 pending writes 保存，某一章节失败后恢复只会重跑未完成的章节
+- 进程重启后，未完成的运行可通过 resume 从最近完成的 super-step 继续
+
+checkpointer 后端（writing_checkpoint.backend）：
+- sqlite: langgraph-checkpoint-sqlite（本地开发）
+- mysql:  langgraph-checkpoint-mysql（生产）
+- memory: 不持久化（测试）
+"""
+
+import asyncio
+import os
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.agents.execution.concurrency import governor, RunAbortedError
+from app.agents.execution.progress import run_events
+from app.agents.tools.search.evidence_store import evidence_store
+from app.config import settings
+
+
+class WritingRunConflictError(Exception):
+    """运行状态不允许该操作（已在运行 / 已完成）"""
+
+    def __init__(self, document_id: str, status: str):
+        self.document_id = document_id
+        self.status = status
+        super().__init__(f"Document {document_id} run is {status}")
+
+
+class DocumentWritingRunner:
+    """写作主图运行管理"""
+
+    def __init__(self):
+        self._stack: Optional[AsyncExitStack] = None
+        self._graph = None
+        self._lock = asyncio.Lock()
+        self._runs: Dict[str, asyncio.Task] = {}
+        self._errors: Dict[str, str] = {}
+        self._started_at: Dict[str, int] = {}
+
+    # ============================================
+    # 初始化
+    # ============================================
+
+    async def _open_checkpointer(self, stack: AsyncExitStack):
+        backend = settings.WRITING_CHECKPOINT_BACKEND
+
+        if backend == "memory":
+            from langgraph.checkpoint.memory import MemorySaver
+            return MemorySaver()
+
+        if backend == "mysql":
+            from langgraph.checkpoint.mysql.aio import AIOMySQLSaver
+            checkpointer = await stack.enter_async_context(
+                AIOMySQLSaver.from_conn_string(settings.WRITING_CHECKPOINT_MYSQL_URL)
+            )
+        elif backend == "sqlite":
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            path = settings.WRITING_CHECKPOINT_SQLITE_PATH
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            checkpointer = await stack.enter_async_context(
+                AsyncSqliteSaver.from_conn_string(path)
+            )
+        else:
+            raise ValueError(f"Unsupported writing checkpoint backend: {backend}")
+
+        await checkpointer.setup()
+        return checkpointer
+
+    async def get_graph(self):
+        """获取带 checkpointer 的主图（首次调用时编译）"""
+        if self._graph is not None:
+            return self._graph
+
+        async with self._lock:
+            if self._graph is None:
+                from app.agents.core.publisher.writing.agent import create_main_graph
+
+                stack = AsyncExitStack()
+                try:
+                    checkpointer = await self._open_checkpointer(stack)
+                except Exception:
+                    await stack.aclose()
+                    raise
+                self._stack = stack
+                self._graph = create_main_graph(checkpointer=checkpointer)
+                logger.info(
+                    f"Document writing graph compiled with {settings.WRITING_CHECKPOINT_BACKEND} checkpointer"
+                )
+        return self._graph
+
+    def config_for(self, document_id: str) -> Dict[str, Any]:
+        """文档运行的 LangGraph 配置"""
+        return {
+            "configurable": {"thread_id": document_id},
+            "recursion_limit": settings.WRITING_RECURSION_LIMIT,
+        }
+
+    # ============================================
+    # 运行
+    # ============================================
+
+    def is_running(self, document_id: str) -> bool:
+        task = self._runs.get(document_id)
+        return task is not None and not task.done()
+
+    async def start(
+        self,
+        document_id: str,
+        inputs: Dict[str, Any],
+        llm_limit: Optional[int] = None,
+        search_limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        启动新的写作运行（后台执行）
+
+        Args:
+            llm_limit / search_limit: 覆盖该文档的 LLM / 搜索并发上限
+
+        Raises:
+            WritingRunConflictError: 该文档已在运行或已有运行记录（未完成的运行通过 resume 继续）
+        """
+        if self.is_running(document_id):
+            raise WritingRunConflictError(document_id, "running")
+        # 同一 thread 上重新输入会与已保存的章节合并，已有运行记录时不允许重新开始
+        existing = await self.get_status(document_id)
+        if existing is not None:
+            raise WritingRunConflictError(document_id, existing["status"])
+
+        inputs = {**inputs, "document_id": document_id}
+        self._launch(document_id, inputs, llm_limit, search_limit)
+        return await self.get_status(document_id)
+
+    async def resume(
+        self,
+        document_id: str,
+        llm_limit: Optional[int] = None,
+        search_limit: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        从最近完成的 super-step 恢复运行（后台执行），已完成的章节不会重新生成
+
+        Returns:
+            运行状态，没有 checkpoint 时返回 None
+
+        Raises:
+            WritingRunConflictError: 正在运行或已完成
+        """
+        status = await self.get_status(document_id)
+        if status is None:
+            return None
+        if status["status"] in ("running", "completed"):
+            raise WritingRunConflictError(document_id, status["status"])
+
+        logger.info(
+            f"Resuming document {document_id} at {status['next_nodes']} "
+            f"({len(status['completed_chapters'])} chapters already done)"
+        )
+        # 输入为 None 时 LangGraph 从 checkpoint 继续执行
+        self._launch(document_id, None, llm_limit, search_limit)
+        return await self.get_status(document_id)
+
+    def abort(self, document_id: str) -> bool:
+        """
+        中止运行：取消运行任务，进行中的 LLM / 搜索调用随之取消（已写入的 checkpoint 保留，可再恢复）
+
+        Returns:
+            是否有运行中的任务
+        """
+        if not self.is_running(document_id):
+            return False
+        self._errors[document_id] = "aborted"
+        governor.abort(document_id)
+        self._runs[document_id].cancel()
+        return True
+
+    def _launch(
+        self,
+        document_id: str,
+        inputs: Optional[Dict[str, Any]],
+        llm_limit: Optional[int] = None,
+        search_limit: Optional[int] = None
+    ):
+        self._errors.pop(document_id, None)
+        self._started_at[document_id] = int(time.time())
+        # 在返回给调用方之前打开事件通道，客户端随后订阅不会漏掉开始事件
+        run_events.open(document_id)
+        run_events.emit(document_id, "run_resumed" if inputs is None else "run_started")
+        task = asyncio.create_task(self._run(document_id, inputs, llm_limit, search_limit))
+        self._runs[document_id] = task
+        task.add_done_callback(lambda _: self._runs.pop(document_id, None))
+
+    async def _run(
+        self,
+        document_id: str,
+        inputs: Optional[Dict[str, Any]],
+        llm_limit: Optional[int],
+        search_limit: Optional[int]
+    ):
+        started = time.perf_counter()
+        completed = False
+        await asyncio.to_thread(evidence_store.open, document_id)
+        try:
+            graph = await self.get_graph()
+            # 文档内所有 LLM / 搜索调用受全局和文档并发上限约束
+            async with governor.document_scope(document_id, llm_limit, search_limit):
+                await graph.ainvoke(inputs, self.config_for(document_id))
+            snapshot = await graph.aget_state(self.config_for(document_id))
+            completed = not snapshot.next
+            elapsed = time.perf_counter() - started
+            logger.success(f"Document {document_id} writing completed in {elapsed:.1f}s")
+            run_events.emit(document_id, "run_completed", elapsed=round(elapsed, 1))
+        except asyncio.CancelledError:
+            logger.warning(f"Document {document_id} writing cancelled")
+            run_events.emit(document_id, "run_aborted")
+            raise
+        except RunAbortedError:
+            logger.warning(f"Document {document_id} writing aborted")
+            run_events.emit(document_id, "run_aborted")
+        except Exception as e:
+            self._errors[document_id] = str(e) or type(e).__name__
+            logger.exception(f"Document {document_id} writing failed, resumable from last checkpoint: {e}")
+            run_events.emit(document_id, "run_failed", error=self._errors[document_id])
+        finally:
+            # 已完成的运行不会再恢复，不保留素材文件
+            await asyncio.to_thread(evidence_store.release, document_id, completed)
+
+    # ============================================
+    # 状态
+    # ============================================
+
+    async def get_status(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取文档运行状态
+
+        status:
+            running     当前进程正在执行
+            failed      执行出错，可恢复
+            interrupted 有未完成的步骤但没有在执行（如进程重启），可恢复
+            completed   已完成
+            pending     已提交，尚未写入第一个 checkpoint
+
+        Returns:
+            状态字典，该文档从未运行过时返回 None
+        """
+        graph = await self.get_graph()
+        snapshot = await graph.aget_state(self.config_for(document_id))
+        running = self.is_running(document_id)
+
+        if not snapshot or not snapshot.config.get("configurable", {}).get("checkpoint_id"):
+            if running:
+                return self._status(document_id, "pending")
+            return None
+
+        # 已保存的章节 + 当前 super-step 中已完成（pending writes）的章节
+        completed = set((snapshot.values.get("completed_chapters") or {}).keys())
+        for task in snapshot.tasks:
+            if task.name == "chapter_subgraph" and task.result:
+                completed.update((task.result.get("completed_chapters") or {}).keys())
+
+        if running:
+            status = "running"
+        elif not snapshot.next:
+            status = "completed"
+        elif document_id in self._errors or any(t.error for t in snapshot.tasks):
+            status = "failed"
+        else:
+            status = "interrupted"
+
+        outline = snapshot.values.get("document_outline")
+        return self._status(
+            document_id,
+            status,
+            next_nodes=list(snapshot.next),
+            completed_chapters=sorted(completed),
+            total_chapters=len(outline.sections) if outline is not None else None,
+            checkpoint_id=snapshot.config["configurable"]["checkpoint_id"],
+            step=(snapshot.metadata or {}).get("step"),
+            updated_at=snapshot.created_at,
+            error=self._errors.get(document_id) or next(
+                (str(t.error) for t in snapshot.tasks if t.error), None
+            ),
+        )
+
+    def _status(self, document_id: str, status: str, **fields) -> Dict[str, Any]:
+        return {
+            "document_id": document_id,
+            "status": status,
+            "next_nodes": [],
+            "completed_chapters": [],
+            "total_chapters": None,
+            "checkpoint_id": None,
+            "step": None,
+            "updated_at": None,
+            "started_at": self._started_at.get(document_id),
+            "error": None,
+            **fields,
+        }
+
+    # ============================================
+    # 生命周期
+    # ============================================
+
+    async def stop(self):
+        """取消运行中的任务并关闭 checkpointer（已写入的 checkpoint 保留，重启后可恢复）"""
+        tasks = list(self._runs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._stack is not None:
+            await self._stack.aclose()
+            self._stack = None
+        self._graph = None
+
+
+# 单例导出
+document_writing = DocumentWritingRunner()
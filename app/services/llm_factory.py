@@ -0,0 +1,127 @@
+"""
+LLM Factory
+根据模型供应商配置创建 LangChain 聊天模型（聊天接口、健康探测等共用）
+"""
+
+from typing import Any, Dict, Optional
+
+from langchain_openai import ChatOpenAI
+from langchain_deepseek import ChatDeepSeek
+from langchain_core.language_models import BaseChatModel
+from loguru import logger
+
+from app.schemas.model_providers import ModelProviderModel
+
+
+# 未指定供应商时的默认配置（本地 Ollama）
+DEFAULT_OLLAMA_BASE_URL = "http://localhost:11434"
+DEFAULT_OLLAMA_MODEL = "qwen2.5:32b"
+
+# 各供应商的默认端点和模型
+DEFAULT_BASE_URLS = {
+    "deepseek": "https://api.deepseek.com/v1",
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com/v1",
+}
+
+DEFAULT_MODELS = {
+    "deepseek": "deepseek-chat",
+    "openai": "gpt-4o",
+    "anthropic": "claude-3-opus-20240229",
+}
+
+
+def resolve_model_name(
+    provider: Optional[ModelProviderModel], model_name: Optional[str] = None
+) -> str:
+    """解析实际使用的模型名称"""
+    if model_name:
+        return model_name
+    if provider is None:
+        return DEFAULT_OLLAMA_MODEL
+
+    config = provider.provider_config or {}
+    if provider.provider_type == "ollama":
+        return config.get("model_name") or DEFAULT_OLLAMA_MODEL
+    return config.get("model_name") or DEFAULT_MODELS.get(provider.provider_type, DEFAULT_OLLAMA_MODEL)
+
+
+def resolve_llm_config(
+    provider: Optional[ModelProviderModel], model_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    解析供应商的 OpenAI 兼容调用参数
+
+    Returns:
+        {"model", "base_url", "api_key", "extra_kwargs"}
+    """
+    llm_model = resolve_model_name(provider, model_name)
+    llm_base_url = f"{DEFAULT_OLLAMA_BASE_URL}/v1"
+    llm_api_key = "ollama"
+    extra_kwargs: Dict[str, Any] = {}
+
+    if provider is None:
+        pass
+    elif provider.provider_type == "ollama":
+        llm_base_url = (provider.base_url or DEFAULT_OLLAMA_BASE_URL) + "/v1"
+    elif provider.provider_type in DEFAULT_BASE_URLS:
+        llm_base_url = provider.base_url or DEFAULT_BASE_URLS[provider.provider_type]
+        llm_api_key = provider.api_key or ""
+        # DeepSeek Reasoner 模型需要特殊处理
+        if provider.provider_type == "deepseek" and llm_model in ["deepseek-reasoner"]:
+            extra_kwargs["model_kwargs"] = {"stream_options": {"include_usage": True}}
+    else:
+        # 其他供应商使用通用 OpenAI 兼容方式
+        if provider.base_url:
+            llm_base_url = provider.base_url
+        if provider.api_key:
+            llm_api_key = provider.api_key
+
+    return {
+        "model": llm_model,
+        "base_url": llm_base_url,
+        "api_key": llm_api_key,
+        "extra_kwargs": extra_kwargs,
+    }
+
+
+def create_chat_llm(
+    provider: Optional[ModelProviderModel],
+    model_name: Optional[str] = None,
+    temperature: float = 0.7,
+    streaming: bool = True,
+    **kwargs
+) -> BaseChatModel:
+    """
+    根据供应商配置创建聊天模型
+
+    DeepSeek 使用专门的 ChatDeepSeek 以获得 reasoning_content 支持，
+    其他供应商使用 OpenAI 兼容接口。
+
+    Args:
+        provider: 供应商配置（为空时使用本地 Ollama 默认配置）
+        model_name: 模型名称（为空时使用供应商默认模型）
+        temperature: 温度参数
+        streaming: 是否流式输出
+        **kwargs: 透传给模型构造函数的额外参数（如 max_tokens, timeout）
+    """
+    config = resolve_llm_config(provider, model_name)
+
+    if provider and provider.provider_type == "deepseek":
+        logger.debug(f"Using ChatDeepSeek for model={config['model']}")
+        return ChatDeepSeek(
+            model=config["model"],
+            api_key=config["api_key"],
+            streaming=streaming,
+            **kwargs
+        )
+
+    return ChatOpenAI(
+        model=config["model"],
+        base_url=config["base_url"],
+        api_key=config["api_key"],
+        temperature=temperature,
+        streaming=streaming,
+        **config["extra_kwargs"],
+        **kwargs
+    )
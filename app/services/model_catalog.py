@@ -0,0 +1,174 @@
+"""
+Model Catalog Service
+模型目录服务：后台按供应商 TTL 同步可用模型列表，接口直接读取 model_catalog 表
+
+- 同一供应商的并发刷新请求合并为一次厂商 API 调用
+- 厂商 API 不可用时保留上一次成功获取的列表，仅记录失败原因
+- 目录为空（首次访问）时同步拉取一次，之后过期数据直接返回并在后台刷新
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.config import settings
+from app.curd.model_catalog import ModelCatalogs
+from app.schemas.model_providers import AvailableModelsResponse, ModelProviderModel
+from app.services.model_fetcher import model_fetcher
+
+
+class ModelCatalogService:
+    """模型目录服务"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+    # ============================================
+    # 读取
+    # ============================================
+
+    def ttl_for(self, provider_type: str) -> int:
+        """获取供应商类型的目录 TTL（秒）"""
+        return settings.MODEL_CATALOG_TTL.get(provider_type, settings.MODEL_CATALOG_DEFAULT_TTL)
+
+    async def get_models(
+        self, provider: ModelProviderModel, force_refresh: bool = False
+    ) -> AvailableModelsResponse:
+        """
+        获取供应商的可用模型列表（优先读取目录）
+
+        Args:
+            provider: 供应商配置
+            force_refresh: 是否强制从厂商 API 重新拉取
+        """
+        if force_refresh or provider.catalog_refreshed_at is None:
+            result = await self.refresh(provider)
+            if result.success or provider.catalog_refreshed_at is None:
+                return result
+            # 刷新失败但有历史目录时，返回历史目录
+
+        models = await asyncio.to_thread(ModelCatalogs.get_models, provider.id)
+
+        checked_at = provider.catalog_checked_at or provider.catalog_refreshed_at
+        is_stale = checked_at <= int(time.time()) - self.ttl_for(provider.provider_type)
+        if is_stale:
+            self.schedule_refresh(provider)
+
+        if provider.catalog_error:
+            message = f"使用缓存的模型列表（最近一次刷新失败: {provider.catalog_error}）"
+        else:
+            message = f"找到 {len(models)} 个可用模型"
+
+        return AvailableModelsResponse(
+            success=True,
+            message=message,
+            models=models,
+            refreshed_at=provider.catalog_refreshed_at,
+            is_stale=is_stale,
+        )
+
+    def get_context_length(self, provider_id: str, model_id: str) -> Optional[int]:
+        """获取模型上下文长度（供 token 预算等子系统使用，未知时返回 None）"""
+        return ModelCatalogs.get_context_length(provider_id, model_id)
+
+    # ============================================
+    # 刷新
+    # ============================================
+
+    async def refresh(self, provider: ModelProviderModel) -> AvailableModelsResponse:
+        """从厂商 API 刷新目录（同一供应商的并发请求共享同一次拉取）"""
+        task = self._inflight.get(provider.id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(provider))
+            self._inflight[provider.id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(provider.id, None))
+
+        return await asyncio.shield(task)
+
+    def schedule_refresh(self, provider: ModelProviderModel):
+        """在后台刷新目录（已有刷新进行中时不重复发起）"""
+        if provider.id not in self._inflight:
+            task = asyncio.create_task(self._refresh(provider))
+            self._inflight[provider.id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(provider.id, None))
+
+    async def _refresh(self, provider: ModelProviderModel) -> AvailableModelsResponse:
+        started = time.perf_counter()
+        result = await model_fetcher.fetch_models(
+            provider_type=provider.provider_type,
+            api_key=provider.api_key,
+            base_url=provider.base_url,
+            provider_config=provider.provider_config
+        )
+
+        if result.success:
+            await asyncio.to_thread(ModelCatalogs.replace_models, provider.id, result.models)
+            result.refreshed_at = int(time.time())
+        else:
+            await asyncio.to_thread(ModelCatalogs.mark_refresh_failed, provider.id, result.message)
+            logger.warning(f"Model catalog refresh failed for provider {provider.id}: {result.message}")
+
+        logger.debug(
+            f"Model catalog refresh for {provider.provider_type}/{provider.id} "
+            f"took {time.perf_counter() - started:.2f}s"
+        )
+        return result
+
+    async def refresh_due_providers(self) -> int:
+        """刷新所有超过 TTL 的供应商目录，返回刷新的供应商数量"""
+        providers = await asyncio.to_thread(
+            ModelCatalogs.get_providers_due_for_refresh,
+            settings.MODEL_CATALOG_TTL,
+            settings.MODEL_CATALOG_DEFAULT_TTL
+        )
+        if not providers:
+            return 0
+
+        semaphore = asyncio.Semaphore(settings.MODEL_CATALOG_REFRESH_CONCURRENCY)
+
+        async def refresh_one(provider: ModelProviderModel):
+            async with semaphore:
+                await self.refresh(provider)
+
+        await asyncio.gather(*(refresh_one(p) for p in providers), return_exceptions=True)
+        return len(providers)
+
+    # ============================================
+    # 后台任务
+    # ============================================
+
+    async def _run_refresher(self):
+        interval = settings.MODEL_CATALOG_REFRESH_INTERVAL
+        logger.info(f"Model catalog refresher started (interval={interval}s)")
+        while True:
+            try:
+                count = await self.refresh_due_providers()
+                if count:
+                    logger.info(f"Model catalog refresher refreshed {count} providers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Model catalog refresher error: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self):
+        """启动后台刷新任务（需在事件循环中调用）"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._run_refresher())
+
+    async def stop(self):
+        """停止后台刷新任务"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+# 单例导出
+model_catalog = ModelCatalogService()
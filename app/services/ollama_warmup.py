@@ -0,0 +1,301 @@
+"""
+Ollama Warm-up
+Ollama 模型预加载与常驻管理
+
+- 预加载：向 /api/generate 发送空 prompt，让 Ollama 把权重加载到内存/显存，
+  首个聊天请求不再等待冷启动（同一模型的并发预加载合并为一次）
+- keep_alive：聊天走 OpenAI 兼容接口无法携带 keep_alive，因此记录模型使用情况，
+  后台定期为高频模型续期（更长的 keep_alive），普通模型按默认时长自然卸载
+- 状态：合并本地记录和 Ollama /api/ps 报告的常驻模型，按模型返回加载状态
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.curd.model_providers import ModelProviders
+from app.schemas.model_providers import ModelProviderModel, OllamaModelLoadState
+from app.services.llm_factory import DEFAULT_OLLAMA_BASE_URL, resolve_model_name
+
+
+@dataclass
+class _ModelState:
+    """单个模型的本地记录"""
+    state: str = "unloaded"
+    keep_alive: Optional[str] = None
+    loaded_at: Optional[int] = None
+    load_duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    uses: Deque[float] = field(default_factory=deque)
+
+
+class OllamaWarmupManager:
+    """Ollama 模型预加载与 keep_alive 管理"""
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], _ModelState] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._keeper: Optional[asyncio.Task] = None
+
+    def _get_state(self, base_url: str, model: str) -> _ModelState:
+        key = (base_url.rstrip("/"), model)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _ModelState()
+        return state
+
+    # ============================================
+    # 使用记录
+    # ============================================
+
+    def touch(self, base_url: str, model: str):
+        """记录一次模型使用（由聊天接口调用）"""
+        state = self._get_state(base_url, model)
+        now = time.time()
+        state.uses.append(now)
+        self._trim_uses(state, now)
+
+    def _trim_uses(self, state: _ModelState, now: float):
+        cutoff = now - settings.OLLAMA_HOT_WINDOW
+        while state.uses and state.uses[0] < cutoff:
+            state.uses.popleft()
+
+    def is_hot(self, base_url: str, model: str) -> bool:
+        """统计窗口内使用次数是否达到高频阈值"""
+        state = self._get_state(base_url, model)
+        self._trim_uses(state, time.time())
+        return len(state.uses) >= settings.OLLAMA_HOT_THRESHOLD
+
+    def keep_alive_for(self, base_url: str, model: str) -> str:
+        """根据使用频率选择 keep_alive"""
+        if self.is_hot(base_url, model):
+            return settings.OLLAMA_HOT_KEEP_ALIVE
+        return settings.OLLAMA_KEEP_ALIVE
+
+    # ============================================
+    # 加载 / 卸载
+    # ============================================
+
+    async def preload(
+        self, base_url: str, model: str, keep_alive: Optional[str] = None
+    ) -> OllamaModelLoadState:
+        """
+        预加载模型（同一模型的并发请求共享同一次加载）
+
+        Args:
+            base_url: Ollama 服务地址
+            model: 模型名称
+            keep_alive: 常驻时长（为空时按使用频率选择）
+        """
+        base_url = base_url.rstrip("/")
+        key = (base_url, model)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._load(base_url, model, keep_alive or self.keep_alive_for(base_url, model))
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        await asyncio.shield(task)
+        return (await self.get_status(base_url, [model]))[0]
+
+    async def _load(self, base_url: str, model: str, keep_alive: str):
+        state = self._get_state(base_url, model)
+        if state.state != "loaded":
+            state.state = "loading"
+        started = time.perf_counter()
+
+        try:
+            async with httpx.AsyncClient(timeout=settings.OLLAMA_LOAD_TIMEOUT) as client:
+                response = await client.post(
+                    f"{base_url}/api/generate",
+                    json={"model": model, "prompt": "", "keep_alive": keep_alive, "stream": False}
+                )
+                response.raise_for_status()
+
+            state.state = "loaded"
+            state.keep_alive = keep_alive
+            state.loaded_at = int(time.time())
+            state.load_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            state.error = None
+            logger.info(
+                f"Ollama model {model} loaded at {base_url} "
+                f"in {state.load_duration_ms} ms (keep_alive={keep_alive})"
+            )
+
+        except Exception as e:
+            state.state = "failed"
+            state.error = str(e) or type(e).__name__
+            logger.warning(f"Failed to preload Ollama model {model} at {base_url}: {state.error}")
+
+    async def unload(self, base_url: str, model: str) -> bool:
+        """立即卸载模型（keep_alive=0）"""
+        base_url = base_url.rstrip("/")
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(
+                    f"{base_url}/api/generate",
+                    json={"model": model, "prompt": "", "keep_alive": 0, "stream": False}
+                )
+                response.raise_for_status()
+
+            state = self._get_state(base_url, model)
+            state.state = "unloaded"
+            state.keep_alive = None
+            state.loaded_at = None
+            return True
+
+        except Exception as e:
+            logger.warning(f"Failed to unload Ollama model {model} at {base_url}: {e}")
+            return False
+
+    async def preload_provider(
+        self, provider: ModelProviderModel, model_name: Optional[str] = None
+    ) -> OllamaModelLoadState:
+        """预加载供应商配置的模型（或指定模型）"""
+        base_url = provider.base_url or DEFAULT_OLLAMA_BASE_URL
+        return await self.preload(base_url, resolve_model_name(provider, model_name))
+
+    # ============================================
+    # 状态
+    # ============================================
+
+    async def _running_models(self, base_url: str) -> Optional[Dict[str, dict]]:
+        """查询 Ollama 当前常驻的模型（/api/ps），连接失败时返回 None"""
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(f"{base_url}/api/ps")
+                response.raise_for_status()
+                return {m.get("name"): m for m in response.json().get("models", [])}
+
+        except Exception as e:
+            logger.debug(f"Failed to query running Ollama models at {base_url}: {e}")
+            return None
+
+    async def get_status(
+        self, base_url: str, models: Optional[List[str]] = None
+    ) -> List[OllamaModelLoadState]:
+        """
+        获取模型加载状态
+
+        Args:
+            base_url: Ollama 服务地址
+            models: 要查询的模型（为空时返回本地记录和 Ollama 常驻的全部模型）
+        """
+        base_url = base_url.rstrip("/")
+        running = await self._running_models(base_url)
+
+        if models is None:
+            models = sorted(
+                {m for (url, m) in self._states if url == base_url} | set(running or {})
+            )
+
+        now = time.time()
+        result = []
+        for model in models:
+            state = self._get_state(base_url, model)
+            self._trim_uses(state, now)
+            ps = (running or {}).get(model) or (running or {}).get(f"{model}:latest")
+
+            # 以 Ollama 的实际状态为准：已过期卸载的模型更新为 unloaded
+            if running is not None and state.state == "loaded" and ps is None:
+                state.state = "unloaded"
+                state.loaded_at = None
+            elif ps is not None and state.state in ("unloaded", "failed"):
+                state.state = "loaded"
+                state.error = None
+
+            result.append(OllamaModelLoadState(
+                model=model,
+                base_url=base_url,
+                state=state.state,
+                keep_alive=state.keep_alive,
+                is_hot=len(state.uses) >= settings.OLLAMA_HOT_THRESHOLD,
+                use_count=len(state.uses),
+                last_used_at=int(state.uses[-1]) if state.uses else None,
+                loaded_at=state.loaded_at,
+                expires_at=ps.get("expires_at") if ps else None,
+                size_vram=ps.get("size_vram") if ps else None,
+                load_duration_ms=state.load_duration_ms,
+                error=state.error,
+            ))
+        return result
+
+    # ============================================
+    # 后台任务
+    # ============================================
+
+    async def preload_active_providers(self) -> int:
+        """预加载所有启用的 Ollama 供应商模型，返回模型数量"""
+        providers = await asyncio.to_thread(ModelProviders.get_active_providers)
+        targets = {
+            ((p.base_url or DEFAULT_OLLAMA_BASE_URL).rstrip("/"), resolve_model_name(p))
+            for p in providers
+            if p.provider_type == "ollama"
+        }
+        # 同一 Ollama 实例顺序加载，避免同时加载多个模型争抢显存
+        by_url: Dict[str, List[str]] = {}
+        for base_url, model in targets:
+            by_url.setdefault(base_url, []).append(model)
+
+        async def load_all(base_url: str, models: List[str]):
+            for model in models:
+                await self.preload(base_url, model)
+
+        await asyncio.gather(*(load_all(u, m) for u, m in by_url.items()), return_exceptions=True)
+        return len(targets)
+
+    async def refresh_hot_models(self) -> int:
+        """为高频模型续期 keep_alive，返回续期数量"""
+        refreshed = 0
+        for (base_url, model) in list(self._states):
+            if self.is_hot(base_url, model):
+                await self.preload(base_url, model, settings.OLLAMA_HOT_KEEP_ALIVE)
+                refreshed += 1
+        return refreshed
+
+    async def _run_keeper(self):
+        if settings.OLLAMA_PRELOAD_ON_STARTUP:
+            try:
+                count = await self.preload_active_providers()
+                logger.info(f"Preloaded {count} Ollama models")
+            except Exception as e:
+                logger.exception(f"Ollama preload error: {e}")
+
+        interval = settings.OLLAMA_KEEP_ALIVE_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                count = await self.refresh_hot_models()
+                if count:
+                    logger.debug(f"Refreshed keep_alive for {count} hot Ollama models")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ollama keep-alive refresh error: {e}")
+
+    def start(self):
+        """启动预加载和 keep_alive 续期任务（需在事件循环中调用）"""
+        if self._keeper is None or self._keeper.done():
+            self._keeper = asyncio.create_task(self._run_keeper())
+
+    async def stop(self):
+        """停止后台任务"""
+        if self._keeper is not None:
+            self._keeper.cancel()
+            try:
+                await self._keeper
+            except asyncio.CancelledError:
+                pass
+            self._keeper = None
+
+
+# 单例导出
+ollama_warmup = OllamaWarmupManager()
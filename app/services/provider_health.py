@@ -0,0 +1,266 @@
+"""
+Provider Health Monitor
+模型供应商健康监控：后台定期用最小请求探测所有启用的供应商，
+在滚动窗口内统计首 token 延迟（TTFT）和生成速度（tokens/s）分位数，并更新 connection_status。
+
+样本来源：
+- 后台探测（probe）
+- 真实聊天流量（record，由聊天接口上报）
+
+统计数据保存在进程内存中，供路由选择和 API 查询使用。
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+from loguru import logger
+
+from app.config import settings
+from app.curd.model_providers import ModelProviders
+from app.schemas.model_providers import ModelProviderModel
+from app.services.llm_factory import create_chat_llm, resolve_model_name
+
+PROBE_PROMPT = "ping"
+PROBE_MAX_TOKENS = 16
+
+
+@dataclass
+class HealthSample:
+    """单次调用的延迟样本"""
+    timestamp: float
+    success: bool
+    ttft: Optional[float] = None            # 首 token 延迟（秒）
+    tokens_per_second: Optional[float] = None
+    source: str = "probe"                   # probe / traffic
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近秩法计算分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ProviderHealthMonitor:
+    """供应商健康监控"""
+
+    def __init__(self, window_size: int = 100, window_seconds: int = 3600):
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self._samples: Dict[Tuple[str, str], Deque[HealthSample]] = {}
+        self._provider_types: Dict[str, str] = {}
+        self._monitor: Optional[asyncio.Task] = None
+
+    # ============================================
+    # 样本记录
+    # ============================================
+
+    def record(
+        self,
+        provider_id: str,
+        model: str,
+        success: bool,
+        ttft: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        source: str = "traffic",
+        error: Optional[str] = None,
+        provider_type: Optional[str] = None
+    ):
+        """记录一次调用的延迟样本"""
+        key = (provider_id, model)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window_size)
+        samples.append(HealthSample(
+            timestamp=time.time(),
+            success=success,
+            ttft=ttft,
+            tokens_per_second=tokens_per_second,
+            source=source,
+            error=error,
+        ))
+        if provider_type:
+            self._provider_types[provider_id] = provider_type
+
+    def _window(self, key: Tuple[str, str]) -> List[HealthSample]:
+        """获取滚动窗口内的样本"""
+        cutoff = time.time() - self.window_seconds
+        return [s for s in self._samples.get(key, ()) if s.timestamp >= cutoff]
+
+    # ============================================
+    # 统计
+    # ============================================
+
+    def get_stats(self, provider_id: str, model: Optional[str] = None) -> List[Dict]:
+        """获取供应商（可选指定模型）在滚动窗口内的延迟统计"""
+        return [
+            self._summarize(key)
+            for key in list(self._samples)
+            if key[0] == provider_id and (model is None or key[1] == model)
+        ]
+
+    def get_all_stats(self, provider_ids: Optional[List[str]] = None) -> List[Dict]:
+        """获取所有（或指定）供应商的延迟统计"""
+        return [
+            self._summarize(key)
+            for key in list(self._samples)
+            if provider_ids is None or key[0] in provider_ids
+        ]
+
+    def ttft_percentile(self, provider_id: str, model: str, pct: float = 90) -> Optional[float]:
+        """获取 TTFT 分位数（秒），无样本时返回 None"""
+        return percentile(
+            [s.ttft for s in self._window((provider_id, model)) if s.success and s.ttft is not None],
+            pct
+        )
+
+    def success_rate(self, provider_id: str, model: str) -> Optional[float]:
+        """获取滚动窗口内的成功率，无样本时返回 None"""
+        samples = self._window((provider_id, model))
+        if not samples:
+            return None
+        return sum(1 for s in samples if s.success) / len(samples)
+
+    def _summarize(self, key: Tuple[str, str]) -> Dict:
+        provider_id, model = key
+        samples = self._window(key)
+        ok = [s for s in samples if s.success]
+        ttfts = [s.ttft * 1000 for s in ok if s.ttft is not None]
+        speeds = [s.tokens_per_second for s in ok if s.tokens_per_second is not None]
+        last = samples[-1] if samples else None
+        last_error = next((s.error for s in reversed(samples) if not s.success), None)
+
+        return {
+            "provider_id": provider_id,
+            "provider_type": self._provider_types.get(provider_id),
+            "model": model,
+            "samples": len(samples),
+            "success_rate": round(len(ok) / len(samples), 4) if samples else None,
+            "ttft_ms_p50": percentile(ttfts, 50),
+            "ttft_ms_p90": percentile(ttfts, 90),
+            "ttft_ms_p99": percentile(ttfts, 99),
+            "tokens_per_second_p10": percentile(speeds, 10),
+            "tokens_per_second_p50": percentile(speeds, 50),
+            "tokens_per_second_p90": percentile(speeds, 90),
+            "last_sample_at": int(last.timestamp) if last else None,
+            "last_error": last_error,
+        }
+
+    # ============================================
+    # 探测
+    # ============================================
+
+    async def probe(self, provider: ModelProviderModel, model_name: Optional[str] = None) -> HealthSample:
+        """
+        用最小请求探测供应商，记录样本并更新 connection_status
+
+        Args:
+            provider: 供应商配置
+            model_name: 探测的模型（为空时使用供应商默认模型）
+        """
+        model = resolve_model_name(provider, model_name)
+        llm = create_chat_llm(
+            provider,
+            model,
+            temperature=0,
+            max_tokens=PROBE_MAX_TOKENS,
+            timeout=settings.PROVIDER_HEALTH_PROBE_TIMEOUT
+        )
+
+        started = time.perf_counter()
+        first_token_at = None
+        chunks = 0
+        try:
+            async with asyncio.timeout(settings.PROVIDER_HEALTH_PROBE_TIMEOUT):
+                async for chunk in llm.astream([HumanMessage(content=PROBE_PROMPT)]):
+                    if chunk.content or chunk.additional_kwargs.get("reasoning_content"):
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        chunks += 1
+
+            finished = time.perf_counter()
+            ttft = (first_token_at or finished) - started
+            generation_time = finished - (first_token_at or finished)
+            tps = (chunks - 1) / generation_time if chunks > 1 and generation_time > 0 else None
+
+            sample = HealthSample(time.time(), True, ttft, tps, source="probe")
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.warning(f"Health probe failed for {provider.provider_type}/{provider.id} ({model}): {error}")
+            sample = HealthSample(time.time(), False, source="probe", error=error)
+
+        self.record(
+            provider.id, model, sample.success, sample.ttft, sample.tokens_per_second,
+            source="probe", error=sample.error, provider_type=provider.provider_type
+        )
+        await asyncio.to_thread(
+            ModelProviders.update_connection_status,
+            provider.id,
+            "connected" if sample.success else "failed"
+        )
+        return sample
+
+    async def probe_all(self) -> int:
+        """探测所有启用的供应商，返回探测数量"""
+        providers = await asyncio.to_thread(ModelProviders.get_active_providers)
+        if not providers:
+            return 0
+
+        semaphore = asyncio.Semaphore(settings.PROVIDER_HEALTH_CONCURRENCY)
+
+        async def probe_one(provider: ModelProviderModel):
+            async with semaphore:
+                await self.probe(provider)
+
+        await asyncio.gather(*(probe_one(p) for p in providers), return_exceptions=True)
+        return len(providers)
+
+    # ============================================
+    # 后台任务
+    # ============================================
+
+    async def _run_monitor(self):
+        interval = settings.PROVIDER_HEALTH_INTERVAL
+        logger.info(f"Provider health monitor started (interval={interval}s)")
+        while True:
+            try:
+                count = await self.probe_all()
+                logger.debug(f"Provider health monitor probed {count} providers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Provider health monitor error: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self):
+        """启动后台探测任务（需在事件循环中调用）"""
+        if not settings.PROVIDER_HEALTH_ENABLED:
+            logger.info("Provider health monitor disabled")
+            return
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._run_monitor())
+
+    async def stop(self):
+        """停止后台探测任务"""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+
+# 单例导出
+provider_health = ProviderHealthMonitor(
+    window_size=settings.PROVIDER_HEALTH_WINDOW_SIZE,
+    window_seconds=settings.PROVIDER_HEALTH_WINDOW_SECONDS
+)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   report_content.py
+@Desc    :   报告内容分块服务 - 章节切分、内容哈希、按版本缓存的 Markdown 组装
+
+报告正文按章节切分为有序的内容块，每个块按 sha256 内容哈希寻址：
+- 写入时只存储哈希尚不存在的块（未变更的章节不会被重写）
+- 报告和版本只记录章节清单 chapter_manifest: [{key, title, hash, word_count}]
+- 完整 Markdown 在读取时按清单惰性组装，并按 (report_id, version) 缓存
+"""
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+
+# 章节之间的分隔符（组装时使用）
+CHAPTER_SEPARATOR = "\n\n"
+
+# 标题行（1-6 级）；章节切分只使用 CHAPTER_MAX_LEVEL 级以内的标题
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+CHAPTER_MAX_LEVEL = 3
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+
+def hash_block(content: str) -> str:
+    """计算内容块的 sha256 哈希"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def count_words(content: str) -> int:
+    """字数统计（与报告表保持一致：按字符数计）"""
+    return len(content) if content else 0
+
+
+def scan_headings(lines: List[str]) -> List[Tuple[int, int, str]]:
+    """扫描代码块之外的标题行，返回 [(行号, 级别, 标题)]"""
+    headings = []
+    in_fence = False
+    for idx, line in enumerate(lines):
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match:
+            headings.append((idx, len(match.group(1)), match.group(2).strip()))
+    return headings
+
+
+def split_markdown_chapters(content: str) -> List[Dict[str, str]]:
+    """
+    将 Markdown 正文切分为章节块
+
+    切分级别取出现至少两次的最浅标题级别（# / ## / ###），
+    例如 "# 标题" 只出现一次而 "## 章节" 出现多次时按 "##" 切分，
+    第一个章节标题之前的内容（文档标题、引言）作为独立的前言块。
+
+    Args:
+        content: 完整 Markdown 内容
+
+    Returns:
+        [{"title": str, "content": str}]，content 已去除首尾空行
+    """
+    if not content or not content.strip():
+        return []
+
+    lines = content.split("\n")
+    headings = [heading for heading in scan_headings(lines) if heading[1] <= CHAPTER_MAX_LEVEL]
+
+    split_level = None
+    for level in range(1, CHAPTER_MAX_LEVEL + 1):
+        if sum(1 for _, lvl, _ in headings if lvl == level) >= 2:
+            split_level = level
+            break
+
+    if split_level is None:
+        title = headings[0][2] if headings else ""
+        return [{"title": title, "content": content.strip("\n")}]
+
+    boundaries = [(idx, title) for idx, lvl, title in headings if lvl == split_level]
+
+    chapters = []
+    first_idx = boundaries[0][0]
+    preamble = "\n".join(lines[:first_idx]).strip("\n")
+    if preamble.strip():
+        preamble_heading = next((t for i, _, t in headings if i < first_idx), "")
+        chapters.append({"title": preamble_heading, "content": preamble})
+
+    for pos, (start, title) in enumerate(boundaries):
+        end = boundaries[pos + 1][0] if pos + 1 < len(boundaries) else len(lines)
+        block = "\n".join(lines[start:end]).strip("\n")
+        chapters.append({"title": title, "content": block})
+
+    return chapters
+
+
+def extract_chapter_title(content: str) -> Optional[str]:
+    """提取章节块的首个标题"""
+    headings = [h for h in scan_headings(content.split("\n")) if h[1] <= CHAPTER_MAX_LEVEL] if content else []
+    return headings[0][2] if headings else None
+
+
+def build_manifest(
+    chapters: List[Dict[str, str]],
+    previous_manifest: Optional[List[Dict]] = None
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    根据章节块构建章节清单
+
+    章节 key 在编辑之间保持稳定：标题与旧清单中某一章节相同时复用其 key，
+    否则生成新的 key。
+
+    Args:
+        chapters: split_markdown_chapters 的输出
+        previous_manifest: 旧章节清单（用于复用 key）
+
+    Returns:
+        (manifest, blocks)，blocks 为 {hash: content}
+    """
+    unused_keys: Dict[str, List[str]] = {}
+    for entry in previous_manifest or []:
+        unused_keys.setdefault(entry.get("title", ""), []).append(entry["key"])
+
+    manifest = []
+    blocks: Dict[str, str] = {}
+    for chapter in chapters:
+        block_hash = hash_block(chapter["content"])
+        candidates = unused_keys.get(chapter["title"])
+        key = candidates.pop(0) if candidates else uuid.uuid4().hex[:8]
+
+        manifest.append({
+            "key": key,
+            "title": chapter["title"],
+            "hash": block_hash,
+            "word_count": count_words(chapter["content"]),
+        })
+        blocks[block_hash] = chapter["content"]
+
+    return manifest, blocks
+
+
+def assemble_markdown(manifest: List[Dict], blocks: Dict[str, str]) -> str:
+    """按清单顺序组装完整 Markdown"""
+    return CHAPTER_SEPARATOR.join(blocks[entry["hash"]] for entry in manifest)
+
+
+def manifest_word_count(manifest: List[Dict]) -> int:
+    """根据清单汇总字数（无需扫描完整正文）"""
+    return sum(entry.get("word_count", 0) for entry in manifest)
+
+
+class ReportCache:
+    """
+    按报告分区的进程内 LRU 缓存
+
+    以 (report_id, key) 为键，key 为版本号或版本号组合：同一版本的内容不可变，
+    因此缓存无需失效，只需按容量淘汰；删除报告时清理该报告的全部条目。
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, report_id: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry_key = (report_id, key)
+            value = self._entries.get(entry_key)
+            if value is not None:
+                self._entries.move_to_end(entry_key)
+            return value
+
+    def put(self, report_id: str, key: Hashable, value: Any):
+        with self._lock:
+            entry_key = (report_id, key)
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_report(self, report_id: str):
+        """删除报告时清理其所有条目"""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == report_id]:
+                del self._entries[entry_key]
+
+
+# 全局单例：组装后的 Markdown，键为 (report_id, version_number)
+report_content_cache = ReportCache(max_entries=settings.REPORT_CONTENT_CACHE_SIZE)
+
+# 全局单例：版本差异结果，键为 (report_id, (from, to, granularity, format))
+report_diff_cache = ReportCache(max_entries=settings.REPORT_DIFF_CACHE_SIZE)
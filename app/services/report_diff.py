@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   report_diff.py
+@Desc    :   报告版本差异服务 - 服务端计算两个版本之间的行级 / 段落级差异
+
+- 章节对齐：优先按章节 key 对齐，其次按标题对齐；内容哈希相同的章节直接判定为未变更，
+  既不读取章节块也不参与 diff，大文档中只有被修改的章节会计算差异
+- 输出格式：结构化 JSON（按章节列出操作）或 unified diff 文本
+- 版本快照不可变，结果按 (report_id, from, to, granularity, format) 缓存
+"""
+import difflib
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from app.curd.reports import ReportVersions
+from app.services.report_content import hash_block, split_markdown_chapters, report_diff_cache
+
+GRANULARITIES = ("line", "paragraph")
+FORMATS = ("json", "unified")
+
+PARAGRAPH_SEPARATOR = re.compile(r"\n\s*\n")
+
+
+def split_units(text: str, granularity: str) -> List[str]:
+    """按粒度将文本切分为比较单元"""
+    if not text:
+        return []
+    if granularity == "paragraph":
+        return [p.strip("\n") for p in PARAGRAPH_SEPARATOR.split(text) if p.strip()]
+    return text.split("\n")
+
+
+def _snapshot_chapters(version) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    将版本快照转为章节列表 [{key, title, hash}]
+
+    分块存储的版本直接使用章节清单（正文稍后按需读取）；
+    整篇存储的旧版本在内存中切分，key 为空，块内容随结果一起返回。
+    """
+    if version.chapter_manifest is not None:
+        return list(version.chapter_manifest), {}
+
+    chapters, blocks = [], {}
+    for chapter in split_markdown_chapters(version.content or ""):
+        block_hash = hash_block(chapter["content"])
+        chapters.append({"key": None, "title": chapter["title"], "hash": block_hash})
+        blocks[block_hash] = chapter["content"]
+    return chapters, blocks
+
+
+def _align_chapters(old: List[Dict], new: List[Dict]) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
+    """
+    对齐两个版本的章节，返回 [(old_entry | None, new_entry | None)]
+
+    按新版本顺序输出，已删除的章节追加在末尾。
+    """
+    unmatched_old = list(range(len(old)))
+    pairs: List[List[Optional[Dict]]] = [[None, entry] for entry in new]
+
+    # 第一轮：按 key 对齐
+    old_by_key = {entry["key"]: i for i, entry in enumerate(old) if entry.get("key")}
+    for pair in pairs:
+        key = pair[1].get("key")
+        if key and key in old_by_key and old_by_key[key] in unmatched_old:
+            pair[0] = old[old_by_key[key]]
+            unmatched_old.remove(old_by_key[key])
+
+    # 第二轮：按标题对齐
+    for pair in pairs:
+        if pair[0] is not None:
+            continue
+        match = next((i for i in unmatched_old if old[i]["title"] == pair[1]["title"]), None)
+        if match is not None:
+            pair[0] = old[match]
+            unmatched_old.remove(match)
+
+    return [tuple(pair) for pair in pairs] + [(old[i], None) for i in unmatched_old]
+
+
+def _diff_ops(old_units: List[str], new_units: List[str]) -> Tuple[List[Dict], int, int]:
+    """计算结构化操作列表，equal 段只返回单元数量以减少传输"""
+    ops, insertions, deletions = [], 0, 0
+    matcher = difflib.SequenceMatcher(None, old_units, new_units)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append({"op": "equal", "count": i2 - i1})
+            continue
+        op = {"op": tag}
+        if tag in ("delete", "replace"):
+            op["old"] = old_units[i1:i2]
+            deletions += i2 - i1
+        if tag in ("insert", "replace"):
+            op["new"] = new_units[j1:j2]
+            insertions += j2 - j1
+        ops.append(op)
+    return ops, insertions, deletions
+
+
+def diff_versions(
+    report_id: str,
+    from_version: int,
+    to_version: int,
+    granularity: str = "line",
+    output_format: str = "json",
+    context_lines: int = 3
+) -> Optional[Union[Dict[str, Any], str]]:
+    """
+    计算两个版本之间的差异
+
+    Args:
+        report_id: 报告ID
+        from_version: 旧版本号
+        to_version: 新版本号
+        granularity: 比较粒度 line / paragraph
+        output_format: json（结构化）/ unified（unified diff 文本）
+        context_lines: unified 格式的上下文行数
+
+    Returns:
+        结构化差异 dict 或 unified diff 文本，任一版本不存在时返回None
+
+    Raises:
+        LookupError: 章节块缺失（读取失败时数据库 / MinIO 的异常直接抛出），不缓存
+    """
+    cache_key = (from_version, to_version, granularity, output_format, context_lines)
+    cached = report_diff_cache.get(report_id, cache_key)
+    if cached is not None:
+        return cached
+
+    old_version = ReportVersions.get_version_snapshot(report_id, from_version)
+    new_version = ReportVersions.get_version_snapshot(report_id, to_version)
+    if not old_version or not new_version:
+        return None
+
+    old_chapters, blocks = _snapshot_chapters(old_version)
+    new_chapters, new_blocks = _snapshot_chapters(new_version)
+    blocks.update(new_blocks)
+
+    pairs = _align_chapters(old_chapters, new_chapters)
+
+    # 只读取内容发生变化的章节块
+    needed = set()
+    for old_entry, new_entry in pairs:
+        if old_entry and new_entry and old_entry["hash"] == new_entry["hash"]:
+            continue
+        needed.update(entry["hash"] for entry in (old_entry, new_entry) if entry)
+    missing = needed - blocks.keys()
+    if missing:
+        blocks.update(ReportVersions.get_chapter_blocks(report_id, missing))
+        # 缺块时整章会被当作新增 / 删除，且结果按不可变版本号永久缓存，直接报错
+        unresolved = missing - blocks.keys()
+        if unresolved:
+            raise LookupError(f"Missing {len(unresolved)} chapter blocks for report {report_id}")
+
+    chapters, unified_parts = [], []
+    stats = {
+        "insertions": 0,
+        "deletions": 0,
+        "chapters_modified": 0,
+        "chapters_added": 0,
+        "chapters_removed": 0,
+        "chapters_unchanged": 0,
+    }
+
+    for old_entry, new_entry in pairs:
+        entry = new_entry or old_entry
+        if old_entry and new_entry and old_entry["hash"] == new_entry["hash"]:
+            stats["chapters_unchanged"] += 1
+            chapters.append({"key": entry.get("key"), "title": entry["title"], "status": "unchanged"})
+            continue
+
+        if old_entry and new_entry:
+            status = "modified"
+        else:
+            status = "added" if new_entry else "removed"
+        stats[f"chapters_{status}"] += 1
+
+        old_units = split_units(blocks.get(old_entry["hash"], ""), granularity) if old_entry else []
+        new_units = split_units(blocks.get(new_entry["hash"], ""), granularity) if new_entry else []
+
+        if output_format == "unified":
+            unified_parts.extend(difflib.unified_diff(
+                old_units,
+                new_units,
+                fromfile=f"v{from_version}/{old_entry['title']}" if old_entry else "/dev/null",
+                tofile=f"v{to_version}/{new_entry['title']}" if new_entry else "/dev/null",
+                n=context_lines,
+                lineterm=""
+            ))
+            continue
+
+        ops, insertions, deletions = _diff_ops(old_units, new_units)
+        stats["insertions"] += insertions
+        stats["deletions"] += deletions
+        chapters.append({
+            "key": entry.get("key"),
+            "title": entry["title"],
+            "status": status,
+            "ops": ops,
+        })
+
+    if output_format == "unified":
+        result = "\n".join(unified_parts)
+    else:
+        result = {
+            "report_id": report_id,
+            "from_version": from_version,
+            "to_version": to_version,
+            "granularity": granularity,
+            "stats": stats,
+            "chapters": chapters,
+        }
+
+    report_diff_cache.put(report_id, cache_key, result)
+    logger.debug(
+        f"Diffed report {report_id} v{from_version}..v{to_version} ({granularity}/{output_format}), "
+        f"{len(missing)} blocks loaded"
+    )
+    return result
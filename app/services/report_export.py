@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   report_export.py
+@Desc    :   报告导出服务 - 将指定版本的 Markdown 渲染为 HTML / PDF / DOCX
+
+- 产物按 (report_id, version, format) 存储在 MinIO，版本快照不可变，已导出的直接返回
+- 渲染在进程池中执行，大报告导出不会阻塞 API 事件循环
+- 同一产物的并发导出请求合并为一次渲染
+
+依赖（按需导入）：
+- HTML: markdown
+- PDF:  markdown + weasyprint（直接抓取正文中的 MinIO 图表 URL）
+- DOCX: pypandoc（需要系统安装 pandoc）
+"""
+import asyncio
+import html
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.curd.reports import ReportVersions
+from app.database.minio_db import get_minio_client
+
+# 格式 -> (MIME类型, 扩展名)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "html": ("text/html; charset=utf-8", "html"),
+    "pdf": ("application/pdf", "pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+}
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists", "toc"]
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: "Noto Sans CJK SC", "WenQuanYi Zen Hei", "Microsoft YaHei", sans-serif;
+       max-width: 860px; margin: 2em auto; padding: 0 1em; line-height: 1.75; color: #222; }}
+h1, h2, h3 {{ line-height: 1.4; }}
+img {{ max-width: 100%; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border: 1px solid #ccc; padding: 6px 10px; }}
+pre {{ background: #f6f8fa; padding: 12px; overflow-x: auto; }}
+blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 1em; color: #555; }}
+@page {{ size: A4; margin: 2cm; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+# ==================== 渲染函数（在子进程中执行） ====================
+
+def render_html(markdown_text: str, title: str) -> bytes:
+    """Markdown -> 独立 HTML 文档"""
+    import markdown
+
+    body = markdown.markdown(markdown_text, extensions=MARKDOWN_EXTENSIONS)
+    return HTML_TEMPLATE.format(title=html.escape(title), body=body).encode("utf-8")
+
+
+def render_pdf(markdown_text: str, title: str) -> bytes:
+    """Markdown -> HTML -> PDF"""
+    from weasyprint import HTML
+
+    return HTML(string=render_html(markdown_text, title).decode("utf-8")).write_pdf()
+
+
+def render_docx(markdown_text: str, title: str) -> bytes:
+    """Markdown -> DOCX（pandoc 会下载正文中的远程图片并嵌入文档）"""
+    import os
+    import tempfile
+    import pypandoc
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "report.docx")
+        pypandoc.convert_text(
+            markdown_text,
+            to="docx",
+            format="gfm",
+            outputfile=output_path,
+            extra_args=["--metadata", f"title={title}"]
+        )
+        with open(output_path, "rb") as f:
+            return f.read()
+
+
+RENDERERS = {
+    "html": render_html,
+    "pdf": render_pdf,
+    "docx": render_docx,
+}
+
+
+# ==================== 导出服务 ====================
+
+class ReportExporter:
+    """报告导出服务（渲染进程池 + MinIO 产物缓存）"""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[Tuple[str, int, str], asyncio.Task] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """延迟创建渲染进程池"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"Report export pool started with {self.max_workers} workers")
+        return self._pool
+
+    async def export(self, report_id: str, version_number: int, export_format: str) -> Optional[Dict]:
+        """
+        导出指定版本，返回产物信息
+
+        Args:
+            report_id: 报告ID
+            version_number: 版本号
+            export_format: html / pdf / docx
+
+        Returns:
+            {"object_name", "url", "size", "content_type", "cached"}，版本不存在时返回None
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        key = (report_id, version_number, export_format)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._export(report_id, version_number, export_format))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield：单个请求断开不会取消其他请求共享的渲染
+        return await asyncio.shield(task)
+
+    async def _export(self, report_id: str, version_number: int, export_format: str) -> Optional[Dict]:
+        content_type, extension = EXPORT_FORMATS[export_format]
+        minio = get_minio_client()
+        object_name = minio.export_object_name(report_id, version_number, extension)
+
+        # 已导出的产物直接返回
+        size = await asyncio.to_thread(minio.get_object_size, object_name)
+        cached = size is not None
+
+        if not cached:
+            version = await asyncio.to_thread(
+                ReportVersions.get_version_by_number, report_id, version_number
+            )
+            if not version:
+                return None
+
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                self._get_pool(),
+                RENDERERS[export_format],
+                version.content,
+                version.title
+            )
+            await asyncio.to_thread(
+                minio.upload_export, data, report_id, version_number, extension, content_type
+            )
+            size = len(data)
+            logger.info(f"Exported report {report_id} v{version_number} to {export_format} ({size} bytes)")
+
+        url = await asyncio.to_thread(
+            minio.get_presigned_url, object_name, settings.REPORT_EXPORT_URL_EXPIRES
+        )
+        return {
+            "object_name": object_name,
+            "url": url,
+            "size": size,
+            "content_type": content_type,
+            "cached": cached,
+        }
+
+    def shutdown(self):
+        """关闭渲染进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# 全局单例
+report_exporter = ReportExporter(max_workers=settings.REPORT_EXPORT_WORKERS)
@@ -1,3 +1,4 @@
+import asyncio
 import re
 import time
 import json
@@ -11,7 +12,7 @@ from typing import AsyncGenerator, Dict
 
 from app.config import LOCAL_BIG_MODEL_PARAMS, settings
 
-from app.api.endpoints import chats, folders, reports, model_providers
+from app.api.endpoints import chats, folders, reports, model_providers, documents
 from loguru import logger
 # from langchain.prompts import ChatPromptTemplate
 # from app.core.prompts.chart_generate_prompt import CHART_GENERATE_PROMPTS
@@ -42,6 +43,111 @@ app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
 
 app.include_router(model_providers.router, prefix="/api/v1/model-providers", tags=["model-providers"])
 
+app.include_router(documents.router, prefix="/api/v1/documents", tags=["documents"])
+
+@app.on_event("startup")
+async def start_model_catalog_refresher():
+    """启动模型目录后台刷新任务"""
+    from app.services.model_catalog import model_catalog
+    model_catalog.start()
+
+
+@app.on_event("shutdown")
+async def stop_model_catalog_refresher():
+    """停止模型目录后台刷新任务"""
+    from app.services.model_catalog import model_catalog
+    await model_catalog.stop()
+
+
+@app.on_event("startup")
+async def start_provider_health_monitor():
+    """启动供应商健康监控后台任务"""
+    from app.services.provider_health import provider_health
+    provider_health.start()
+
+
+@app.on_event("shutdown")
+async def stop_provider_health_monitor():
+    """停止供应商健康监控后台任务"""
+    from app.services.provider_health import provider_health
+    await provider_health.stop()
+
+
+@app.on_event("startup")
+async def start_ollama_warmup():
+    """启动 Ollama 模型预加载和 keep_alive 续期任务"""
+    from app.services.ollama_warmup import ollama_warmup
+    ollama_warmup.start()
+
+
+@app.on_event("shutdown")
+async def stop_ollama_warmup():
+    """停止 Ollama 预加载后台任务"""
+    from app.services.ollama_warmup import ollama_warmup
+    await ollama_warmup.stop()
+
+
+@app.on_event("startup")
+async def start_graph_warmup():
+    """后台预编译 publisher 图"""
+    from app.agents.execution.graph_registry import graph_registry
+    graph_registry.start()
+
+
+@app.on_event("shutdown")
+async def stop_graph_warmup():
+    """停止图预编译任务"""
+    from app.agents.execution.graph_registry import graph_registry
+    await graph_registry.stop()
+
+
+@app.on_event("startup")
+async def start_chart_sandbox_pool():
+    """预热图表沙箱容器池（Docker 不可用时在第一次生成图表时再尝试）"""
+    if not (settings.SANDBOX_POOL_ENABLED and settings.SANDBOX_POOL_WARM_ON_STARTUP):
+        return
+    from app.agents.tools.generation.chart_generation import get_sandbox
+    try:
+        await asyncio.to_thread(get_sandbox)
+    except Exception as e:
+        logger.warning(f"Chart sandbox pool not started: {e}")
+
+
+@app.on_event("shutdown")
+async def close_chart_sandbox_pool():
+    """删除图表沙箱预热容器"""
+    from app.agents.tools.generation.chart_generation import close_sandbox
+    await asyncio.to_thread(close_sandbox)
+
+
+@app.on_event("shutdown")
+async def close_tavily_client():
+    """关闭 Tavily 搜索连接池"""
+    from app.agents.tools.search.tavily_client import tavily_client
+    await tavily_client.close()
+
+
+@app.on_event("shutdown")
+async def close_search_cache():
+    """关闭搜索缓存连接"""
+    from app.agents.tools.search.search_cache import search_cache
+    search_cache.close()
+
+
+@app.on_event("shutdown")
+async def stop_document_writing():
+    """取消运行中的写作任务并关闭 checkpointer（已保存的进度可在重启后恢复）"""
+    from app.services.document_writing import document_writing
+    await document_writing.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_report_exporter():
+    """关闭报告导出渲染进程池"""
+    from app.services.report_export import report_exporter
+    report_exporter.shutdown()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to LangGraph API Service!"}
@@ -0,0 +1,42 @@
+"""Add report chapter blocks
+
+Revision ID: b7c1e9d24a50
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e9d24a50'
+down_revision: Union[str, None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store report content as hash-addressed chapter blocks referenced by a chapter manifest."""
+    op.create_table(
+        'report_chapter_blocks',
+        sa.Column('report_id', sa.String(length=36), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('word_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', mysql.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('report_id', 'content_hash')
+    )
+
+    # 已有报告保持整篇存储（chapter_manifest 为空），首次编辑时迁移为分块存储
+    op.add_column('reports', sa.Column('chapter_manifest', mysql.JSON(), nullable=True))
+    op.add_column('report_versions', sa.Column('chapter_manifest', mysql.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop chapter manifest columns and chapter blocks table."""
+    op.drop_column('report_versions', 'chapter_manifest')
+    op.drop_column('reports', 'chapter_manifest')
+    op.drop_table('report_chapter_blocks')
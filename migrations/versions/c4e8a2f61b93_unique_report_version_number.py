@@ -0,0 +1,29 @@
+"""Make report version numbers unique per report
+
+Revision ID: c4e8a2f61b93
+Revises: b7c1e9d24a50
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f61b93'
+down_revision: Union[str, None] = 'b7c1e9d24a50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace idx_report_version with a unique index on (report_id, version_number)."""
+    # 注意：若历史数据中已存在重复版本号，需要先手动清理再执行迁移
+    op.drop_index('idx_report_version', table_name='report_versions')
+    op.create_index('idx_report_version', 'report_versions', ['report_id', 'version_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Restore the non-unique idx_report_version index."""
+    op.drop_index('idx_report_version', table_name='report_versions')
+    op.create_index('idx_report_version', 'report_versions', ['report_id', 'version_number'], unique=False)
@@ -0,0 +1,47 @@
+"""Add word_count to report versions
+
+Revision ID: d93f5b7e0c12
+Revises: c4e8a2f61b93
+Create Date: 2026-10-19
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93f5b7e0c12'
+down_revision: Union[str, None] = 'c4e8a2f61b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store snapshot size on report_versions so history listings never read content."""
+    op.add_column('report_versions', sa.Column('word_count', sa.Integer(), nullable=True, server_default='0'))
+
+    # 整篇存储的历史版本按正文长度回填
+    op.execute(
+        "UPDATE report_versions SET word_count = CHAR_LENGTH(content) "
+        "WHERE chapter_manifest IS NULL"
+    )
+
+    # 分块存储的版本按章节清单汇总
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, chapter_manifest FROM report_versions WHERE chapter_manifest IS NOT NULL"
+    )).fetchall()
+    for version_id, manifest in rows:
+        if isinstance(manifest, str):
+            manifest = json.loads(manifest)
+        conn.execute(
+            sa.text("UPDATE report_versions SET word_count = :wc WHERE id = :id"),
+            {"wc": sum(entry.get("word_count", 0) for entry in manifest or []), "id": version_id}
+        )
+
+
+def downgrade() -> None:
+    """Drop word_count from report_versions."""
+    op.drop_column('report_versions', 'word_count')
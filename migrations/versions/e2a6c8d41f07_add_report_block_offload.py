@@ -0,0 +1,31 @@
+"""Add object store pointer to report chapter blocks
+
+Revision ID: e2a6c8d41f07
+Revises: d93f5b7e0c12
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6c8d41f07'
+down_revision: Union[str, None] = 'd93f5b7e0c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Allow chapter block bodies to live in MinIO, keeping only a pointer and size in the row."""
+    op.add_column('report_chapter_blocks', sa.Column('object_key', sa.String(length=255), nullable=True))
+    op.add_column('report_chapter_blocks', sa.Column('size', sa.Integer(), nullable=True, server_default='0'))
+    op.execute("UPDATE report_chapter_blocks SET size = LENGTH(content)")
+
+
+def downgrade() -> None:
+    """Drop object store pointer columns from report_chapter_blocks."""
+    # 注意：降级前需先将存储在 MinIO 中的块正文回填到 content 列
+    op.drop_column('report_chapter_blocks', 'size')
+    op.drop_column('report_chapter_blocks', 'object_key')
@@ -0,0 +1,44 @@
+"""Create model_catalog table
+
+Revision ID: f5b1d3e7a829
+Revises: e2a6c8d41f07
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b1d3e7a829'
+down_revision: Union[str, None] = 'e2a6c8d41f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create model_catalog table and catalog refresh state on model_provider."""
+    op.create_table(
+        'model_catalog',
+        sa.Column('provider_id', sa.String(length=36), nullable=False),
+        sa.Column('model_id', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('model_type', sa.String(length=20), nullable=False, server_default='llm'),
+        sa.Column('context_length', sa.Integer(), nullable=True),
+        sa.Column('is_enabled', sa.Boolean(), nullable=False, server_default=sa.text('1')),
+        sa.Column('fetched_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('provider_id', 'model_id')
+    )
+
+    op.add_column('model_provider', sa.Column('catalog_refreshed_at', sa.BigInteger(), nullable=True))
+    op.add_column('model_provider', sa.Column('catalog_checked_at', sa.BigInteger(), nullable=True))
+    op.add_column('model_provider', sa.Column('catalog_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop model_catalog table and catalog refresh state."""
+    op.drop_column('model_provider', 'catalog_error')
+    op.drop_column('model_provider', 'catalog_checked_at')
+    op.drop_column('model_provider', 'catalog_refreshed_at')
+    op.drop_table('model_catalog')
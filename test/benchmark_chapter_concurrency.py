@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+@File    :   benchmark_chapter_concurrency.py
+@Desc    :   章节内容生成子图的单 worker 并发基准
+
+用模拟的 LLM / 搜索（固定延迟，不调用外部服务）驱动真实的 chapter_content_generation 子图，
+在同一个事件循环中同时运行 N 个章节，比较两种调用方式：
+
+- threaded：每次 LLM / 搜索调用占用默认线程池中的一个线程（改造前的同步节点由 LangGraph 放入线程池执行）
+- async：   原生异步调用（改造后的节点）
+
+线程池大小为 min(32, CPU + 4)，threaded 模式下并发章节数超过线程数后耗时开始线性增长；
+async 模式下耗时基本保持为单章节耗时。为了只测量 worker 本身，基准中放开了 governor 的并发上限。
+
+用法：
+    python -m test.benchmark_chapter_concurrency
+    python -m test.benchmark_chapter_concurrency --levels 1 16 64 256 --scale 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage
+
+import app.agents.core.publisher.subgraphs.chapter_content_generation.nodes as nodes
+import app.agents.tools.search.tavily_search as tavily_search
+from app.agents.core.publisher.subgraphs.chapter_content_generation.agent import create_iterative_chapter_subgraph
+from app.agents.execution.concurrency import governor
+
+# 模拟延迟（秒）
+LATENCY = {"queries": 0.5, "search": 0.3, "write": 1.0, "evaluate": 0.5}
+
+# 可接受的耗时放大倍数（相对单章节），用于计算“单 worker 可同时推进的章节数”
+SLOWDOWN_TOLERANCE = 1.2
+
+
+class _Simulated:
+    """按模式模拟一次阻塞 / 异步调用"""
+
+    def __init__(self, mode: str, scale: float):
+        self.mode = mode
+        self.scale = scale
+
+    async def wait(self, kind: str):
+        delay = LATENCY[kind] * self.scale
+        if self.mode == "threaded":
+            await asyncio.to_thread(time.sleep, delay)
+        else:
+            await asyncio.sleep(delay)
+
+
+def _install_fakes(sim: _Simulated):
+    """替换节点中的模型、Agent 和搜索工具"""
+
+    class StructuredModel:
+        def __init__(self, schema):
+            self.schema = schema
+
+        async def ainvoke(self, _prompt):
+            if self.schema is nodes.QueryList:
+                await sim.wait("queries")
+                return nodes.QueryList(queries=["q1", "q2", "q3"])
+            await sim.wait("evaluate")
+            return nodes.DraftEvaluation(is_satisfied=True, coverage_score=0.9, follow_up_queries=[])
+
+    class ChatModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def with_structured_output(self, schema):
+            return StructuredModel(schema)
+
+    class Agent:
+        async def ainvoke(self, _inputs, config=None):
+            await sim.wait("write")
+            return {"messages": [AIMessage(content="# 章节\n\n" + "内容" * 400)]}
+
+    async def search(query):
+        await sim.wait("search")
+        return [
+            {"type": "page", "url": f"https://example.com/{query}/{i}", "title": f"{query} {i}",
+             "content": "search result " * 50, "raw_content": "search result " * 50}
+            for i in range(3)
+        ]
+
+    # 节点通过 init_chat_model 创建模型
+    nodes.init_chat_model = lambda *args, **kwargs: ChatModel()
+    nodes.create_agent = lambda *args, **kwargs: Agent()
+    tavily_search.search_pages = search
+
+    # 只测量 worker 本身，不受全局 / 文档并发上限影响
+    governor._limit = lambda kind, provider: 100_000
+
+
+def _chapter_outline(chapter_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        title=f"Chapter {chapter_id}",
+        description="",
+        content_requirements="",
+        writing_guidance="",
+        visual_elements=False,
+        estimated_words=800,
+        subsections=[],
+    )
+
+
+def _document_outline(total_chapters: int) -> SimpleNamespace:
+    """写作模板需要的文档大纲字段"""
+    return SimpleNamespace(
+        title="Benchmark",
+        target_audience="",
+        writing_style="",
+        writing_tone="",
+        writing_purpose="",
+        language="Chinese",
+        key_themes=[],
+        sections=[_chapter_outline(i) for i in range(1, total_chapters + 1)],
+    )
+
+
+def _chapter_input(chapter_id: int, document_outline: SimpleNamespace) -> Dict:
+    return {
+        "chapter_id": chapter_id,
+        "chapter_outline": document_outline.sections[chapter_id - 1],
+        "document_outline": document_outline,
+        "iteration": 0,
+        "search_results": [],
+    }
+
+
+async def _run_level(graph, concurrency: int) -> float:
+    document_outline = _document_outline(concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        graph.ainvoke(_chapter_input(i, document_outline)) for i in range(1, concurrency + 1)
+    ))
+    return time.perf_counter() - started
+
+
+async def benchmark(mode: str, levels: List[int], scale: float) -> List[Dict]:
+    sim = _Simulated(mode, scale)
+    _install_fakes(sim)
+    graph = create_iterative_chapter_subgraph()
+
+    results = []
+    for level in levels:
+        elapsed = await _run_level(graph, level)
+        results.append({"concurrency": level, "elapsed": elapsed, "throughput": level / elapsed})
+    return results
+
+
+def _report(mode: str, results: List[Dict]):
+    baseline = results[0]["elapsed"] / results[0]["concurrency"] if results[0]["concurrency"] == 1 else None
+    print(f"\n[{mode}]")
+    print(f"{'chapters':>10} {'elapsed(s)':>12} {'chapters/s':>12} {'slowdown':>10}")
+    sustained = 0
+    for r in results:
+        slowdown = r["elapsed"] / baseline if baseline else float("nan")
+        if baseline and slowdown <= SLOWDOWN_TOLERANCE:
+            sustained = r["concurrency"]
+        print(f"{r['concurrency']:>10} {r['elapsed']:>12.2f} {r['throughput']:>12.2f} {slowdown:>10.2f}")
+    if baseline:
+        print(f"  concurrent chapters per worker (slowdown <= {SLOWDOWN_TOLERANCE}x): {sustained}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chapter content generation concurrency benchmark")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 16, 32, 64, 128])
+    parser.add_argument("--scale", type=float, default=1.0, help="模拟延迟缩放")
+    parser.add_argument("--mode", choices=["threaded", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    print(f"default thread pool size: {min(32, (os.cpu_count() or 1) + 4)}")
+    modes = ["threaded", "async"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        _report(mode, asyncio.run(benchmark(mode, args.levels, args.scale)))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ from datetime import datetime
 
 load_dotenv()
 from loguru import logger
-from app.agents.core.publisher.blueprint import build_agent
+from app.agents.core.publisher.blueprint.agent import build_agent
 from langgraph.types import Command
 
 
@@ -822,6 +822,83 @@ async def test_individual_nodes():
     logger.info("="*80 + "\n")
 
 
+async def test_start_and_resume_run():
+    """
+    测试通过 document_writing 启动运行、中止后从 checkpoint 恢复
+
+    第一个章节完成后中止运行，恢复后已完成的章节不应重新生成。
+    """
+    import uuid
+    from app.agents.execution.progress import run_events
+    from app.services.document_writing import document_writing, WritingRunConflictError
+
+    logger.info("\n" + "="*80)
+    logger.info("开始测试 启动 / 中止 / 恢复")
+    logger.info("="*80 + "\n")
+
+    document_id = f"test-run-{uuid.uuid4().hex[:8]}"
+
+    # === 1. 启动 ===
+    run = await document_writing.start(document_id, {
+        "chat_id": "test-chat-003",
+        "document_outline": document_outline,
+    })
+    assert run["status"] in ("pending", "running"), f"启动后状态异常: {run['status']}"
+    logger.info(f"  ✓ 运行已启动: {document_id}")
+
+    # 启动返回后立即订阅进度事件（SSE 接口使用同一订阅）
+    assert run_events.has_run(document_id), "启动后没有事件通道"
+    received = []
+
+    async def collect_events():
+        async for record in run_events.subscribe(document_id):
+            if record is not None:
+                received.append(record.event)
+
+    collector = asyncio.create_task(collect_events())
+
+    try:
+        await document_writing.start(document_id, {"document_outline": document_outline})
+        raise AssertionError("重复启动应当冲突")
+    except WritingRunConflictError:
+        logger.info("  ✓ 重复启动被拒绝")
+
+    # === 2. 等待第一个章节完成后中止 ===
+    while True:
+        await asyncio.sleep(5)
+        run = await document_writing.get_status(document_id)
+        if run["completed_chapters"] or run["status"] != "running":
+            break
+    done_before = set(run["completed_chapters"])
+    assert document_writing.abort(document_id), "中止失败：运行已结束"
+    while document_writing.is_running(document_id):
+        await asyncio.sleep(0.5)
+
+    run = await document_writing.get_status(document_id)
+    assert run["status"] in ("failed", "interrupted"), f"中止后状态异常: {run['status']}"
+    logger.info(f"  ✓ 已中止，已完成章节: {sorted(done_before)}")
+
+    await asyncio.wait_for(collector, timeout=10)
+    assert received[0] == "run_started" and received[-1] == "run_aborted", f"事件顺序异常: {received}"
+    assert "chapter_started" in received and "chapter_finished" in received, f"缺少章节事件: {received}"
+    logger.info(f"  ✓ 收到 {len(received)} 条进度事件")
+
+    # === 3. 恢复并等待完成 ===
+    run = await document_writing.resume(document_id)
+    assert run is not None and run["status"] in ("pending", "running")
+    while document_writing.is_running(document_id):
+        await asyncio.sleep(5)
+
+    run = await document_writing.get_status(document_id)
+    assert run["status"] == "completed", f"恢复后未完成: {run['status']} {run['error']}"
+    assert done_before <= set(run["completed_chapters"]), "恢复后丢失了已完成的章节"
+    assert len(run["completed_chapters"]) == len(document_outline.sections)
+    logger.success(f"  ✓ 恢复完成，共 {len(run['completed_chapters'])} 个章节\n")
+
+    await document_writing.stop()
+    return run
+
+
 # ========== 主函数 ==========
 
 async def main():
@@ -831,7 +908,7 @@ async def main():
     logger.info("🎯 " + "="*74 + "\n")
 
     # 选择测试模式
-    test_mode = "full"  # 可选: "full", "nodes", "both"
+    test_mode = "full"  # 可选: "full", "nodes", "run", "both"
 
     if test_mode in ["full", "both"]:
         logger.info("📌 运行完整 Graph 测试...\n")
@@ -841,6 +918,10 @@ async def main():
         logger.info("📌 运行独立节点测试...\n")
         await test_individual_nodes()
 
+    if test_mode == "run":
+        logger.info("📌 运行启动 / 恢复测试...\n")
+        await test_start_and_resume_run()
+
     logger.info("\n" + "🎉 " + "="*74)
     logger.success("🎉  所有测试完成！")
     logger.info("🎉 " + "="*74 + "\n")